@@ -8,10 +8,35 @@ from PIL import Image
 import io
 import re
 from datetime import datetime
+from contextlib import contextmanager, nullcontext
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit, parse_qsl, urlencode
 import time
 import base64
+import csv
+import functools
+import json
+import math
+import random
+import sqlite3
+import threading
+from spatial import PolygonGridIndex, dbscan, geometry_polygons, local_meters
+from bk_tree import BKTree
+from excel_writer import StreamingWorkbook, column_widths
+from ocr_layout import OcrLayout
+from pipeline import PipelineStats, Stage, StreamingPipeline
+from keyword_matcher import KeywordMatcher
+from wss_patterns import (
+    ADMIN_LEVEL_PREFIX, BUSINESS_NAME_CLEANUP, CONTEXTUAL_COORDINATES, CONTEXTUAL_STREET, COORDINATES, JALAN,
+    LINE_NAME_CLEANUP, MAP_ID, MAP_ID_EXACT, OPENING_HOURS, SCALE_RATIO, STREET, WHITESPACE, scan_admin_fields
+)
+from wss_records import (
+    Business, Coordinate, Environment, EntityIndex, EnvironmentIndex, Landmark, NamedRecord, SEGMENT_FIELDS, Street
+)
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -20,6 +45,65 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# OCR lines longer than this are cut before parsing, so one garbage line cannot stall a request
+# (map labels are far shorter); 0 disables the limit
+app.config['MAX_OCR_LINE_LENGTH'] = int(os.environ.get('MAX_OCR_LINE_LENGTH', 1000))
+# Distinct environment/street/business names whose classification (area type, dominant load,
+# KK and business estimates) is memoized; least recently used names are dropped first
+app.config['NAME_CLASSIFIER_CACHE_SIZE'] = int(os.environ.get('NAME_CLASSIFIER_CACHE_SIZE', 4096))
+
+# Nominatim base URL; point it at mock_nominatim.py for offline, reproducible runs
+app.config['NOMINATIM_URL'] = os.environ.get('NOMINATIM_URL', 'https://nominatim.openstreetmap.org').rstrip('/')
+# When set, every geocoding response is recorded to this JSON file for replay by mock_nominatim.py
+app.config['GEOCODER_RECORD_PATH'] = os.environ.get('GEOCODER_RECORD_PATH', '')
+
+# Business enrichment mode: 'per_business' runs one Nominatim search per business,
+# 'area' pulls every named POI of the map's village once and matches locally
+app.config['ENRICHMENT_MODE'] = os.environ.get('ENRICHMENT_MODE', 'per_business')
+app.config['OVERPASS_URL'] = os.environ.get('OVERPASS_URL', 'https://overpass-api.de/api/interpreter')
+# Optional local Overpass-style JSON extract ({"elements": [...]}) used instead of Overpass
+app.config['POI_EXTRACT_PATH'] = os.environ.get('POI_EXTRACT_PATH', '')
+
+# Persistent cache of successful geocoding lookups (SQLite file); pre-warm it with prewarm_geocode_cache.py
+app.config['GEOCODE_CACHE_PATH'] = os.environ.get('GEOCODE_CACHE_PATH', '')
+app.config['GEOCODE_CACHE_TTL_DAYS'] = float(os.environ.get('GEOCODE_CACHE_TTL_DAYS', 30))
+# Every processed map (admin fields, businesses, OCR text) is kept here as <map_id>.json
+app.config['PROCESSED_MAPS_FOLDER'] = os.environ.get('PROCESSED_MAPS_FOLDER', 'processed_maps')
+
+# Optional GeoJSON of village (desa/kelurahan) polygons for local reverse lookup and validation
+# of geocoded coordinates against the map's own kecamatan/desa
+app.config['ADMIN_BOUNDARY_PATH'] = os.environ.get('ADMIN_BOUNDARY_PATH', '')
+# Businesses within ECONOMIC_CLUSTER_RADIUS_M meters of each other (by the coordinates their details
+# carry) form an economic cluster once at least ECONOMIC_CLUSTER_MIN_BUSINESSES are together
+app.config['ECONOMIC_CLUSTER_RADIUS_M'] = float(os.environ.get('ECONOMIC_CLUSTER_RADIUS_M', 150))
+app.config['ECONOMIC_CLUSTER_MIN_BUSINESSES'] = int(os.environ.get('ECONOMIC_CLUSTER_MIN_BUSINESSES', 3))
+# BPS wilayah code master (CSV: kode,nama) used to decode admin names from the 16-digit map ID
+app.config['BPS_WILAYAH_PATH'] = os.environ.get(
+    'BPS_WILAYAH_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'bps_wilayah.csv'))
+
+# Geocoding client retry and circuit breaker policy
+app.config['GEOCODER_MAX_RETRIES'] = int(os.environ.get('GEOCODER_MAX_RETRIES', 2))
+app.config['GEOCODER_BREAKER_THRESHOLD'] = int(os.environ.get('GEOCODER_BREAKER_THRESHOLD', 5))
+app.config['GEOCODER_BREAKER_COOLDOWN'] = float(os.environ.get('GEOCODER_BREAKER_COOLDOWN', 30))
+
+# End-to-end latency budget per /upload or /capture request (seconds); businesses not
+# enriched in time are returned as 'pending' and resolved by background workers
+app.config['REQUEST_BUDGET_SECONDS'] = float(os.environ.get('REQUEST_BUDGET_SECONDS', 30))
+app.config['ENRICHMENT_WORKERS'] = int(os.environ.get('ENRICHMENT_WORKERS', 2))
+# Streaming parse: businesses are looked up by PIPELINE_WORKERS threads while later lines are still
+# being parsed, at most PIPELINE_QUEUE_SIZE waiting; 0 workers looks them up after parsing
+app.config['PIPELINE_WORKERS'] = int(os.environ.get('PIPELINE_WORKERS', 4))
+app.config['PIPELINE_QUEUE_SIZE'] = int(os.environ.get('PIPELINE_QUEUE_SIZE', 16))
+
+# Deferred enrichment: 'off' enriches during the request, 'background' returns the preview right
+# after OCR/parsing/segments and enriches in a worker, 'on_demand' waits until business details
+# are requested (GET /maps/<map_id>/business-details or /download)
+app.config['DEFERRED_ENRICHMENT'] = os.environ.get('DEFERRED_ENRICHMENT', 'off')
+
+# Processing tier used when a request names none ('fast', 'standard' or 'full', see PROCESSING_TIERS)
+app.config['DEFAULT_PROCESSING_TIER'] = os.environ.get('DEFAULT_PROCESSING_TIER', 'full')
+# Share of the image height, from the top, the 'fast' tier reads with OCR (map ID and admin header)
+app.config['HEADER_OCR_FRACTION'] = float(os.environ.get('HEADER_OCR_FRACTION', 0.3))
 
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -69,11 +153,348 @@ def validate_map_data(wss_data):
     
     # Additional validation for map_id format (should be 16 digits)
     map_id = wss_data.get('map_id', '')
-    if not re.match(r'^\d{16}$', map_id):
+    if not MAP_ID_EXACT.match(map_id):
         return False, ['map_id'], f"Map ID tidak valid. Format harus 16 digit angka. Ditemukan: {map_id}"
     
     return True, [], "Data map valid dan lengkap"
 
+# Per-request latency budget: geocoding calls made inside geocoding_deadline() never outlive it
+request_deadline = threading.local()
+
+@contextmanager
+def geocoding_deadline(deadline):
+    """Apply a time.monotonic() deadline to every geocoding call made by this thread"""
+    previous = getattr(request_deadline, 'value', None)
+    request_deadline.value = deadline
+    try:
+        yield
+    finally:
+        request_deadline.value = previous
+
+def budget_spent(deadline):
+    return deadline is not None and time.monotonic() >= deadline
+
+# Geocoding calls made inside geocoding_cache_only(True) are answered from the geocode cache or not at all
+cache_only_lookups = threading.local()
+
+@contextmanager
+def geocoding_cache_only(enabled=True):
+    """Keep the geocoding calls of this thread off the network: geocode cache hits only"""
+    previous = getattr(cache_only_lookups, 'value', False)
+    cache_only_lookups.value = enabled
+    try:
+        yield
+    finally:
+        cache_only_lookups.value = previous
+
+def lookups_cut_short():
+    """True when an empty lookup result may only mean the lookup was not allowed to finish"""
+    return getattr(cache_only_lookups, 'value', False) or budget_spent(getattr(request_deadline, 'value', None))
+
+# Lookup memo of the current thread: repeated business/coordinate lookups of one map (e.g. while
+# its OCR text is being corrected) are answered from it instead of Nominatim
+lookup_memo = threading.local()
+
+@contextmanager
+def enrichment_memo(memo):
+    """Serve the memoized lookups made by this thread from memo, a dict filled as lookups complete"""
+    previous = getattr(lookup_memo, 'value', None)
+    lookup_memo.value = memo
+    try:
+        yield memo
+    finally:
+        lookup_memo.value = previous
+
+# Geocoding calls of the current thread that raised (spent budget, cache-only miss, open circuit,
+# network error); the lookups they belong to caught the error and returned a stand-in result
+unfinished_geocoding = threading.local()
+
+def memoized_lookup(function):
+    """
+    Decorator: answer a lookup from the active enrichment_memo, keyed by function and arguments
+    Lookups a geocoding call could not finish are not stored, the next parse looks them up again
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        memo = getattr(lookup_memo, 'value', None)
+        if memo is None:
+            return function(*args, **kwargs)
+        key = json.dumps([function.__name__, args, kwargs], sort_keys=True, default=str)
+        if key in memo:
+            return memo[key]
+        unfinished = getattr(unfinished_geocoding, 'count', 0)
+        result = function(*args, **kwargs)
+        if getattr(unfinished_geocoding, 'count', 0) != unfinished:
+            return result
+        # An empty result cut short by the request budget or a cache-only tier is retried on the next parse
+        if result or not lookups_cut_short():
+            memo[key] = result
+        return result
+    return wrapper
+
+def geocoding_fixture_key(method, path, query, body=''):
+    """Stable key of a geocoding request for record/replay: method, path and sorted query/form fields"""
+    fields = sorted(parse_qsl(query, keep_blank_values=True)) + sorted(parse_qsl(body, keep_blank_values=True))
+    return f"{method.upper()} {path}?{urlencode(fields)}"
+
+class GeocodingUnavailable(Exception):
+    """Raised when the geocoding circuit breaker is open"""
+
+class RequestBudgetExceeded(GeocodingUnavailable):
+    """Raised when the current request's latency budget is spent"""
+
+class GeocodeCache:
+    """Persistent SQLite cache of successful geocoding GET responses, keyed like geocoding_fixture_key"""
+
+    def __init__(self, path, ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS geocode_cache (key TEXT PRIMARY KEY, body TEXT, fetched_at REAL)')
+
+    def get(self, key):
+        """Cached JSON body, or None when missing or older than the TTL"""
+        with self.lock:
+            row = self.conn.execute('SELECT body, fetched_at FROM geocode_cache WHERE key = ?', (key,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return json.loads(row[0])
+
+    def put(self, key, body):
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO geocode_cache (key, body, fetched_at) VALUES (?, ?, ?)',
+                              (key, json.dumps(body, ensure_ascii=False), time.time()))
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM geocode_cache').fetchone()[0]
+
+geocode_caches = {}
+
+def get_geocode_cache():
+    """The GEOCODE_CACHE_PATH cache, opened once per path; None when caching is off"""
+    path = app.config['GEOCODE_CACHE_PATH']
+    if not path:
+        return None
+    if path not in geocode_caches:
+        geocode_caches[path] = GeocodeCache(path, app.config['GEOCODE_CACHE_TTL_DAYS'] * 86400)
+    return geocode_caches[path]
+
+def request_fixture_key(method, url, kwargs):
+    """geocoding_fixture_key of an outgoing request, from its URL, params and form data"""
+    prepared = requests.Request(method, url, params=kwargs.get('params'), data=kwargs.get('data')).prepare()
+    parsed = urlsplit(prepared.url)
+    body = prepared.body.decode('utf-8') if isinstance(prepared.body, bytes) else (prepared.body or '')
+    return geocoding_fixture_key(method, parsed.path, parsed.query, body)
+
+def cached_response(body):
+    """requests.Response carrying a cached JSON body"""
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/json'
+    response._content = json.dumps(body).encode('utf-8')
+    return response
+
+class GeocodingClient:
+    """
+    Shared HTTP client for Nominatim/Overpass calls
+    Pooled keep-alive session, bounded retries with jittered backoff on 429/5xx,
+    and a circuit breaker that fails fast after consecutive errors
+    GET responses are served from the geocode cache when one is configured
+    """
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, max_retries=2, backoff_base=0.5, backoff_max=8.0,
+                 breaker_threshold=5, breaker_cooldown=30.0, pool_size=10, min_interval=0.0):
+        self.max_retries = max_retries
+        # Minimum seconds between outgoing requests (Nominatim's usage policy allows one per second)
+        self.min_interval = min_interval
+        self.next_request_at = 0.0
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'User-Agent': 'WSS-Map-Extractor/1.0'})
+        
+        self.lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.breaker_open_until = 0.0
+        self.stats = {
+            'calls': 0,
+            'retries': 0,
+            'failures': 0,
+            'breaker_trips': 0,
+            'breaker_rejections': 0,
+            'cache_hits': 0,
+            'cache_only_misses': 0,
+            'total_latency': 0.0,
+            'max_latency': 0.0
+        }
+
+    def breaker_is_open(self):
+        return time.monotonic() < self.breaker_open_until
+
+    def _record_attempt(self, latency, failed):
+        with self.lock:
+            self.stats['calls'] += 1
+            self.stats['total_latency'] += latency
+            self.stats['max_latency'] = max(self.stats['max_latency'], latency)
+            if not failed:
+                self.consecutive_failures = 0
+                return
+            self.stats['failures'] += 1
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.breaker_threshold and not self.breaker_is_open():
+                self.breaker_open_until = time.monotonic() + self.breaker_cooldown
+                self.stats['breaker_trips'] += 1
+                logger.warning(f"Geocoding circuit breaker opened for {self.breaker_cooldown}s after {self.consecutive_failures} consecutive failures")
+
+    def _backoff_delay(self, attempt, response):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        # Full jitter: random delay up to the exponential cap
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _throttle(self):
+        """Sleep until min_interval has passed since the previous outgoing request"""
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_request_at - now
+            self.next_request_at = max(now, self.next_request_at) + self.min_interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request with retries; raises GeocodingUnavailable while the breaker is open or, inside
+        geocoding_cache_only(), on a cache miss, and RequestBudgetExceeded once the thread's
+        geocoding_deadline() has passed. Every call that raises is counted for memoized_lookup.
+        """
+        try:
+            return self._request(method, url, **kwargs)
+        except (GeocodingUnavailable, requests.RequestException):
+            unfinished_geocoding.count = getattr(unfinished_geocoding, 'count', 0) + 1
+            raise
+
+    def _request(self, method, url, **kwargs):
+        cache = get_geocode_cache() if method == 'GET' else None
+        if cache is not None:
+            cache_key = request_fixture_key(method, url, kwargs)
+            body = cache.get(cache_key)
+            if body is not None:
+                with self.lock:
+                    self.stats['cache_hits'] += 1
+                return cached_response(body)
+        if getattr(cache_only_lookups, 'value', False):
+            with self.lock:
+                self.stats['cache_only_misses'] += 1
+            raise GeocodingUnavailable(f"Not in the geocode cache (cache-only lookups): {url}")
+        
+        deadline = getattr(request_deadline, 'value', None)
+        timeout = kwargs.get('timeout')
+        for attempt in range(self.max_retries + 1):
+            capped = False
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RequestBudgetExceeded(f"Request budget spent before calling {url}")
+                if timeout is None or timeout > remaining:
+                    kwargs['timeout'] = remaining
+                    capped = True
+            
+            if self.breaker_is_open():
+                with self.lock:
+                    self.stats['breaker_rejections'] += 1
+                raise GeocodingUnavailable(f"Geocoding service unavailable (circuit open): {url}")
+            
+            if self.min_interval:
+                self._throttle()
+            start = time.monotonic()
+            response = None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.Timeout:
+                # The timeout already spent the caller's patience, do not retry.
+                # A timeout cut short by the request budget says nothing about the service.
+                self._record_attempt(time.monotonic() - start, failed=not capped)
+                raise
+            except requests.ConnectionError:
+                self._record_attempt(time.monotonic() - start, failed=True)
+                if attempt == self.max_retries:
+                    raise
+            else:
+                failed = response.status_code in self.RETRY_STATUSES
+                self._record_attempt(time.monotonic() - start, failed=failed)
+                if not failed or attempt == self.max_retries:
+                    if app.config['GEOCODER_RECORD_PATH']:
+                        self.record_response(method, url, kwargs, response)
+                    if cache is not None and response.status_code == 200:
+                        try:
+                            cache.put(cache_key, response.json())
+                        except ValueError:
+                            pass
+                    return response
+            
+            delay = self._backoff_delay(attempt, response)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                if response is not None:
+                    return response
+                raise RequestBudgetExceeded(f"Request budget spent while retrying {url}")
+            with self.lock:
+                self.stats['retries'] += 1
+            logger.info(f"Retrying {url} in {delay:.2f}s (attempt {attempt + 2}/{self.max_retries + 1})")
+            time.sleep(delay)
+
+    def record_response(self, method, url, kwargs, response):
+        """Append a response to the GEOCODER_RECORD_PATH fixture file, keyed like mock_nominatim.py replays it"""
+        key = request_fixture_key(method, url, kwargs)
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = response.text
+        
+        path = app.config['GEOCODER_RECORD_PATH']
+        with self.lock:
+            recordings = {}
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    recordings = json.load(f)
+            recordings[key] = {'status': response.status_code, 'body': payload}
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(recordings, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def get_stats(self):
+        """Snapshot of the exported counters"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['avg_latency'] = stats['total_latency'] / stats['calls'] if stats['calls'] else 0.0
+            stats['consecutive_failures'] = self.consecutive_failures
+        stats['breaker_state'] = 'open' if self.breaker_is_open() else 'closed'
+        return stats
+
+geocoder = GeocodingClient(
+    max_retries=app.config['GEOCODER_MAX_RETRIES'],
+    breaker_threshold=app.config['GEOCODER_BREAKER_THRESHOLD'],
+    breaker_cooldown=app.config['GEOCODER_BREAKER_COOLDOWN']
+)
+
+@memoized_lookup
 def search_business_info(business_name, location="Indonesia"):
     """
     Search business information from OpenStreetMap Nominatim API with improved accuracy
@@ -81,13 +502,13 @@ def search_business_info(business_name, location="Indonesia"):
     """
     try:
         # Clean business name for search
-        clean_name = re.sub(r'[^\w\s]', '', business_name).strip()
+        clean_name = BUSINESS_NAME_CLEANUP.sub('', business_name).strip()
         if len(clean_name) < 3:
             return {}
         
         # Search query with more specific location
         search_query = f"{clean_name}, {location}"
-        url = "https://nominatim.openstreetmap.org/search"
+        url = f"{app.config['NOMINATIM_URL']}/search"
         params = {
             'q': search_query,
             'format': 'json',
@@ -100,7 +521,7 @@ def search_business_info(business_name, location="Indonesia"):
         }
         
         logger.info(f"Searching for business: {search_query}")
-        response = requests.get(url, params=params, headers=headers, timeout=15)
+        response = geocoder.get(url, params=params, headers=headers, timeout=15)
         
         if response.status_code == 200:
             data = response.json()
@@ -144,7 +565,7 @@ def search_business_info(business_name, location="Indonesia"):
                     opening_hours = extratags['opening_hours']
                 else:
                     # Try to find hours in display_name
-                    hours_match = re.search(r'(\d{1,2}:\d{2}\s*[-–]\s*\d{1,2}:\d{2})', address)
+                    hours_match = OPENING_HOURS.search(address)
                     if hours_match:
                         opening_hours = hours_match.group(1)
                 
@@ -191,36 +612,9 @@ def estimate_kk_count_improved(name, business_details=None):
     """
     Improved KK count estimation based on environment type and business details
     """
-    name_lower = name.lower()
-    
-    # Check if it's a residential area
-    if any(word in name_lower for word in ['perumahan', 'kompleks', 'villa', 'rumah', 'permukiman', 'kampung', 'desa', 'kelurahan', 'lingkungan']):
-        # Estimate based on typical residential density
-        if 'perumahan' in name_lower or 'kompleks' in name_lower:
-            return 150  # High density residential
-        elif 'villa' in name_lower:
-            return 50   # Low density residential
-        elif 'lingkungan' in name_lower:
-            # For lingkungan, estimate based on typical neighborhood size
-            return 80   # Standard neighborhood
-        else:
-            return 100  # Standard residential
-    
-    # Check if it's commercial area
-    elif any(word in name_lower for word in ['mall', 'pasar', 'toko', 'shop', 'market', 'plaza', 'center']):
-        return 20  # Commercial areas have fewer KK
-    
-    # Check if it's industrial area
-    elif any(word in name_lower for word in ['industri', 'factory', 'pabrik', 'kawasan']):
-        return 100  # Industrial areas may have worker housing
-    
-    # Check if it's hotel/resort area
-    elif any(word in name_lower for word in ['hotel', 'resort', 'wisata', 'tourism']):
-        return 50  # Tourism areas
-    
-    # Check if it's office area
-    elif any(word in name_lower for word in ['kantor', 'office', 'perkantoran', 'gedung']):
-        return 30  # Office areas
+    kk_estimate = classify_name(name).kk_estimate
+    if kk_estimate is not None:
+        return kk_estimate
     
     # If business details are available, use them for better estimation
     if business_details:
@@ -257,99 +651,85 @@ def estimate_business_count_improved(name, business_details=None):
     """
     if business_details:
         return len(business_details)
-    
-    name_lower = name.lower()
-    
-    if any(word in name_lower for word in ['mall', 'pasar', 'toko']):
-        return 20
-    elif any(word in name_lower for word in ['industri', 'factory']):
-        return 100
-    elif any(word in name_lower for word in ['hotel', 'resort']):
-        return 50
-    else:
-        return 10
+    return classify_name(name).business_estimate
 
-def detect_residential_area(name, business_details=None):
-    """
-    Detect residential area type and estimate KK count based on area name and business details
-    Returns: dict with area_type and estimated_kk
-    """
-    name_lower = name.lower()
-    
-    # High density residential indicators
-    high_density_keywords = ['padat', 'kumuh', 'kampung', 'slum', 'dense', 'crowded', 'perumahan', 'komplek']
-    if any(keyword in name_lower for keyword in high_density_keywords):
-        return {
-            'area_type': 'high_density_residential',
-            'estimated_kk': 150  # High density areas have more KK
-        }
-    
-    # Commercial area indicators
-    commercial_keywords = ['pasar', 'mall', 'plaza', 'commercial', 'bisnis', 'usaha', 'toko', 'warung']
-    if any(keyword in name_lower for keyword in commercial_keywords):
-        return {
-            'area_type': 'commercial',
-            'estimated_kk': 80   # Commercial areas have fewer residential KK
-        }
-    
-    # Industrial area indicators
-    industrial_keywords = ['industri', 'pabrik', 'factory', 'industrial', 'kawasan industri']
-    if any(keyword in name_lower for keyword in industrial_keywords):
-        return {
-            'area_type': 'industrial',
-            'estimated_kk': 60   # Industrial areas have even fewer residential KK
-        }
-    
-    # Low density residential indicators
-    low_density_keywords = ['elite', 'mewah', 'luxury', 'villa', 'perumahan mewah', 'komplek mewah']
-    if any(keyword in name_lower for keyword in low_density_keywords):
-        return {
-            'area_type': 'low_density_residential',
-            'estimated_kk': 40   # Low density areas have fewer KK
-        }
-    
-    # Default to standard residential
-    return {
-        'area_type': 'standard_residential',
-        'estimated_kk': 100  # Standard residential area
-    }
+# Keyword tables. Category order matters: classifiers take the first category hit, like the
+# if/elif chains they replace. All tables are compiled into KEYWORD_MATCHER below.
+BUSINESS_KEYWORDS = {
+    'mall': ['mall', 'plaza', 'center', 'supermarket', 'hypermarket', 'department store', 'pusat perbelanjaan'],
+    'pasar': ['pasar', 'market', 'traditional market', 'pasar tradisional', 'pasar induk', 'pasar besar'],
+    'hotel': ['hotel', 'resort', 'inn', 'guesthouse', 'penginapan'],
+    'restaurant': ['restaurant', 'cafe', 'warung', 'rumah makan', 'restoran'],
+    'bank': ['bank', 'atm', 'bca', 'mandiri', 'bni', 'bri'],
+    'hospital': ['hospital', 'rumah sakit', 'klinik', 'apotek', 'puskesmas'],
+    'school': ['school', 'sekolah', 'universitas', 'kampus', 'sd', 'smp', 'sma'],
+    'office': ['office', 'kantor', 'perkantoran', 'gedung'],
+    'gas_station': ['gas', 'spbu', 'pertamina', 'shell', 'bp'],
+    'car_wash': ['car wash', 'cuci mobil', 'cuci motor'],
+    'salon': ['salon', 'spa', 'beauty', 'kecantikan'],
+    'store': ['toko', 'store', 'shop', 'market', 'warung'],
+    'motorcycle': ['motor', 'honda', 'yamaha', 'suzuki', 'kawasaki'],
+    'dental': ['dental', 'gigi', 'drg', 'dokter gigi'],
+    'music': ['music', 'gitar', 'piano', 'alat musik'],
+    'battery': ['battery', 'aki', 'accu', 'baterai'],
+    'pharmacy': ['pharmacy', 'apotek', 'kimia farma', 'century'],
+    'mosque': ['mosque', 'masjid', 'musholla', 'surau'],
+    'church': ['church', 'gereja', 'kapel'],
+    'temple': ['temple', 'pura', 'vihara', 'klenteng'],
+    'park': ['park', 'taman', 'alun-alun', 'lapangan']
+}
 
-def detect_building_types(text):
-    """
-    Detect different types of buildings from OCR text
-    Returns: dict with counts of different building types
-    """
-    building_data = {
-        'bangunan_kosong': 0,
-        'bangunan_bukan_tempat_tinggal': 0,
-        'bangunan_usaha': 0,
-        'kos_kosan': 0,
-        'details': {
-            'bangunan_kosong': [],
-            'bangunan_bukan_tempat_tinggal': [],
-            'bangunan_usaha': [],
-            'kos_kosan': []
-        }
-    }
-    
-    lines = text.split('\n')
-    
-    # Keywords for different building types
-    kosong_keywords = [
+# Contextual extraction files markets under 'mall' as well
+CONTEXTUAL_BUSINESS_KEYWORDS = dict(BUSINESS_KEYWORDS, mall=['mall', 'plaza', 'center', 'pasar', 'supermarket', 'hypermarket'])
+
+GENERAL_BUSINESS_KEYWORDS = ['warung', 'toko', 'restaurant', 'store', 'shop', 'gallery', 'motor', 'dental', 'battery', 'music', 'hotel', 'mall', 'market', 'cafe', 'bank', 'pharmacy', 'hospital', 'school', 'university', 'office', 'factory', 'warehouse', 'gas station', 'car wash', 'salon', 'spa']
+
+LANDMARK_KEYWORDS = ['Monument', 'Park', 'Square', 'Temple', 'Church', 'Mosque', 'Museum', 'Tugu', 'Patung', 'Alun-alun']
+
+CONTEXTUAL_LANDMARK_KEYWORDS = ['masjid', 'gereja', 'pura', 'taman', 'lapangan', 'alun-alun', 'monumen', 'museum', 'stasiun', 'terminal', 'bandara', 'pelabuhan']
+
+ENVIRONMENT_KEYWORDS = {
+    'perkambingan': ['perkambingan', 'kambing', 'ternak', 'peternakan', 'farm'],
+    'perumahan': ['perumahan', 'rumah', 'housing', 'residential', 'permukiman'],
+    'komersial': ['komersial', 'commercial', 'bisnis', 'business', 'toko', 'mall'],
+    'industri': ['industri', 'industrial', 'pabrik', 'factory', 'kawasan industri'],
+    'pendidikan': ['pendidikan', 'education', 'sekolah', 'school', 'universitas'],
+    'kesehatan': ['kesehatan', 'health', 'rumah sakit', 'hospital', 'klinik'],
+    'pariwisata': ['pariwisata', 'tourism', 'hotel', 'resort', 'wisata'],
+    'pertanian': ['pertanian', 'agriculture', 'sawah', 'ladang', 'kebun'],
+    'perikanan': ['perikanan', 'fishery', 'tambak', 'kolam', 'ikan'],
+    'kehutanan': ['kehutanan', 'forestry', 'hutan', 'forest', 'kayu']
+}
+
+RESIDENTIAL_AREA_KEYWORDS = {
+    'high_density_residential': ['padat', 'kumuh', 'kampung', 'slum', 'dense', 'crowded', 'perumahan', 'komplek'],
+    'commercial': ['pasar', 'mall', 'plaza', 'commercial', 'bisnis', 'usaha', 'toko', 'warung'],
+    'industrial': ['industri', 'pabrik', 'factory', 'industrial', 'kawasan industri'],
+    'low_density_residential': ['elite', 'mewah', 'luxury', 'villa', 'perumahan mewah', 'komplek mewah']
+}
+
+RESIDENTIAL_AREA_KK = {
+    'high_density_residential': 150,  # High density areas have more KK
+    'commercial': 80,                 # Commercial areas have fewer residential KK
+    'industrial': 60,                 # Industrial areas have even fewer residential KK
+    'low_density_residential': 40,    # Low density areas have fewer KK
+    'standard_residential': 100       # Standard residential area
+}
+
+BUILDING_KEYWORDS = {
+    'bangunan_kosong': [
         'kosong', 'empty', 'vacant', 'tidak terisi', 'belum dihuni',
         'bangunan kosong', 'rumah kosong', 'gedung kosong', 'ruko kosong',
         'tidak ada penghuni', 'belum ada penghuni', 'masih kosong'
-    ]
-    
-    bukan_tempat_tinggal_keywords = [
+    ],
+    'bangunan_bukan_tempat_tinggal': [
         'masjid', 'musholla', 'surau', 'gereja', 'kapel', 'pura', 'vihara', 'klenteng',
         'kantor', 'office', 'gedung perkantoran', 'balai desa', 'kantor desa',
         'sekolah', 'sd', 'smp', 'sma', 'universitas', 'kampus', 'madrasah',
         'rumah sakit', 'klinik', 'puskesmas', 'apotek', 'rumah ibadah',
         'tempat ibadah', 'worship', 'temple', 'church', 'mosque'
-    ]
-    
-    bangunan_usaha_keywords = [
+    ],
+    'bangunan_usaha': [
         'toko', 'warung', 'restoran', 'rumah makan', 'cafe', 'kafe',
         'bank', 'atm', 'spbu', 'gas station', 'salon', 'spa',
         'hotel', 'penginapan', 'guesthouse', 'resort', 'inn',
@@ -357,52 +737,286 @@ def detect_building_types(text):
         'apotek', 'pharmacy', 'klinik', 'dental', 'gigi',
         'supermarket', 'minimarket', 'market', 'mall', 'plaza',
         'pasar', 'traditional market', 'pasar tradisional'
-    ]
-    
-    kos_kosan_keywords = [
+    ],
+    'kos_kosan': [
         'kos', 'kost', 'kostan', 'kos-kosan', 'kost-kostan',
         'boarding house', 'kontrakan', 'sewa kamar', 'kamar sewa',
         'rumah kos', 'gedung kos', 'asrama', 'dormitory',
         'kamar kost', 'kost putra', 'kost putri', 'kost campur'
     ]
+}
+
+# Dominant load codes, most specific first
+DOMINANT_LOAD_KEYWORDS = {
+    9: ['kawasan industri', 'industrial zone', 'industri', 'factory', 'pabrik'],   # Kawasan industri
+    12: ['kantor', 'office', 'perkantoran'],                                        # Perkantoran
+    8: ['mall', 'pasar', 'toko', 'shop', 'market', 'plaza', 'center'],              # Pusat perbelanjaan
+    10: ['hotel', 'resort', 'wisata', 'tourism'],                                   # Hotel/tempat rekreasi
+    13: ['bandara', 'terminal', 'stasiun', 'pelabuhan', 'airport'],                 # Pelabuhan/Bandara/Terminal
+    11: ['sekolah', 'universitas', 'kampus', 'pendidikan', 'education'],            # Kawasan Pendidikan
+    14: ['pertanian', 'sawah', 'ladang', 'kebun', 'agriculture'],                   # Kawasan Pertanian
+    15: ['peternakan', 'ternak', 'livestock'],                                      # Kawasan Peternakan
+    16: ['perikanan', 'tambak', 'fishery'],                                         # Kawasan Perikanan
+    17: ['pertambangan', 'tambang', 'mining'],                                      # Kawasan Pertambangan
+    18: ['kehutanan', 'hutan', 'forestry'],                                         # Kawasan Kehutanan
+    19: ['pariwisata', 'wisata', 'tourism']                                         # Kawasan Pariwisata
+}
+
+DOMINANT_LOAD_DESCRIPTIONS = {
+    1: "Permukiman Biasa",
+    2: "Permukiman Padat",
+    3: "Permukiman Kumuh",
+    4: "Permukiman Elite",
+    5: "Permukiman Transmigrasi",
+    6: "Permukiman Pesisir",
+    7: "Permukiman Pegunungan",
+    8: "Pusat Perbelanjaan",
+    9: "Kawasan Industri",
+    10: "Hotel/Tempat Rekreasi",
+    11: "Kawasan Pendidikan",
+    12: "Perkantoran",
+    13: "Pelabuhan/Bandara/Terminal",
+    14: "Kawasan Pertanian",
+    15: "Kawasan Peternakan",
+    16: "Kawasan Perikanan",
+    17: "Kawasan Pertambangan",
+    18: "Kawasan Kehutanan",
+    19: "Kawasan Pariwisata",
+    20: "Kawasan Khusus Lainnya"
+}
+
+# KK estimate of a named area (estimate_kk_count_improved): residential words first, the most
+# specific of them first; names without any of these words are estimated from their businesses
+KK_ESTIMATE_KEYWORDS = {
+    'high_density_residential': ['perumahan', 'kompleks'],
+    'low_density_residential': ['villa'],
+    'neighborhood': ['lingkungan'],
+    'residential': ['rumah', 'permukiman', 'kampung', 'desa', 'kelurahan'],
+    'commercial': ['mall', 'pasar', 'toko', 'shop', 'market', 'plaza', 'center'],
+    'industrial': ['industri', 'factory', 'pabrik', 'kawasan'],
+    'tourism': ['hotel', 'resort', 'wisata', 'tourism'],
+    'office': ['kantor', 'office', 'perkantoran', 'gedung']
+}
+
+KK_ESTIMATES = {
+    'high_density_residential': 150,  # High density residential
+    'low_density_residential': 50,    # Low density residential
+    'neighborhood': 80,               # Typical neighborhood (lingkungan)
+    'residential': 100,               # Standard residential
+    'commercial': 20,                 # Commercial areas have fewer KK
+    'industrial': 100,                # Industrial areas may have worker housing
+    'tourism': 50,                    # Tourism areas
+    'office': 30                      # Office areas
+}
+
+# Business count of a named area without business details (estimate_business_count_improved)
+BUSINESS_ESTIMATE_KEYWORDS = {
+    20: ['mall', 'pasar', 'toko'],
+    100: ['industri', 'factory'],
+    50: ['hotel', 'resort']
+}
+
+# High-accuracy keywords for mall and pasar detection
+ECONOMIC_CENTER_KEYWORDS = {
+    'mall': [
+        'mall', 'plaza', 'shopping center', 'pusat perbelanjaan',
+        'supermarket', 'hypermarket', 'department store', 'mal',
+        'shopping mall', 'retail center', 'commercial center'
+    ],
+    'pasar': [
+        'pasar', 'market', 'traditional market', 'pasar tradisional',
+        'pasar induk', 'pasar besar', 'pasar utama', 'pasar raya',
+        'pasar modern', 'pasar swalayan'
+    ]
+}
+
+# Estimated UMKM per economic center, by size indicators in its name
+MALL_SIZE_KEYWORDS = {
+    80: ['supermarket', 'hypermarket', 'department store'],  # Large retail chains
+    60: ['mall', 'plaza', 'shopping center']                 # Standard mall
+}
+
+PASAR_SIZE_KEYWORDS = {
+    150: ['pasar induk', 'pasar besar', 'pasar utama'],  # Large traditional market
+    80: ['pasar modern', 'pasar swalayan']               # Modern market
+}
+
+KEYWORD_MATCHER = KeywordMatcher({
+    'business': BUSINESS_KEYWORDS,
+    'contextual_business': CONTEXTUAL_BUSINESS_KEYWORDS,
+    'general_business': {'general': GENERAL_BUSINESS_KEYWORDS},
+    'landmark': {'landmark': LANDMARK_KEYWORDS},
+    'contextual_landmark': {'landmark': CONTEXTUAL_LANDMARK_KEYWORDS},
+    'environment': ENVIRONMENT_KEYWORDS,
+    'residential_area': RESIDENTIAL_AREA_KEYWORDS,
+    'building': BUILDING_KEYWORDS,
+    'dominant_load': DOMINANT_LOAD_KEYWORDS,
+    'economic_center': ECONOMIC_CENTER_KEYWORDS,
+    'mall_size': MALL_SIZE_KEYWORDS,
+    'pasar_size': PASAR_SIZE_KEYWORDS,
+    'kk_estimate': KK_ESTIMATE_KEYWORDS,
+    'business_estimate': BUSINESS_ESTIMATE_KEYWORDS
+})
+
+# Everything the estimators read from an environment, street or business name
+NameClass = namedtuple('NameClass', ['area_type', 'dominant_load', 'kk_estimate', 'business_estimate'])
+
+def classify_name(name):
+    """
+    Area type, dominant load code, KK estimate (None: estimate from businesses) and business
+    estimate of a name, from one keyword scan memoized per normalized name
+    """
+    return classify_normalized_name(' '.join(name.lower().split()))
+
+@functools.lru_cache(maxsize=app.config['NAME_CLASSIFIER_CACHE_SIZE'])
+def classify_normalized_name(name):
+    hits = KEYWORD_MATCHER.scan(name)
+    kk_category = hits.first('kk_estimate')
+    return NameClass(
+        area_type=hits.first('residential_area') or 'standard_residential',
+        # Industrial first (more specific), Permukiman Biasa (1) by default
+        dominant_load=hits.first('dominant_load') or 1,
+        kk_estimate=KK_ESTIMATES[kk_category] if kk_category else None,
+        business_estimate=hits.first('business_estimate') or 10
+    )
+
+def name_classifier_stats():
+    """Hit/miss counters and size of the name classification memo"""
+    info = classify_normalized_name.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'hit_rate': info.hits / lookups if lookups else 0.0,
+        'size': info.currsize,
+        'max_size': info.maxsize
+    }
+
+def detect_residential_area(name, business_details=None):
+    """
+    Detect residential area type and estimate KK count based on area name and business details
+    Returns: dict with area_type and estimated_kk
+    """
+    area_type = classify_name(name).area_type
+    return {
+        'area_type': area_type,
+        'estimated_kk': RESIDENTIAL_AREA_KK[area_type]
+    }
+
+# Tokens of recently parsed lines, keyed by line content: re-parsing an edited text only
+# tokenizes the lines that changed. Tokens are shared and must not be modified.
+line_token_cache = OrderedDict()
+line_token_lock = threading.Lock()
+MAX_LINE_TOKENS = 20000
+
+def tokenize_wss_line(line):
+    """Token of one stripped OCR line (see read_wss_line), from the line cache when seen before"""
+    with line_token_lock:
+        token = line_token_cache.get(line)
+        if token is not None:
+            line_token_cache.move_to_end(line)
+            return token
+    token = read_wss_line(line)
+    with line_token_lock:
+        line_token_cache[line] = token
+        while len(line_token_cache) > MAX_LINE_TOKENS:
+            line_token_cache.popitem(last=False)
+    return token
+
+def read_wss_line(line):
+    """
+    Read everything the parsers need from one stripped OCR line, once
+    Returns: dict with the line's keyword hits, map ID, admin fields, cleaned name, street and
+    coordinates (plus the variants extract_contextual_data reads)
+    """
+    upper = line.upper()
+    map_id_match = MAP_ID.search(line)
+    token = {
+        'text': line,
+        'upper': upper,
+        'hits': KEYWORD_MATCHER.scan(line),
+        'map_id': map_id_match.group(1) if map_id_match else None,
+        'admin': scan_admin_fields(line, upper),
+        'name': LINE_NAME_CLEANUP.sub('', line).strip(),
+        'street': None,
+        'contextual_street': None,
+        'coordinates': None,
+        'contextual_coordinates': None
+    }
     
-    for line in lines:
-        line_lower = line.lower().strip()
-        if not line_lower:
-            continue
-            
-        # Detect bangunan kosong
-        if any(keyword in line_lower for keyword in kosong_keywords):
-            building_name = re.sub(r'[^\w\s\-\.]', '', line).strip()
-            if len(building_name) > 2:
-                building_data['bangunan_kosong'] += 1
-                building_data['details']['bangunan_kosong'].append(building_name)
-        
-        # Detect bangunan bukan tempat tinggal
-        if any(keyword in line_lower for keyword in bukan_tempat_tinggal_keywords):
-            building_name = re.sub(r'[^\w\s\-\.]', '', line).strip()
-            if len(building_name) > 2:
-                building_data['bangunan_bukan_tempat_tinggal'] += 1
-                building_data['details']['bangunan_bukan_tempat_tinggal'].append(building_name)
-        
-        # Detect bangunan usaha
-        if any(keyword in line_lower for keyword in bangunan_usaha_keywords):
-            building_name = re.sub(r'[^\w\s\-\.]', '', line).strip()
-            if len(building_name) > 2:
-                building_data['bangunan_usaha'] += 1
-                building_data['details']['bangunan_usaha'].append(building_name)
-        
-        # Detect kos-kosan
-        if any(keyword in line_lower for keyword in kos_kosan_keywords):
-            building_name = re.sub(r'[^\w\s\-\.]', '', line).strip()
-            if len(building_name) > 2:
-                building_data['kos_kosan'] += 1
-                building_data['details']['kos_kosan'].append(building_name)
+    if 'Jl.' in line or 'Jalan' in line or 'Jl ' in line:
+        street_match = STREET.search(line)
+        if street_match:
+            token['street'] = street_match.group(1).strip()
+        else:
+            jalan_match = JALAN.search(line)
+            if jalan_match:
+                token['street'] = f"Jl. {jalan_match.group(1).strip()}"
+        contextual_match = CONTEXTUAL_STREET.search(line)
+        if contextual_match:
+            token['contextual_street'] = contextual_match.group(1).strip()
     
+    coord_match = COORDINATES.search(line)
+    if coord_match:
+        token['coordinates'] = (float(coord_match.group(1)), float(coord_match.group(2)))
+        # Contextual extraction keeps unsigned coordinate text as written
+        contextual_match = CONTEXTUAL_COORDINATES.search(line)
+        if contextual_match:
+            token['contextual_coordinates'] = contextual_match.group(1)
+    
+    return token
+
+def clip_ocr_line(line):
+    """Stripped OCR line, cut to MAX_OCR_LINE_LENGTH characters"""
+    line = line.strip()
+    limit = app.config['MAX_OCR_LINE_LENGTH']
+    if limit and len(line) > limit:
+        logger.warning(f"OCR line of {len(line)} characters cut to {limit}")
+        line = line[:limit].rstrip()
+    return line
+
+def tokenize_wss_text(text):
+    """Tokens of every non-empty line of the OCR text"""
+    return [tokenize_wss_line(line) for line in map(clip_ocr_line, text.split('\n')) if line]
+
+def new_building_data():
+    return {
+        'bangunan_kosong': 0,
+        'bangunan_bukan_tempat_tinggal': 0,
+        'bangunan_usaha': 0,
+        'kos_kosan': 0,
+        'details': {
+            'bangunan_kosong': [],
+            'bangunan_bukan_tempat_tinggal': [],
+            'bangunan_usaha': [],
+            'kos_kosan': []
+        }
+    }
+
+def add_building_types(building_data, token):
+    """Count the building categories of one line token"""
+    for building_type in token['hits'].categories('building'):
+        if len(token['name']) > 2:
+            building_data[building_type] += 1
+            building_data['details'][building_type].append(token['name'])
+
+def detect_building_types(text):
+    """
+    Detect different types of buildings from OCR text
+    Returns: dict with counts of different building types
+    """
+    building_data = new_building_data()
+    for token in tokenize_wss_text(text):
+        add_building_types(building_data, token)
     return building_data
 
-def extract_text_from_image(image_path):
-    """Extract text from image using EasyOCR with improved preprocessing and error handling"""
+def extract_text_from_image(image_path, with_layout=False, header_only=False):
+    """
+    Extract text from image using EasyOCR with improved preprocessing and error handling
+    with_layout: return (text, OcrLayout) so the caller can use where each block sits; the
+    layout is None when OCR failed or found nothing
+    header_only: read only the top HEADER_OCR_FRACTION of the image (map ID and admin names)
+    """
     try:
         logger.info(f"Starting OCR for image: {image_path}")
         
@@ -412,6 +1026,10 @@ def extract_text_from_image(image_path):
         # Read image using PIL
         pil_image = Image.open(image_path)
         logger.info(f"Image size: {pil_image.size}")
+        if header_only:
+            header_height = max(1, int(pil_image.size[1] * app.config['HEADER_OCR_FRACTION']))
+            pil_image = pil_image.crop((0, 0, pil_image.size[0], header_height))
+            logger.info(f"Reading the header only: {pil_image.size}")
         
         # Enhanced preprocessing for better OCR accuracy
         # Convert to grayscale
@@ -448,35 +1066,28 @@ def extract_text_from_image(image_path):
             results = ocr_reader.readtext(original_array, paragraph=False)
             logger.info(f"Third OCR attempt found {len(results)} text blocks")
         
-        # Extract text from results with very low confidence threshold
-        text_lines = []
         for i, result in enumerate(results):
             logger.info(f"Processing result {i+1}: {result}")
-            if isinstance(result, (tuple, list)) and len(result) >= 2:
-                bbox, text = result[:2]
-                confidence = result[2] if len(result) > 2 else 1.0
-                logger.info(f"Text block {i+1}: '{text}' (confidence: {confidence:.2f})")
-                # Lower confidence threshold to 0.01 (1%)
-                if confidence > 0.01:
-                    cleaned_text = text.strip()
-                    if len(cleaned_text) > 0:  # Accept even single characters
-                        text_lines.append(cleaned_text)
-            else:
+            if not isinstance(result, (tuple, list)) or len(result) < 2:
                 logger.warning(f"Skipping result {i+1} with unexpected format: {result}")
         
-        final_text = '\n'.join(text_lines)
-        logger.info(f"Final extracted text ({len(text_lines)} lines):\n{final_text}")
+        # Keep every block with its box; very low confidence threshold (0.01), even single characters
+        layout = OcrLayout.from_easyocr(results, min_confidence=0.01)
+        final_text = layout.text
+        logger.info(f"Final extracted text ({len(layout)} lines):\n{final_text}")
         
         if not final_text.strip():
             logger.warning("No text extracted from image")
-            return "Tidak ada teks yang dapat diekstrak dari gambar. Pastikan gambar jelas dan mengandung teks."
+            message = "Tidak ada teks yang dapat diekstrak dari gambar. Pastikan gambar jelas dan mengandung teks."
+            return (message, None) if with_layout else message
         
-        return final_text
+        return (final_text, layout) if with_layout else final_text
     except Exception as e:
         logger.error(f"Error in OCR: {e}")
         import traceback
         traceback.print_exc()
-        return f"Error dalam proses OCR: {str(e)}"
+        message = f"Error dalam proses OCR: {str(e)}"
+        return (message, None) if with_layout else message
 
 def parse_wss_data(text):
     """Parse WSS map data from OCR text with improved accuracy"""
@@ -737,518 +1348,325 @@ def parse_wss_data(text):
     logger.info(f"Final parsed data: {data}")
     return data
 
-def generate_segments_from_data(wss_data):
-    """Generate segments automatically based on extracted data with improved residential detection"""
-    segments = []
-    
-    # Generate segments based on environments
-    for i, env in enumerate(wss_data.get('environments', []), 1):
-        # Detect area type and estimate KK count
-        area_info = detect_residential_area(env['name'], wss_data.get('business_details', {}))
-        area_type = area_info['area_type']
-        estimated_kk = area_info['estimated_kk']
-        
-        # Adjust estimates based on area type
-        if area_type == 'high_density_residential':
-            kk_count = estimated_kk
-            btt_count = int(kk_count * 0.95)  # High density has more BTT
-            bku_count = int(kk_count * 0.25)  # More businesses in high density
-        elif area_type == 'low_density_residential':
-            kk_count = estimated_kk
-            btt_count = int(kk_count * 0.85)  # Lower BTT ratio
-            bku_count = int(kk_count * 0.15)  # Fewer businesses
-        elif area_type == 'commercial':
-            kk_count = estimated_kk
-            btt_count = int(kk_count * 0.3)   # Few residential buildings
-            bku_count = int(kk_count * 0.8)   # Many businesses
-        elif area_type == 'industrial':
-            kk_count = estimated_kk
-            btt_count = int(kk_count * 0.7)   # Worker housing
-            bku_count = int(kk_count * 0.4)   # Industrial businesses
-        else:  # standard_residential
-            kk_count = estimated_kk
-            btt_count = int(kk_count * 0.9)   # Standard ratio
-            bku_count = int(kk_count * 0.2)   # Standard ratio
-        
-        load_code = determine_dominant_load(env['name'])
-        segments.append({
-            'no': i,
-            'no_segmen': f"SEG{i:02d}",
-            'muatan_dominan': get_dominant_load_description(load_code),
-            'nama_wilayah': env['name'],
-            'jumlah_shift': '',  # Let user fill
-            'jam_operasional': '',  # Let user fill
-            'contact_person': '',  # Let user fill
-            'muatan_kk': kk_count,
-            'btt': btt_count,
-            'btt_kosong': max(0, kk_count - btt_count),  # Empty BTT
-            'bku': bku_count,
-            'bbtt_non_usaha': max(0, int(kk_count * 0.05)),  # Non-business buildings
-            'muatan_usaha': estimate_business_count_improved(env['name'], wss_data.get('business_details', {})),
-            'total_muatan': 0,  # Will be calculated
-            'kode_sub_sls': f"{int(env['code']):02d}",
-            'area_type': area_type  # Add area type for reference
-        })
+# BTT and BKU shares of a segment's KK count per residential area type (KK from RESIDENTIAL_AREA_KK)
+SEGMENT_RATIOS = {
+    'high_density_residential': (0.95, 0.25),  # More BTT, more businesses
+    'low_density_residential': (0.85, 0.15),   # Lower BTT ratio, fewer businesses
+    'commercial': (0.3, 0.8),                  # Few residential buildings, many businesses
+    'industrial': (0.7, 0.4),                  # Worker housing, industrial businesses
+    'standard_residential': (0.9, 0.2)         # Standard ratio
+}
+BBTT_NON_USAHA_RATIO = 0.05
+# The same table as arrays: one row per area type, columns KK, BTT share, BKU share
+SEGMENT_AREA_TYPES = {area_type: row for row, area_type in enumerate(SEGMENT_RATIOS)}
+SEGMENT_TABLE = np.array([(RESIDENTIAL_AREA_KK[area_type],) + ratios for area_type, ratios in SEGMENT_RATIOS.items()])
+
+def segment_rows(wss_data):
+    """
+    Segments of one map before estimation: environments, else streets, else the village
+    Returns: list of (no, nama_wilayah, muatan_dominan, area_type, ratio_type, muatan_usaha, kode_sub_sls)
+    """
+    business_details = wss_data.get('business_details', {})
+    # Businesses per environment counted by scan_wss_text; older data has every business in each segment
+    environment_business_counts = wss_data.get('environment_business_counts')
+    rows = []
     
-    # Generate segments based on streets if no environments found
-    if not segments and wss_data.get('streets'):
-        for i, street in enumerate(wss_data['streets'], 1):
-            # Detect area type and estimate KK count
-            area_info = detect_residential_area(street, wss_data.get('business_details', {}))
-            area_type = area_info['area_type']
-            estimated_kk = area_info['estimated_kk']
-            
-            # Adjust estimates based on area type
-            if area_type == 'high_density_residential':
-                kk_count = estimated_kk
-                btt_count = int(kk_count * 0.95)
-                bku_count = int(kk_count * 0.25)
-            elif area_type == 'low_density_residential':
-                kk_count = estimated_kk
-                btt_count = int(kk_count * 0.85)
-                bku_count = int(kk_count * 0.15)
-            elif area_type == 'commercial':
-                kk_count = estimated_kk
-                btt_count = int(kk_count * 0.3)
-                bku_count = int(kk_count * 0.8)
-            elif area_type == 'industrial':
-                kk_count = estimated_kk
-                btt_count = int(kk_count * 0.7)
-                bku_count = int(kk_count * 0.4)
-            else:  # standard_residential
-                kk_count = estimated_kk
-                btt_count = int(kk_count * 0.9)
-                bku_count = int(kk_count * 0.2)
-            
-            load_code = determine_dominant_load(street)
-            segments.append({
-                'no': i,
-                'no_segmen': f"SEG{i:02d}",
-                'muatan_dominan': get_dominant_load_description(load_code),
-                'nama_wilayah': street,
-                'jumlah_shift': '',  # Let user fill
-                'jam_operasional': '',  # Let user fill
-                'contact_person': '',  # Let user fill
-                'muatan_kk': kk_count,
-                'btt': btt_count,
-                'btt_kosong': max(0, kk_count - btt_count),
-                'bku': bku_count,
-                'bbtt_non_usaha': max(0, int(kk_count * 0.05)),
-                'muatan_usaha': estimate_business_count_improved(street, wss_data.get('business_details', {})),
-                'total_muatan': 0,  # Will be calculated
-                'kode_sub_sls': f"{i:02d}",
-                'area_type': area_type
-            })
+    def add_row(no, name, muatan_usaha, kode_sub_sls, fixed_ratios=False):
+        name_class = classify_name(name)
+        area_type = name_class.area_type
+        if muatan_usaha is None:
+            muatan_usaha = estimate_business_count_improved(name, business_details)
+        rows.append((no, name, get_dominant_load_description(name_class.dominant_load), area_type,
+                     'standard_residential' if fixed_ratios else area_type, muatan_usaha, kode_sub_sls))
     
-    # If still no segments, create a default one
-    if not segments:
-        area_info = detect_residential_area(wss_data.get('village', 'Wilayah Tidak Diketahui'), wss_data.get('business_details', {}))
-        area_type = area_info['area_type']
-        estimated_kk = area_info['estimated_kk']
-        kk_count = estimated_kk
-        btt_count = int(kk_count * 0.9)
-        bku_count = int(kk_count * 0.2)
-        
-        load_code = determine_dominant_load(wss_data.get('village', 'Wilayah Tidak Diketahui'))
-        segments.append({
-            'no': 1,
-            'no_segmen': 'SEG01',
-            'muatan_dominan': get_dominant_load_description(load_code),
-            'nama_wilayah': wss_data.get('village', 'Wilayah Tidak Diketahui'),
-            'jumlah_shift': '',  # Let user fill
-            'jam_operasional': '',  # Let user fill
-            'contact_person': '',  # Let user fill
-            'muatan_kk': kk_count,
-            'btt': btt_count,
-            'btt_kosong': max(0, kk_count - btt_count),
-            'bku': bku_count,
-            'bbtt_non_usaha': max(0, int(kk_count * 0.05)),
-            'muatan_usaha': estimate_business_count_improved(wss_data.get('village', 'Wilayah Tidak Diketahui'), wss_data.get('business_details', {})),
-            'total_muatan': 0,  # Will be calculated
-            'kode_sub_sls': '01',
-            'area_type': area_type
-        })
+    for i, env in enumerate(wss_data.get('environments', []), 1):
+        add_row(i, env['name'],
+                environment_business_counts.get(env['name'], 0) if environment_business_counts is not None else None,
+                f"{int(env['code']):02d}")
     
-    # Calculate total muatan for each segment
-    for segment in segments:
-        segment['total_muatan'] = max(segment['muatan_kk'], segment['btt']) + segment['btt_kosong'] + segment['bbtt_non_usaha'] + segment['muatan_usaha']
+    # Streets if no environments found
+    if not rows:
+        for i, street in enumerate(wss_data.get('streets', []), 1):
+            add_row(i, street, None, f"{i:02d}")
     
+    # If still no segments, a default one for the village; its KK follows the area type but
+    # its BTT/BKU keep the standard ratios
+    if not rows:
+        add_row(1, wss_data.get('village', 'Wilayah Tidak Diketahui'), None, '01', fixed_ratios=True)
+    return rows
+
+def estimate_segments(rows):
+    """
+    BLOK III estimates of a batch of segment rows (see segment_rows; of one map or many) computed
+    column-wise over SEGMENT_TABLE
+    Returns: one preview dict per row, columns in SEGMENT_FIELDS order
+    """
+    if not rows:
+        return []
+    numbers, names, loads, area_types, ratio_types, muatan_usaha, codes = zip(*rows)
+    kk = SEGMENT_TABLE[[SEGMENT_AREA_TYPES[area_type] for area_type in area_types], 0].astype(np.int64)
+    ratios = SEGMENT_TABLE[[SEGMENT_AREA_TYPES[ratio_type] for ratio_type in ratio_types], 1:]
+    btt = np.floor(kk * ratios[:, 0]).astype(np.int64)
+    bku = np.floor(kk * ratios[:, 1]).astype(np.int64)
+    btt_kosong = np.maximum(0, kk - btt)  # Empty BTT
+    bbtt_non_usaha = np.maximum(0, np.floor(kk * BBTT_NON_USAHA_RATIO).astype(np.int64))  # Non-business buildings
+    usaha = np.array(muatan_usaha, dtype=np.int64)
+    # (Maks(Kol 5, Kol 6) + Kol 7 + Kol 9 + Kol 10)
+    total_muatan = np.maximum(kk, btt) + btt_kosong + bbtt_non_usaha + usaha
+    columns = zip(numbers, loads, names, kk.tolist(), btt.tolist(), btt_kosong.tolist(), bku.tolist(),
+                  bbtt_non_usaha.tolist(), usaha.tolist(), total_muatan.tolist(), codes, area_types)
+    return [
+        dict(zip(SEGMENT_FIELDS, (no, f"SEG{no:02d}", load, name, '', '', '', *values, code, area_type)))
+        for no, load, name, *values, code, area_type in columns
+    ]
+
+def generate_segments_from_data(wss_data):
+    """Generate segments automatically based on extracted data with improved residential detection"""
+    # The preview and Excel use plain dicts
+    return estimate_segments(segment_rows(wss_data))
+
+def generate_segments_for_maps(maps):
+    """Segments of many maps (list of WSS data dicts) estimated in one batch; one list per map, in order"""
+    rows, owners = [], []
+    for position, wss_data in enumerate(maps):
+        map_rows = segment_rows(wss_data)
+        rows.extend(map_rows)
+        owners.extend([position] * len(map_rows))
+    segments = [[] for _ in maps]
+    for position, segment in zip(owners, estimate_segments(rows)):
+        segments[position].append(segment)
     return segments
 
 def determine_dominant_load(name):
     """Determine dominant load type based on name"""
-    name_lower = name.lower()
-    
-    # Check for industrial areas first (more specific)
-    if any(word in name_lower for word in ['kawasan industri', 'industrial zone', 'industri', 'factory', 'pabrik']):
-        return 9  # Kawasan industri
-    
-    # Check for office areas
-    elif any(word in name_lower for word in ['kantor', 'office', 'perkantoran']):
-        return 12  # Perkantoran
-    
-    # Check for shopping/commercial areas
-    elif any(word in name_lower for word in ['mall', 'pasar', 'toko', 'shop', 'market', 'plaza', 'center']):
-        return 8  # Pusat perbelanjaan
-    
-    # Check for hotel/tourism areas
-    elif any(word in name_lower for word in ['hotel', 'resort', 'wisata', 'tourism']):
-        return 10  # Hotel/tempat rekreasi
-    
-    # Check for transportation areas
-    elif any(word in name_lower for word in ['bandara', 'terminal', 'stasiun', 'pelabuhan', 'airport']):
-        return 13  # Pelabuhan/Bandara/Terminal
+    return classify_name(name).dominant_load
+
+def get_dominant_load_description(load_code):
+    """Convert dominant load code to descriptive text"""
+    return DOMINANT_LOAD_DESCRIPTIONS.get(load_code, f"Kode {load_code} (Tidak Diketahui)")
+
+# Excel template columns. BLOK III follows the printed form; the first data row repeats the
+# column names as on the form
+BLOK3_SHEET = 'BLOK III - LEMBAR KERJA PENGHITUNGAN MUATAN'
+BLOK3_COLUMNS = [
+    ('No (1)', 'no'),
+    ('No Segmen (2)', 'no_segmen'),
+    ('Muatan Dominan Segmen *) (3)', 'muatan_dominan'),
+    ('Nama Wilayah Konsentrasi Ekonomi (4a)', 'nama_wilayah'),
+    ('Jumlah Shift Pada Wilayah Konsentrasi Ekonomi (4b)', 'jumlah_shift'),
+    ('Jam Operasional (4c)', 'jam_operasional'),
+    ('Contact Person Telepon/ Email (4d)', 'contact_person'),
+    ('Perkiraan Jumlah Muatan KK (Keluarga) (5)', 'muatan_kk'),
+    ('Bangunan Tempat Tinggal (BTT) (6)', 'btt'),
+    ('Bangunan Tempat Tinggal Kosong (BTT Kosong) (7)', 'btt_kosong'),
+    ('Bangunan Khusus Usaha (BKU) (8)', 'bku'),
+    ('Bangunan Bukan Tempat Tinggal (BBTT non Usaha) (9)', 'bbtt_non_usaha'),
+    ('Perkiraan Jumlah Muatan Usaha (10)', 'muatan_usaha'),
+    # Formula: (Maks(Kol 5, Kol 6) + Kol 7 + Kol 9 + Kol 10), computed with the segments
+    ('Total Muatan (11)', 'total_muatan'),
+    ('Kode Sub-SLS (Baru) (12)', 'kode_sub_sls')
+]
+BLOK3_NOTE = 'Note: Diisi jika kolom (3) = 8-13 dan selain 11'
+TOTAL_MUATAN_FORMULA = '(Maks(Kol 5, Kol 6) + Kol 7 + Kol 9 + Kol 10)'
+
+# (column, detail field, default) of the located-place columns shared by businesses and economic centers
+LOCATION_COLUMNS = [
+    ('Koordinat (DMS)', 'coordinates_dms', ''),
+    ('Latitude', 'latitude', ''),
+    ('Longitude', 'longitude', ''),
+    ('Link Google Maps', 'google_maps_link', ''),
+    ('Link OpenStreetMap', 'osm_link', ''),
+    ('Tipe Lokasi', 'location_type', ''),
+    ('Provinsi', 'province', ''),
+    ('Kabupaten', 'regency', ''),
+    ('Kecamatan', 'district', ''),
+    ('Desa', 'village', ''),
+    ('Akurasi', 'accuracy', 'low'),
+    ('Tervalidasi', 'validated', False),
+    ('Alamat', 'address', ''),
+    ('Telepon', 'phone', ''),
+    ('Email', 'email', '')
+]
+BUSINESS_COLUMNS = ['Nama Bisnis', 'Tipe Bisnis', 'Contact Person', 'Jam Operasional', 'Koordinat (Decimal)'] + \
+    [column for column, _, _ in LOCATION_COLUMNS] + ['Catatan']
+# Blank rows left for businesses added by hand; their columns come after the detail columns
+BLANK_BUSINESS_COLUMNS = ['Nama Bisnis', 'Tipe Bisnis', 'Contact Person', 'Jam Operasional', 'Koordinat',
+                          'Alamat', 'Telepon', 'Email', 'Catatan']
+ECONOMIC_CENTER_COLUMNS = ['Nama Pusat Ekonomi', 'Tipe Pusat', 'Perkiraan UMKM', 'UMKM Sekitar (Klaster)',
+                           'Anggota Klaster', 'Lingkungan', 'Tipe Area', 'Konteks', 'Contact Person',
+                           'Jam Operasional', 'Koordinat (Decimal)'] + \
+    [column for column, _, _ in LOCATION_COLUMNS] + ['Catatan']
+BUILDING_COLUMNS = ['Tipe Bangunan', 'Nama Bangunan', 'Jumlah', 'Kategori', 'Catatan']
+# (building_data key, type, category, note) of each Data Bangunan row group
+BUILDING_GROUPS = [
+    ('bangunan_kosong', 'Bangunan Kosong', 'Tidak Terisi', 'Bangunan yang tidak terisi atau belum dihuni'),
+    ('bangunan_bukan_tempat_tinggal', 'Bangunan Bukan Tempat Tinggal', 'Fasilitas Umum', 'Masjid, sekolah, kantor, dll'),
+    ('bangunan_usaha', 'Bangunan Usaha', 'Komersial', 'Toko, warung, restoran, dll'),
+    ('kos_kosan', 'Kos-kosan', 'Tempat Tinggal', 'Tempat tinggal sewa/kontrakan')
+]
+EXCEL_BLANK_ROWS = {'blok3': 10, 'business': 10, 'building': 5}
+
+def location_values(details):
+    return [details.get(field, default) for _, field, default in LOCATION_COLUMNS]
+
+def blok3_rows(segments):
+    """BLOK III rows: the column names as on the form, one row per segment, blank rows for manual entry"""
+    yield [column for column, _ in BLOK3_COLUMNS]
+    for segment in segments:
+        yield [segment[field] for _, field in BLOK3_COLUMNS]
+    for _ in range(EXCEL_BLANK_ROWS['blok3']):
+        yield [''] * len(BLOK3_COLUMNS)
+
+def business_rows(wss_data, columns):
+    """Detail Bisnis rows, produced one business at a time"""
+    business_details = wss_data.get('business_details', {})
+    for business_name in wss_data.get('businesses', []):
+        details = business_details.get(business_name, {})
+        yield [business_name, details.get('type', 'general'), details.get('contact_person', ''),
+               details.get('operational_hours', ''), details.get('coordinates_decimal', details.get('coordinates', ''))] + \
+            location_values(details) + ['Koordinat yang pasti dengan validasi dan presisi tinggi']
+    for _ in range(EXCEL_BLANK_ROWS['business']):
+        yield [''] * len(columns)
+
+def economic_center_rows(centers):
+    """Pusat Ekonomi rows, one per detected center"""
+    for center in centers:
+        yield [center.get('name', ''), center.get('type', ''), center.get('estimated_umkm', 0),
+               center.get('cluster_size', 0), ', '.join(center.get('cluster_members', [])),
+               center.get('environment', ''), center.get('area_type', ''),
+               center.get('context', 'Pusat ekonomi yang berisi multiple UMKM'),
+               center.get('contact_person', ''), center.get('operational_hours', ''),
+               center.get('coordinates_decimal', center.get('coordinates', ''))] + \
+            location_values(center) + ['Pusat ekonomi dengan koordinat yang pasti sesuai konteks lingkungan']
+
+def building_rows(building_data):
+    """Data Bangunan rows: every detected building by group, then blank rows for manual entry"""
+    details = building_data.get('details', {})
+    for key, building_type, category, note in BUILDING_GROUPS:
+        for building in details.get(key, []):
+            yield [building_type, building, 1, category, note]
+    for _ in range(EXCEL_BLANK_ROWS['building']):
+        yield [''] * len(BUILDING_COLUMNS)
+
+def generate_excel_template(wss_data):
+    """
+    Generate Excel template based on WSS data with proper BLOK III format matching the image
+    Sheets are streamed row by row (excel_writer.StreamingWorkbook), so memory and time stay flat
+    as the number of businesses grows
+    """
     
-    # Check for educational areas
-    elif any(word in name_lower for word in ['sekolah', 'universitas', 'kampus', 'pendidikan', 'education']):
-        return 11  # Kawasan Pendidikan
+    # Generate segments automatically
+    segments = generate_segments_from_data(wss_data)
     
-    # Check for agricultural areas
-    elif any(word in name_lower for word in ['pertanian', 'sawah', 'ladang', 'kebun', 'agriculture']):
-        return 14  # Kawasan Pertanian
+    workbook = StreamingWorkbook()
     
-    # Check for livestock areas
-    elif any(word in name_lower for word in ['peternakan', 'ternak', 'livestock']):
-        return 15  # Kawasan Peternakan
+    # BLOK III: column widths fit its values (one row per segment), the notes follow a blank row
+    blok3_header = [column for column, _ in BLOK3_COLUMNS]
+    blok3 = list(blok3_rows(segments))
+    sheet = workbook.add_sheet(BLOK3_SHEET, blok3_header, blok3, widths=column_widths([blok3_header] + blok3))
+    sheet.append([])
+    sheet.append([BLOK3_NOTE])
+    sheet.append([f'Formula Total Muatan: {TOTAL_MUATAN_FORMULA}'])
     
-    # Check for fishery areas
-    elif any(word in name_lower for word in ['perikanan', 'tambak', 'fishery']):
-        return 16  # Kawasan Perikanan
+    # Detail Bisnis: the blank rows' own columns follow the detail columns ('Koordinat' is new)
+    columns = BUSINESS_COLUMNS + ['Koordinat'] if wss_data.get('businesses') else BLANK_BUSINESS_COLUMNS
+    workbook.add_sheet('Detail Bisnis', columns, business_rows(wss_data, columns))
     
-    # Check for mining areas
-    elif any(word in name_lower for word in ['pertambangan', 'tambang', 'mining']):
-        return 17  # Kawasan Pertambangan
+    # Add economic centers sheet if there are any
+    if wss_data.get('economic_centers'):
+        workbook.add_sheet('Pusat Ekonomi', ECONOMIC_CENTER_COLUMNS, economic_center_rows(wss_data['economic_centers']))
     
-    # Check for forestry areas
-    elif any(word in name_lower for word in ['kehutanan', 'hutan', 'forestry']):
-        return 18  # Kawasan Kehutanan
+    # Add building data sheet if there are any buildings detected
+    building_data = wss_data.get('building_data', {})
+    if building_data and any(building_data.get(key, 0) > 0 for key, _, _, _ in BUILDING_GROUPS):
+        workbook.add_sheet('Data Bangunan', BUILDING_COLUMNS, building_rows(building_data))
     
-    # Check for tourism areas
-    elif any(word in name_lower for word in ['pariwisata', 'wisata', 'tourism']):
-        return 19  # Kawasan Pariwisata
+    # Create header information sheet
+    header_data = {
+        'Map ID': wss_data.get('map_id', ''),
+        'Province': wss_data.get('province', ''),
+        'Regency': wss_data.get('regency', ''),
+        'District': wss_data.get('district', ''),
+        'Village': wss_data.get('village', ''),
+        'Scale': wss_data.get('scale', ''),
+        'Processing Date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'OCR Engine': 'EasyOCR (Free & Accurate)',
+        'Total Businesses Found': len(wss_data.get('businesses', [])),
+        'Total Streets Found': len(wss_data.get('streets', [])),
+        'Total Environments': len(wss_data.get('environments', [])),
+        'Total Segments Generated': len(segments),
+        'Total Bangunan Kosong': building_data.get('bangunan_kosong', 0),
+        'Total Bangunan Bukan Tempat Tinggal': building_data.get('bangunan_bukan_tempat_tinggal', 0),
+        'Total Bangunan Usaha': building_data.get('bangunan_usaha', 0),
+        'Total Kos-kosan': building_data.get('kos_kosan', 0),
+        'Formula Total Muatan': TOTAL_MUATAN_FORMULA,
+        'Note': BLOK3_NOTE[len('Note: '):]
+    }
+    workbook.add_sheet('Informasi Peta', list(header_data), [list(header_data.values())])
     
-    else:
-        return 1  # Permukiman Biasa (default)
+    output = io.BytesIO()
+    workbook.save(output)
+    output.seek(0)
+    return output
 
-def get_dominant_load_description(load_code):
-    """Convert dominant load code to descriptive text"""
-    load_descriptions = {
-        1: "Permukiman Biasa",
-        2: "Permukiman Padat",
-        3: "Permukiman Kumuh",
-        4: "Permukiman Elite",
-        5: "Permukiman Transmigrasi",
-        6: "Permukiman Pesisir",
-        7: "Permukiman Pegunungan",
-        8: "Pusat Perbelanjaan",
-        9: "Kawasan Industri",
-        10: "Hotel/Tempat Rekreasi",
-        11: "Kawasan Pendidikan",
-        12: "Perkantoran",
-        13: "Pelabuhan/Bandara/Terminal",
-        14: "Kawasan Pertanian",
-        15: "Kawasan Peternakan",
-        16: "Kawasan Perikanan",
-        17: "Kawasan Pertambangan",
-        18: "Kawasan Kehutanan",
-        19: "Kawasan Pariwisata",
-        20: "Kawasan Khusus Lainnya"
+def opens_environment_section(token):
+    """
+    True when a line mentioning environment categories is a section label: a LINGKUNGAN line,
+    or a line that names no business and no street. Business words are environment keywords
+    too (toko, hotel, klinik, ...), so "Toko Sinar Jaya" is a business of the current section.
+    """
+    if 'LINGKUNGAN' in token['upper']:
+        return True
+    hits = token['hits']
+    return not (hits.any('business') or hits.any('contextual_business') or token['street'])
+
+def partition_environment_sections(tokens):
+    """
+    Assign every line to its environment section in one traversal
+    A section label (see opens_environment_section) mentioning environment categories (perumahan,
+    komersial, ...) opens a new section of those categories, unless it also mentions a category of
+    the current section. Every line, labels included, belongs to the section of the nearest label
+    at or above it; lines before the first label are the map header and belong to none.
+    Returns: list of {'categories': [...], 'heading': token, 'lines': [tokens]} in map order
+    """
+    sections = []
+    current = None
+    for token in tokens:
+        categories = token['hits'].categories('environment')
+        if categories and opens_environment_section(token):
+            if current is None or not current['categories_set'].intersection(categories):
+                current = {'categories': categories, 'categories_set': set(categories), 'heading': token, 'lines': []}
+                sections.append(current)
+        if current is not None:
+            current['lines'].append(token)
+    for section in sections:
+        del section['categories_set']
+    return sections
+
+def extract_contextual_sections(text, targets=None, area_index=None, deadline=None, map_id='', start_background=True, scan=None, enrich=True):
+    """
+    Contextual data of every environment of the map at once, from one partition of its lines
+    Args:
+        targets: environment categories to build (default: every category with a section)
+        (other arguments as in extract_contextual_data)
+    Returns:
+        dict: environment category -> contextual data of the lines in its sections
+    """
+    lines = scan['lines'] if scan is not None else tokenize_wss_text(text)
+    tokens_by_environment = {}
+    for section in partition_environment_sections(lines):
+        for category in section['categories']:
+            if targets is None or category in targets:
+                logger.info(f"Entering {category} area: {section['heading']['text']}")
+                tokens_by_environment.setdefault(category, []).extend(section['lines'])
+    return {
+        category: build_contextual_section(category, tokens, area_index=area_index, deadline=deadline,
+                                           map_id=map_id, start_background=start_background, enrich=enrich)
+        for category, tokens in tokens_by_environment.items()
     }
-    return load_descriptions.get(load_code, f"Kode {load_code} (Tidak Diketahui)")
 
-def generate_excel_template(wss_data):
-    """Generate Excel template based on WSS data with proper BLOK III format matching the image"""
-    
-    # Generate segments automatically
-    segments = generate_segments_from_data(wss_data)
-    
-    # Create a new Excel workbook
-    output = io.BytesIO()
-    
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        # Create BLOK III worksheet with proper format matching the image
-        blok3_data = []
-        
-        # Add header row with proper column names matching the image
-        header_row = {
-            'No (1)': 'No (1)',
-            'No Segmen (2)': 'No Segmen (2)',
-            'Muatan Dominan Segmen *) (3)': 'Muatan Dominan Segmen *) (3)',
-            'Nama Wilayah Konsentrasi Ekonomi (4a)': 'Nama Wilayah Konsentrasi Ekonomi (4a)',
-            'Jumlah Shift Pada Wilayah Konsentrasi Ekonomi (4b)': 'Jumlah Shift Pada Wilayah Konsentrasi Ekonomi (4b)',
-            'Jam Operasional (4c)': 'Jam Operasional (4c)',
-            'Contact Person Telepon/ Email (4d)': 'Contact Person Telepon/ Email (4d)',
-            'Perkiraan Jumlah Muatan KK (Keluarga) (5)': 'Perkiraan Jumlah Muatan KK (Keluarga) (5)',
-            'Bangunan Tempat Tinggal (BTT) (6)': 'Bangunan Tempat Tinggal (BTT) (6)',
-            'Bangunan Tempat Tinggal Kosong (BTT Kosong) (7)': 'Bangunan Tempat Tinggal Kosong (BTT Kosong) (7)',
-            'Bangunan Khusus Usaha (BKU) (8)': 'Bangunan Khusus Usaha (BKU) (8)',
-            'Bangunan Bukan Tempat Tinggal (BBTT non Usaha) (9)': 'Bangunan Bukan Tempat Tinggal (BBTT non Usaha) (9)',
-            'Perkiraan Jumlah Muatan Usaha (10)': 'Perkiraan Jumlah Muatan Usaha (10)',
-            'Total Muatan (11)': 'Total Muatan (11)',
-            'Kode Sub-SLS (Baru) (12)': 'Kode Sub-SLS (Baru) (12)'
-        }
-        blok3_data.append(header_row)
-        
-        # Add segments data
-        for segment in segments:
-            # Calculate total muatan using the formula from the image
-            # Formula: (Maks(Kol 5, Kol 6) + Kol 7 + Kol 9 + Kol 10)
-            kol5 = segment['muatan_kk']  # KK count
-            kol6 = segment['btt']        # BTT count
-            kol7 = segment['btt_kosong'] # BTT Kosong count
-            kol9 = segment['bbtt_non_usaha']  # BBTT non Usaha count
-            kol10 = segment['muatan_usaha']   # Usaha count
-            
-            # Calculate max of Kol 5 and Kol 6
-            max_kol5_kol6 = max(kol5, kol6)
-            total_muatan = max_kol5_kol6 + kol7 + kol9 + kol10
-            
-            blok3_data.append({
-                'No (1)': segment['no'],
-                'No Segmen (2)': segment['no_segmen'],
-                'Muatan Dominan Segmen *) (3)': segment['muatan_dominan'],
-                'Nama Wilayah Konsentrasi Ekonomi (4a)': segment['nama_wilayah'],
-                'Jumlah Shift Pada Wilayah Konsentrasi Ekonomi (4b)': segment['jumlah_shift'],
-                'Jam Operasional (4c)': segment['jam_operasional'],
-                'Contact Person Telepon/ Email (4d)': segment['contact_person'],
-                'Perkiraan Jumlah Muatan KK (Keluarga) (5)': segment['muatan_kk'],
-                'Bangunan Tempat Tinggal (BTT) (6)': segment['btt'],
-                'Bangunan Tempat Tinggal Kosong (BTT Kosong) (7)': segment['btt_kosong'],
-                'Bangunan Khusus Usaha (BKU) (8)': segment['bku'],
-                'Bangunan Bukan Tempat Tinggal (BBTT non Usaha) (9)': segment['bbtt_non_usaha'],
-                'Perkiraan Jumlah Muatan Usaha (10)': segment['muatan_usaha'],
-                'Total Muatan (11)': total_muatan,
-                'Kode Sub-SLS (Baru) (12)': segment['kode_sub_sls']
-            })
-        
-        # Add empty rows for manual entry (matching the image format)
-        for i in range(10):  # Add more empty rows for manual entry
-            blok3_data.append({
-                'No (1)': '',
-                'No Segmen (2)': '',
-                'Muatan Dominan Segmen *) (3)': '',
-                'Nama Wilayah Konsentrasi Ekonomi (4a)': '',
-                'Jumlah Shift Pada Wilayah Konsentrasi Ekonomi (4b)': '',
-                'Jam Operasional (4c)': '',
-                'Contact Person Telepon/ Email (4d)': '',
-                'Perkiraan Jumlah Muatan KK (Keluarga) (5)': '',
-                'Bangunan Tempat Tinggal (BTT) (6)': '',
-                'Bangunan Tempat Tinggal Kosong (BTT Kosong) (7)': '',
-                'Bangunan Khusus Usaha (BKU) (8)': '',
-                'Bangunan Bukan Tempat Tinggal (BBTT non Usaha) (9)': '',
-                'Perkiraan Jumlah Muatan Usaha (10)': '',
-                'Total Muatan (11)': '',
-                'Kode Sub-SLS (Baru) (12)': ''
-            })
-        
-        df_blok3 = pd.DataFrame(blok3_data)
-        df_blok3.to_excel(writer, sheet_name='BLOK III - LEMBAR KERJA PENGHITUNGAN MUATAN', index=False)
-        
-        # Create detailed business information sheet
-        business_details = []
-        for business_name in wss_data.get('businesses', []):
-            business_detail = wss_data.get('business_details', {}).get(business_name, {})
-            business_details.append({
-                'Nama Bisnis': business_name,
-                'Tipe Bisnis': business_detail.get('type', 'general'),
-                'Contact Person': business_detail.get('contact_person', ''),
-                'Jam Operasional': business_detail.get('operational_hours', ''),
-                'Koordinat (Decimal)': business_detail.get('coordinates_decimal', business_detail.get('coordinates', '')),
-                'Koordinat (DMS)': business_detail.get('coordinates_dms', ''),
-                'Latitude': business_detail.get('latitude', ''),
-                'Longitude': business_detail.get('longitude', ''),
-                'Link Google Maps': business_detail.get('google_maps_link', ''),
-                'Link OpenStreetMap': business_detail.get('osm_link', ''),
-                'Tipe Lokasi': business_detail.get('location_type', ''),
-                'Provinsi': business_detail.get('province', ''),
-                'Kabupaten': business_detail.get('regency', ''),
-                'Kecamatan': business_detail.get('district', ''),
-                'Desa': business_detail.get('village', ''),
-                'Akurasi': business_detail.get('accuracy', 'low'),
-                'Tervalidasi': business_detail.get('validated', False),
-                'Alamat': business_detail.get('address', ''),
-                'Telepon': business_detail.get('phone', ''),
-                'Email': business_detail.get('email', ''),
-                'Catatan': 'Koordinat yang pasti dengan validasi dan presisi tinggi'
-            })
-        
-        # Create economic centers information sheet
-        economic_centers_details = []
-        for center in wss_data.get('economic_centers', []):
-            economic_centers_details.append({
-                'Nama Pusat Ekonomi': center.get('name', ''),
-                'Tipe Pusat': center.get('type', ''),
-                'Perkiraan UMKM': center.get('estimated_umkm', 0),
-                'Lingkungan': center.get('environment', ''),
-                'Tipe Area': center.get('area_type', ''),
-                'Konteks': center.get('context', 'Pusat ekonomi yang berisi multiple UMKM'),
-                'Contact Person': center.get('contact_person', ''),
-                'Jam Operasional': center.get('operational_hours', ''),
-                'Koordinat (Decimal)': center.get('coordinates_decimal', center.get('coordinates', '')),
-                'Koordinat (DMS)': center.get('coordinates_dms', ''),
-                'Latitude': center.get('latitude', ''),
-                'Longitude': center.get('longitude', ''),
-                'Link Google Maps': center.get('google_maps_link', ''),
-                'Link OpenStreetMap': center.get('osm_link', ''),
-                'Tipe Lokasi': center.get('location_type', ''),
-                'Provinsi': center.get('province', ''),
-                'Kabupaten': center.get('regency', ''),
-                'Kecamatan': center.get('district', ''),
-                'Desa': center.get('village', ''),
-                'Akurasi': center.get('accuracy', 'low'),
-                'Tervalidasi': center.get('validated', False),
-                'Alamat': center.get('address', ''),
-                'Telepon': center.get('phone', ''),
-                'Email': center.get('email', ''),
-                'Catatan': 'Pusat ekonomi dengan koordinat yang pasti sesuai konteks lingkungan'
-            })
-        
-        # Add empty rows for additional businesses
-        for i in range(10):
-            business_details.append({
-                'Nama Bisnis': '',
-                'Tipe Bisnis': '',
-                'Contact Person': '',
-                'Jam Operasional': '',
-                'Koordinat': '',
-                'Alamat': '',
-                'Telepon': '',
-                'Email': '',
-                'Catatan': ''
-            })
-        
-        df_business = pd.DataFrame(business_details)
-        df_business.to_excel(writer, sheet_name='Detail Bisnis', index=False)
-        
-        # Add economic centers sheet if there are any
-        if economic_centers_details:
-            df_economic_centers = pd.DataFrame(economic_centers_details)
-            df_economic_centers.to_excel(writer, sheet_name='Pusat Ekonomi', index=False)
-        
-        # Add building data sheet if there are any buildings detected
-        building_data = wss_data.get('building_data', {})
-        if building_data and (building_data.get('bangunan_kosong', 0) > 0 or 
-                            building_data.get('bangunan_bukan_tempat_tinggal', 0) > 0 or
-                            building_data.get('bangunan_usaha', 0) > 0 or
-                            building_data.get('kos_kosan', 0) > 0):
-            
-            building_details = []
-            
-            # Add bangunan kosong
-            for building in building_data.get('details', {}).get('bangunan_kosong', []):
-                building_details.append({
-                    'Tipe Bangunan': 'Bangunan Kosong',
-                    'Nama Bangunan': building,
-                    'Jumlah': 1,
-                    'Kategori': 'Tidak Terisi',
-                    'Catatan': 'Bangunan yang tidak terisi atau belum dihuni'
-                })
-            
-            # Add bangunan bukan tempat tinggal
-            for building in building_data.get('details', {}).get('bangunan_bukan_tempat_tinggal', []):
-                building_details.append({
-                    'Tipe Bangunan': 'Bangunan Bukan Tempat Tinggal',
-                    'Nama Bangunan': building,
-                    'Jumlah': 1,
-                    'Kategori': 'Fasilitas Umum',
-                    'Catatan': 'Masjid, sekolah, kantor, dll'
-                })
-            
-            # Add bangunan usaha
-            for building in building_data.get('details', {}).get('bangunan_usaha', []):
-                building_details.append({
-                    'Tipe Bangunan': 'Bangunan Usaha',
-                    'Nama Bangunan': building,
-                    'Jumlah': 1,
-                    'Kategori': 'Komersial',
-                    'Catatan': 'Toko, warung, restoran, dll'
-                })
-            
-            # Add kos-kosan
-            for building in building_data.get('details', {}).get('kos_kosan', []):
-                building_details.append({
-                    'Tipe Bangunan': 'Kos-kosan',
-                    'Nama Bangunan': building,
-                    'Jumlah': 1,
-                    'Kategori': 'Tempat Tinggal',
-                    'Catatan': 'Tempat tinggal sewa/kontrakan'
-                })
-            
-            # Add empty rows for manual entry
-            for i in range(5):
-                building_details.append({
-                    'Tipe Bangunan': '',
-                    'Nama Bangunan': '',
-                    'Jumlah': '',
-                    'Kategori': '',
-                    'Catatan': ''
-                })
-            
-            df_building = pd.DataFrame(building_details)
-            df_building.to_excel(writer, sheet_name='Data Bangunan', index=False)
-        
-        # Create header information sheet
-        header_data = {
-            'Map ID': wss_data.get('map_id', ''),
-            'Province': wss_data.get('province', ''),
-            'Regency': wss_data.get('regency', ''),
-            'District': wss_data.get('district', ''),
-            'Village': wss_data.get('village', ''),
-            'Scale': wss_data.get('scale', ''),
-            'Processing Date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'OCR Engine': 'EasyOCR (Free & Accurate)',
-            'Total Businesses Found': len(wss_data.get('businesses', [])),
-            'Total Streets Found': len(wss_data.get('streets', [])),
-            'Total Environments': len(wss_data.get('environments', [])),
-            'Total Segments Generated': len(segments),
-            'Total Bangunan Kosong': building_data.get('bangunan_kosong', 0),
-            'Total Bangunan Bukan Tempat Tinggal': building_data.get('bangunan_bukan_tempat_tinggal', 0),
-            'Total Bangunan Usaha': building_data.get('bangunan_usaha', 0),
-            'Total Kos-kosan': building_data.get('kos_kosan', 0),
-            'Formula Total Muatan': '(Maks(Kol 5, Kol 6) + Kol 7 + Kol 9 + Kol 10)',
-            'Note': 'Diisi jika kolom (3) = 8-13 dan selain 11'
-        }
-        
-        df_header = pd.DataFrame([header_data])
-        df_header.to_excel(writer, sheet_name='Informasi Peta', index=False)
-        
-        # Get the workbook to apply formatting
-        workbook = writer.book
-        
-        # Apply formatting to BLOK III sheet
-        worksheet = writer.sheets['BLOK III - LEMBAR KERJA PENGHITUNGAN MUATAN']
-        
-        # Auto-adjust column widths
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        # Add note about conditional filling
-        worksheet['A' + str(len(blok3_data) + 3)] = 'Note: Diisi jika kolom (3) = 8-13 dan selain 11'
-        worksheet['A' + str(len(blok3_data) + 4)] = 'Formula Total Muatan: (Maks(Kol 5, Kol 6) + Kol 7 + Kol 9 + Kol 10)'
-        
-    output.seek(0)
-    return output
-
-def extract_contextual_data(text, target_environment=None):
-    """
-    Extract data contextually based on specific areas/environments within the map
-    Args:
-        text: OCR extracted text
-        target_environment: Specific environment to focus on (e.g., 'perkambingan', 'perumahan', 'komersial')
-    Returns:
-        dict: Contextual data for the specified environment
-    """
-    logger.info(f"Extracting contextual data for environment: {target_environment}")
-    
+def build_contextual_section(target_environment, tokens, area_index=None, deadline=None, map_id='', start_background=True, enrich=True):
+    """Contextual data (businesses, streets, landmarks, coordinates, area type) of the lines of one environment"""
     contextual_data = {
         'target_environment': target_environment,
         'businesses': [],
@@ -1263,138 +1681,67 @@ def extract_contextual_data(text, target_environment=None):
         'total_streets': 0,
         'total_landmarks': 0
     }
+    pending_businesses = []
+    businesses = EntityIndex()
+    streets = EntityIndex()
+    landmarks = EntityIndex()
+    coordinates = EntityIndex()
     
-    lines = text.split('\n')
-    in_target_area = False
-    area_context = []
-    
-    # Define environment keywords for contextual extraction
-    environment_keywords = {
-        'perkambingan': ['perkambingan', 'kambing', 'ternak', 'peternakan', 'farm'],
-        'perumahan': ['perumahan', 'rumah', 'housing', 'residential', 'permukiman'],
-        'komersial': ['komersial', 'commercial', 'bisnis', 'business', 'toko', 'mall'],
-        'industri': ['industri', 'industrial', 'pabrik', 'factory', 'kawasan industri'],
-        'pendidikan': ['pendidikan', 'education', 'sekolah', 'school', 'universitas'],
-        'kesehatan': ['kesehatan', 'health', 'rumah sakit', 'hospital', 'klinik'],
-        'pariwisata': ['pariwisata', 'tourism', 'hotel', 'resort', 'wisata'],
-        'pertanian': ['pertanian', 'agriculture', 'sawah', 'ladang', 'kebun'],
-        'perikanan': ['perikanan', 'fishery', 'tambak', 'kolam', 'ikan'],
-        'kehutanan': ['kehutanan', 'forestry', 'hutan', 'forest', 'kayu']
-    }
-    
-    # If no specific target, try to detect the main environment type
-    if not target_environment:
-        for env_type, keywords in environment_keywords.items():
-            for keyword in keywords:
-                if keyword.lower() in text.lower():
-                    target_environment = env_type
-                    logger.info(f"Detected target environment: {target_environment}")
-                    break
-            if target_environment:
-                break
-    
-    # If still no target, default to residential
-    if not target_environment:
-        target_environment = 'perumahan'
-        logger.info(f"Defaulting to environment: {target_environment}")
+    for token in tokens:
+        line = token['text']
+        hits = token['hits']
+        
+        # Extract business names within the target area
+        business_type = hits.first('contextual_business')
+        if business_type:
+            business_name = token['name']
+            if len(business_name) > 2 and businesses.add(Business(business_name, business_type)):
+                
+                # Search for business information from maps
+                business_info = {}
+                if enrich and not budget_spent(deadline):
+                    logger.info(f"Searching for business info in {target_environment}: {business_name}")
+                    with geocoding_deadline(deadline):
+                        if area_index is not None:
+                            business_info = lookup_business_info(business_name, business_type, "Indonesia", area_index)
+                        else:
+                            business_info = search_business_info(business_name, "Indonesia")
+                
+                # Add detailed business information
+                business_detail = build_business_detail(business_type, business_info)
+                business_detail['environment'] = target_environment
+                if enrich and not business_info and budget_spent(deadline):
+                    business_detail['status'] = 'pending'
+                    pending_businesses.append((business_name, business_type))
+                contextual_data['business_details'][business_name] = business_detail
+                
+                logger.info(f"Found Business in {target_environment}: {business_name} (Type: {business_type})")
+        
+        # Extract street names within the target area
+        street_name = token['contextual_street']
+        if street_name and streets.add(Street(street_name)):
+            logger.info(f"Found Street in {target_environment}: {street_name}")
+        
+        # Extract landmarks within the target area
+        if hits.any('contextual_landmark'):
+            landmark_name = token['name']
+            if len(landmark_name) > 2 and landmarks.add(Landmark(landmark_name)):
+                logger.info(f"Found Landmark in {target_environment}: {landmark_name}")
+        
+        # Extract coordinates within the target area
+        # Contextual coordinates keep their OCR text
+        coordinate_text = token['contextual_coordinates']
+        if coordinate_text and coordinates.add(NamedRecord(coordinate_text)):
+            logger.info(f"Found Coordinates in {target_environment}: {coordinate_text}")
     
-    contextual_data['target_environment'] = target_environment
+    if pending_businesses:
+        logger.info(f"Request budget spent, {len(pending_businesses)} contextual businesses left pending")
+        schedule_background_enrichment(map_id, pending_businesses, "Indonesia", area_index, start=start_background)
     
-    # Extract data only from the target environment area
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Check if we're entering the target environment area
-        target_keywords = environment_keywords.get(target_environment, [])
-        if any(keyword.lower() in line.lower() for keyword in target_keywords):
-            in_target_area = True
-            area_context.append(line)
-            logger.info(f"Entering target area: {line}")
-            continue
-        
-        # If we're in the target area, extract relevant data
-        if in_target_area:
-            area_context.append(line)
-            
-            # Extract business names within the target area
-            business_keywords = {
-                'mall': ['mall', 'plaza', 'center', 'pasar', 'supermarket', 'hypermarket'],
-                'pasar': ['pasar', 'market', 'traditional market', 'pasar tradisional', 'pasar induk', 'pasar besar'],
-                'hotel': ['hotel', 'resort', 'inn', 'guesthouse', 'penginapan'],
-                'restaurant': ['restaurant', 'cafe', 'warung', 'rumah makan', 'restoran'],
-                'bank': ['bank', 'atm', 'bca', 'mandiri', 'bni', 'bri'],
-                'hospital': ['hospital', 'rumah sakit', 'klinik', 'apotek', 'puskesmas'],
-                'school': ['school', 'sekolah', 'universitas', 'kampus', 'sd', 'smp', 'sma'],
-                'office': ['office', 'kantor', 'perkantoran', 'gedung'],
-                'gas_station': ['gas', 'spbu', 'pertamina', 'shell', 'bp'],
-                'car_wash': ['car wash', 'cuci mobil', 'cuci motor'],
-                'salon': ['salon', 'spa', 'beauty', 'kecantikan'],
-                'store': ['toko', 'store', 'shop', 'market', 'warung'],
-                'motorcycle': ['motor', 'honda', 'yamaha', 'suzuki', 'kawasaki'],
-                'dental': ['dental', 'gigi', 'drg', 'dokter gigi'],
-                'music': ['music', 'gitar', 'piano', 'alat musik'],
-                'battery': ['battery', 'aki', 'accu', 'baterai'],
-                'pharmacy': ['pharmacy', 'apotek', 'kimia farma', 'century'],
-                'mosque': ['mosque', 'masjid', 'musholla', 'surau'],
-                'church': ['church', 'gereja', 'kapel'],
-                'temple': ['temple', 'pura', 'vihara', 'klenteng'],
-                'park': ['park', 'taman', 'alun-alun', 'lapangan']
-            }
-            
-            business_found = False
-            for business_type, keywords in business_keywords.items():
-                if any(keyword.lower() in line.lower() for keyword in keywords):
-                    business_name = re.sub(r'[^\w\s\-\.]', '', line).strip()
-                    if len(business_name) > 2 and business_name not in contextual_data['businesses']:
-                        contextual_data['businesses'].append(business_name)
-                        
-                        # Search for business information from maps
-                        logger.info(f"Searching for business info in {target_environment}: {business_name}")
-                        business_info = search_business_info(business_name, "Indonesia")
-                        
-                        # Add detailed business information
-                        contextual_data['business_details'][business_name] = {
-                            'type': business_type,
-                            'environment': target_environment,
-                            'contact_person': business_info.get('contact_person', 'Hubungi langsung'),
-                            'operational_hours': business_info.get('operational_hours', '08:00-17:00'),
-                            'coordinates': business_info.get('coordinates', ''),
-                            'address': business_info.get('address', ''),
-                            'phone': business_info.get('phone', ''),
-                            'email': business_info.get('email', ''),
-                            'business_type_osm': business_info.get('business_type', 'general')
-                        }
-                        
-                        business_found = True
-                        logger.info(f"Found Business in {target_environment}: {business_name} (Type: {business_type})")
-                        break
-            
-            # Extract street names within the target area
-            if 'Jl.' in line or 'Jalan' in line or 'Jl ' in line:
-                street_match = re.search(r'(Jl\.?\s*[A-Za-z\s]+|Jalan\s+[A-Za-z\s]+)', line)
-                if street_match:
-                    street_name = street_match.group(1).strip()
-                    if street_name not in contextual_data['streets']:
-                        contextual_data['streets'].append(street_name)
-                        logger.info(f"Found Street in {target_environment}: {street_name}")
-            
-            # Extract landmarks within the target area
-            landmark_keywords = ['masjid', 'gereja', 'pura', 'taman', 'lapangan', 'alun-alun', 'monumen', 'museum', 'stasiun', 'terminal', 'bandara', 'pelabuhan']
-            if any(keyword.lower() in line.lower() for keyword in landmark_keywords):
-                landmark_name = re.sub(r'[^\w\s\-\.]', '', line).strip()
-                if len(landmark_name) > 2 and landmark_name not in contextual_data['landmarks']:
-                    contextual_data['landmarks'].append(landmark_name)
-                    logger.info(f"Found Landmark in {target_environment}: {landmark_name}")
-            
-            # Extract coordinates within the target area
-            coord_match = re.search(r'(\d+\.\d+,\s*\d+\.\d+)', line)
-            if coord_match:
-                coordinates = coord_match.group(1)
-                if coordinates not in contextual_data['coordinates']:
-                    contextual_data['coordinates'].append(coordinates)
-                    logger.info(f"Found Coordinates in {target_environment}: {coordinates}")
+    contextual_data['businesses'] = businesses.to_preview()
+    contextual_data['streets'] = streets.to_preview()
+    contextual_data['landmarks'] = landmarks.to_preview()
+    contextual_data['coordinates'] = coordinates.to_preview()
     
     # Calculate totals
     contextual_data['total_businesses'] = len(contextual_data['businesses'])
@@ -1414,13 +1761,285 @@ def extract_contextual_data(text, target_environment=None):
     
     return contextual_data
 
+def extract_contextual_data(text, target_environment=None, area_index=None, deadline=None, map_id='', start_background=True, scan=None, enrich=True):
+    """
+    Extract data contextually based on specific areas/environments within the map
+    Args:
+        text: OCR extracted text
+        target_environment: Specific environment to focus on (e.g., 'perkambingan', 'perumahan', 'komersial')
+        area_index: Prefetched area POIs (see prefetch_area_pois); replaces per-business searches
+        deadline: time.monotonic() value after which businesses are left 'pending' for background workers
+        map_id: Map ID the pending businesses are resolved under
+        start_background: Resolve pending businesses right away (True) or only on demand (False)
+        scan: result of scan_wss_text(text) to reuse instead of tokenizing the text again
+        enrich: False skips business lookups entirely (text-only re-parsing)
+    Returns:
+        dict: Contextual data for the specified environment (only the lines of its own sections,
+        see extract_contextual_sections for every environment at once)
+    """
+    logger.info(f"Extracting contextual data for environment: {target_environment}")
+    
+    if scan is None:
+        scan = {'lines': tokenize_wss_text(text)}
+        scan['environments_mentioned'] = {env for token in scan['lines'] for env in token['hits'].categories('environment')}
+    
+    # If no specific target, try to detect the main environment type
+    if not target_environment:
+        target_environment = next((env for env in ENVIRONMENT_KEYWORDS if env in scan['environments_mentioned']), None)
+        if target_environment:
+            logger.info(f"Detected target environment: {target_environment}")
+    
+    # If still no target, default to residential
+    if not target_environment:
+        target_environment = 'perumahan'
+        logger.info(f"Defaulting to environment: {target_environment}")
+    
+    sections = extract_contextual_sections(text, targets=[target_environment], area_index=area_index, deadline=deadline,
+                                           map_id=map_id, start_background=start_background, scan=scan, enrich=enrich)
+    if target_environment in sections:
+        return sections[target_environment]
+    return build_contextual_section(target_environment, [], enrich=enrich)
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def build_preview_data(text, wss_data, scan=None, deadline=None, start_background=True, enrich=True):
+    """
+    Preview JSON of a parsed map: contextual data, segments, building data and enrichment status
+    Shared by /upload, /capture and the text-only parse API
+    """
+    # Extract contextual data based on detected environment
+    contextual_data = extract_contextual_data(text, area_index=area_poi_cache.get(wss_data.get('map_id')),
+                                              deadline=deadline, map_id=wss_data.get('map_id', ''),
+                                              start_background=start_background, scan=scan, enrich=enrich)
+    
+    # Every environment of the map from the same partition; only the main one above is looked up,
+    # the business details of the others are in wss_data['business_details']
+    contextual_sections = {
+        category: {key: value for key, value in section.items() if key != 'business_details'}
+        for category, section in extract_contextual_sections(text, scan=scan, enrich=False).items()
+    }
+    
+    # Generate segments for preview using contextual data
+    segments = generate_segments_from_data(wss_data)
+    
+    # Calculate total estimated KK and dominant loads
+    total_estimated_kk = contextual_data.get('estimated_kk', 0)
+    dominant_loads = [contextual_data.get('dominant_load', 'Tidak Diketahui')]
+    
+    # Return preview data with contextual information
+    preview_data = {
+        'map_id': wss_data.get('map_id', 'Tidak ditemukan'),
+        'province': wss_data.get('province', 'Tidak ditemukan'),
+        'regency': wss_data.get('regency', 'Tidak ditemukan'),
+        'district': wss_data.get('district', 'Tidak ditemukan'),
+        'village': wss_data.get('village', 'Tidak ditemukan'),
+        'scale': wss_data.get('scale', 'Tidak ditemukan'),
+        'admin_confidence': wss_data.get('admin_confidence', {}),
+        'admin_mismatches': wss_data.get('admin_mismatches', []),
+        'target_environment': contextual_data.get('target_environment', 'Tidak terdeteksi'),
+        'contextual_sections': contextual_sections,
+        'area_type': contextual_data.get('area_type', 'Tidak terdeteksi'),
+        'businesses': contextual_data.get('businesses', []),
+        'business_types': wss_data.get('business_types', {}),
+        'business_details': contextual_data.get('business_details', {}),
+        'streets': contextual_data.get('streets', []),
+        'environments': wss_data.get('environments', []),
+        'environment_business_counts': wss_data.get('environment_business_counts'),
+        'business_layout': wss_data.get('business_layout', {}),
+        'business_clusters': wss_data.get('business_clusters', []),
+        'landmarks': contextual_data.get('landmarks', []),
+        'coordinates': contextual_data.get('coordinates', []),
+        'total_businesses': contextual_data.get('total_businesses', 0),
+        'total_streets': contextual_data.get('total_streets', 0),
+        'total_environments': wss_data.get('total_environments', 0),
+        'total_landmarks': contextual_data.get('total_landmarks', 0),
+        'total_coordinates': len(contextual_data.get('coordinates', [])),
+        'total_estimated_kk': total_estimated_kk,
+        'dominant_loads': dominant_loads,
+        'segments': segments,
+        'economic_centers': wss_data.get('economic_centers', []),
+        'candidate_economic_centers': wss_data.get('candidate_economic_centers', [])
+    }
+    
+    # Add building data to preview
+    preview_data['building_data'] = wss_data.get('building_data', {})
+    
+    # Businesses the request budget could not cover are still being resolved in the background
+    preview_data['pending_businesses'] = get_pending_businesses(preview_data)
+    preview_data['enrichment_status'] = 'partial' if preview_data['pending_businesses'] else 'complete'
+    if enrich:
+        register_map_preview(preview_data['map_id'], preview_data)
+    return preview_data
+
+# Processing tiers selectable per request ("tier"): how much of the image OCR reads, whether
+# businesses and economic centers are looked up and where from, and the latency each tier
+# targets for one map (checked by benchmark_tiers.py)
+PROCESSING_TIERS = {
+    'fast': {'ocr': 'header', 'enrich': False, 'cache_only': False, 'target_seconds': 5.0},
+    'standard': {'ocr': 'full', 'enrich': True, 'cache_only': True, 'target_seconds': 15.0},
+    'full': {'ocr': 'full', 'enrich': True, 'cache_only': False, 'target_seconds': 30.0}
+}
+
+def get_processing_tier(name=None):
+    """(name, settings) of a processing tier; None picks DEFAULT_PROCESSING_TIER, unknown names raise ValueError"""
+    name = str(name or app.config['DEFAULT_PROCESSING_TIER']).strip().lower()
+    if name not in PROCESSING_TIERS:
+        raise ValueError(f"Tier pemrosesan tidak dikenal: {name}. Pilih salah satu: {', '.join(PROCESSING_TIERS)}")
+    return name, PROCESSING_TIERS[name]
+
+def tier_lookups(tier_settings):
+    """Context applying a tier's lookup policy to this thread's geocoding (no-op for None)"""
+    if tier_settings is None:
+        return nullcontext()
+    return geocoding_cache_only(tier_settings['cache_only'])
+
+def parse_map_text(text, enrich=False, deadline=None, start_background=True, save=False, tier=None):
+    """
+    Parse already-extracted OCR text into preview JSON, without an image or OCR
+    enrich: look businesses up (geocoding) like /upload; False parses the text only
+    save: store the map in PROCESSED_MAPS_FOLDER like /upload
+    tier: processing tier name; replaces enrich with the tier's lookup policy
+    Returns: {'success': True, 'preview': ...} or {'success': False, 'error', 'missing_fields', 'extracted_data'}
+    """
+    tier_settings = None
+    if tier is not None:
+        tier, tier_settings = get_processing_tier(tier)
+        enrich = tier_settings['enrich']
+    with tier_lookups(tier_settings):
+        scan = stream_wss_text(text, deadline) if enrich else scan_wss_text(text)
+        wss_data = parse_wss_data_improved(text, deadline=deadline, start_background=start_background, scan=scan, enrich=enrich)
+    
+    is_valid, missing_fields, message = validate_map_data(wss_data)
+    if not is_valid:
+        return {
+            'success': False,
+            'error': message,
+            'missing_fields': missing_fields,
+            'extracted_data': {field: wss_data.get(field, '') for field in ['map_id', 'province', 'regency', 'district', 'village', 'scale']}
+        }
+    if save:
+        save_processed_map(wss_data, text)
+    with tier_lookups(tier_settings):
+        preview_data = build_preview_data(text, wss_data, scan, deadline=deadline, start_background=start_background, enrich=enrich)
+    if tier is not None:
+        preview_data['processing_tier'] = tier
+    return {'success': True, 'preview': preview_data}
+
+def parse_map_texts(texts, enrich=False, save=False, tier=None):
+    """Parse a batch of OCR texts with parse_map_text; one result per text, in order"""
+    results = []
+    for text in texts:
+        try:
+            results.append(parse_map_text(text, enrich=enrich, save=save, tier=tier))
+        except Exception as e:
+            logger.error(f"Error parsing map text: {e}")
+            results.append({'success': False, 'error': f'Processing error: {str(e)}'})
+    return results
+
+def reparse_processed_maps(map_ids=None, enrich=False, tier=None):
+    """Re-parse the stored OCR text of processed maps (all of them, or the given map IDs) with the current rules"""
+    if map_ids is None:
+        records = list(iter_processed_maps())
+    else:
+        records = [load_processed_map(map_id) or {'map_id': map_id} for map_id in map_ids]
+    results = []
+    for record in records:
+        if record.get('text') is None:
+            result = {'success': False, 'error': f"Peta {record.get('map_id', '')} tidak ditemukan."}
+        else:
+            result = parse_map_texts([record['text']], enrich=enrich, tier=tier)[0]
+        result['source_map_id'] = record.get('map_id', '')
+        results.append(result)
+    return results
+
+# OCR text and lookup memo of previewed maps, so a corrected text is re-parsed incrementally:
+# unchanged lines come from the line token cache and unchanged businesses from the memo
+edit_sessions = OrderedDict()
+edit_session_lock = threading.Lock()
+MAX_EDIT_SESSIONS = 200
+
+def open_edit_session(map_id, text, lookups, tier=None):
+    """Keep the OCR text, lookup memo and processing tier of a previewed map for later corrections"""
+    if not map_id:
+        return
+    with edit_session_lock:
+        edit_sessions[map_id] = {'text': text, 'lookups': lookups, 'tier': tier}
+        edit_sessions.move_to_end(map_id)
+        while len(edit_sessions) > MAX_EDIT_SESSIONS:
+            edit_sessions.popitem(last=False)
+
+def get_edit_session(map_id):
+    """Edit session of a map, restored from the processed-map store when it has expired; None if unknown"""
+    with edit_session_lock:
+        session = edit_sessions.get(map_id)
+    if session is not None:
+        return session
+    record = load_processed_map(map_id) if map_id else None
+    if not record or record.get('text') is None:
+        return None
+    return {'text': record['text'], 'lookups': {}, 'tier': None}
+
+def apply_line_edits(text, edits):
+    """
+    Apply line corrections to an OCR text
+    edits: list of {'line': 1-based line number, 'text': new line}; the line after the last one appends
+    Returns: (new text, sorted line numbers whose content changed)
+    """
+    lines = text.split('\n')
+    changed = set()
+    for edit in edits:
+        number = edit.get('line')
+        new_line = edit.get('text')
+        if not isinstance(number, int) or not isinstance(new_line, str) or '\n' in new_line:
+            raise ValueError('Setiap koreksi harus berisi nomor baris (line) dan satu baris teks (text)')
+        if not 1 <= number <= len(lines) + 1:
+            raise ValueError(f'Baris {number} di luar teks ({len(lines)} baris)')
+        if number == len(lines) + 1:
+            lines.append(new_line)
+        elif lines[number - 1] == new_line:
+            continue
+        else:
+            lines[number - 1] = new_line
+        changed.add(number)
+    return '\n'.join(lines), sorted(changed)
+
+def reparse_edited_map(map_id, edits=None, text=None, deadline=None):
+    """
+    Re-parse a previewed map after its OCR text was corrected (line edits, or the whole new text)
+    Only changed lines are tokenized again and only businesses not looked up before are searched.
+    Returns: parse_map_text result plus 'text' and 'changed_lines', or None for an unknown map
+    """
+    session = get_edit_session(map_id)
+    if session is None:
+        return None
+    if text is None:
+        text, changed_lines = apply_line_edits(session['text'], edits or [])
+    else:
+        old_lines = session['text'].split('\n')
+        changed_lines = [number for number, line in enumerate(text.split('\n'), 1)
+                         if number > len(old_lines) or old_lines[number - 1] != line]
+    
+    lookups = session['lookups']
+    with enrichment_memo(lookups):
+        result = parse_map_text(text, enrich=True, deadline=deadline, save=True, tier=session.get('tier'))
+    result['text'] = text
+    result['changed_lines'] = changed_lines
+    if result['success']:
+        # A corrected map ID moves the session to the new ID
+        open_edit_session(result['preview']['map_id'], text, lookups, session.get('tier'))
+    return result
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     try:
+        deadline = time.monotonic() + app.config['REQUEST_BUDGET_SECONDS']
+        try:
+            tier, tier_settings = get_processing_tier(request.form.get('tier') or request.args.get('tier'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         if 'file' not in request.files:
             return jsonify({'error': 'No file uploaded'}), 400
         
@@ -1441,7 +2060,7 @@ def upload_file():
         logger.info(f"File uploaded: {filename}")
         
         # Extract text from image
-        extracted_text = extract_text_from_image(filepath)
+        extracted_text, layout = extract_text_from_image(filepath, with_layout=True, header_only=tier_settings['ocr'] == 'header')
         
         if not extracted_text or extracted_text.strip() == "":
             logger.warning("No text extracted from image")
@@ -1451,64 +2070,48 @@ def upload_file():
         if "Error dalam proses OCR" in extracted_text or "Tidak ada teks yang dapat diekstrak" in extracted_text:
             return jsonify({'error': extracted_text}), 400
         
-        # Parse WSS data for basic map information
-        wss_data = parse_wss_data_improved(extracted_text)
-        
-        # Validate map data
-        is_valid, missing_fields, message = validate_map_data(wss_data)
-        if not is_valid:
-            return jsonify({'error': message, 'missing_fields': missing_fields}), 400
-        
-        # Extract contextual data based on detected environment
-        contextual_data = extract_contextual_data(extracted_text)
-        
-        # Generate segments for preview using contextual data
-        segments = generate_segments_from_data(wss_data)
-        
-        # Calculate total estimated KK and dominant loads
-        total_estimated_kk = contextual_data.get('estimated_kk', 0)
-        dominant_loads = [contextual_data.get('dominant_load', 'Tidak Diketahui')]
-        
-        # Return preview data with contextual information
-        preview_data = {
-            'map_id': wss_data.get('map_id', 'Tidak ditemukan'),
-            'province': wss_data.get('province', 'Tidak ditemukan'),
-            'regency': wss_data.get('regency', 'Tidak ditemukan'),
-            'district': wss_data.get('district', 'Tidak ditemukan'),
-            'village': wss_data.get('village', 'Tidak ditemukan'),
-            'scale': wss_data.get('scale', 'Tidak ditemukan'),
-            'target_environment': contextual_data.get('target_environment', 'Tidak terdeteksi'),
-            'area_type': contextual_data.get('area_type', 'Tidak terdeteksi'),
-            'businesses': contextual_data.get('businesses', []),
-            'business_types': wss_data.get('business_types', {}),
-            'business_details': contextual_data.get('business_details', {}),
-            'streets': contextual_data.get('streets', []),
-            'environments': wss_data.get('environments', []),
-            'landmarks': contextual_data.get('landmarks', []),
-            'coordinates': contextual_data.get('coordinates', []),
-            'total_businesses': contextual_data.get('total_businesses', 0),
-            'total_streets': contextual_data.get('total_streets', 0),
-            'total_environments': wss_data.get('total_environments', 0),
-            'total_landmarks': contextual_data.get('total_landmarks', 0),
-            'total_coordinates': len(contextual_data.get('coordinates', [])),
-            'total_estimated_kk': total_estimated_kk,
-            'dominant_loads': dominant_loads,
-            'segments': segments,
-            'economic_centers': wss_data.get('economic_centers', [])
-        }
+        # Tiered pipeline: with deferred enrichment the preview only waits for OCR, parsing and segments
+        deferred_mode = app.config['DEFERRED_ENRICHMENT']
+        if deferred_mode in ('background', 'on_demand'):
+            deadline = time.monotonic()
+        start_background = deferred_mode != 'on_demand'
+        
+        # Lookups are memoized per map so corrections of the OCR text re-parse without repeating them
+        lookups = {}
+        enrich = tier_settings['enrich']
+        with enrichment_memo(lookups), tier_lookups(tier_settings):
+            # Parse WSS data for basic map information
+            # One pass over the OCR text feeds both the map data and the contextual data,
+            # with each business looked up while the lines after it are still being parsed
+            scan = stream_wss_text(extracted_text, deadline) if enrich else scan_wss_text(extracted_text)
+            wss_data = parse_wss_data_improved(extracted_text, deadline=deadline, start_background=start_background, scan=scan, enrich=enrich)
+            # Where the labels sit on the map decides which LINGKUNGAN each business belongs to
+            if layout is not None:
+                assign_layout_regions(wss_data, layout)
+            
+            # Validate map data
+            is_valid, missing_fields, message = validate_map_data(wss_data)
+            if not is_valid:
+                return jsonify({'error': message, 'missing_fields': missing_fields}), 400
+            save_processed_map(wss_data, extracted_text)
+            
+            preview_data = build_preview_data(extracted_text, wss_data, scan, deadline=deadline, start_background=start_background, enrich=enrich)
+        preview_data['processing_tier'] = tier
+        open_edit_session(preview_data['map_id'], extracted_text, lookups, tier)
         
         # Don't delete the file to avoid permission errors
         # os.remove(filepath)
         
-        # Add building data to preview
-        preview_data['building_data'] = wss_data.get('building_data', {})
-        
         logger.info(f"Successfully processed file. Preview data: {preview_data}")
         
+        message = 'Data berhasil diekstrak! Silakan review data di bawah ini.'
+        if preview_data['pending_businesses']:
+            message += f" Detail {len(preview_data['pending_businesses'])} bisnis masih dilengkapi di latar belakang dan akan ikut di file Excel."
+        
         return jsonify({
             'success': True,
             'preview': preview_data,
-            'message': 'Data berhasil diekstrak! Silakan review data di bawah ini.'
+            'message': message
         })
         
     except Exception as e:
@@ -1522,9 +2125,15 @@ def upload_file():
 def capture_map():
     """Capture map data directly from camera/photo with validation"""
     try:
+        deadline = time.monotonic() + app.config['REQUEST_BUDGET_SECONDS']
+        
         data = request.get_json()
         if not data or 'image' not in data:
             return jsonify({'error': 'No image data received'}), 400
+        try:
+            tier, tier_settings = get_processing_tier(data.get('tier'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Decode base64 image
         try:
@@ -1543,83 +2152,67 @@ def capture_map():
             return jsonify({'error': 'Invalid image data format'}), 400
         
         # Extract text from captured image
-        extracted_text = extract_text_from_image(temp_path)
+        extracted_text, layout = extract_text_from_image(temp_path, with_layout=True, header_only=tier_settings['ocr'] == 'header')
         if not extracted_text.strip():
             logger.warning("No text extracted from captured image")
             return jsonify({'error': 'Tidak ada teks yang dapat diekstrak dari gambar. Pastikan gambar jelas dan mengandung teks.'}), 400
         
-        # Parse WSS data for basic map information
-        wss_data = parse_wss_data_improved(extracted_text)
-        
-        # Validate map data
-        is_valid, missing_fields, message = validate_map_data(wss_data)
-        if not is_valid:
-            # Clean up temp file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-            return jsonify({
-                'error': message, 
-                'missing_fields': missing_fields,
-                'extracted_data': {
-                    'map_id': wss_data.get('map_id', ''),
-                    'province': wss_data.get('province', ''),
-                    'regency': wss_data.get('regency', ''),
-                    'district': wss_data.get('district', ''),
-                    'village': wss_data.get('village', ''),
-                    'scale': wss_data.get('scale', '')
-                }
-            }), 400
-        
-        # Extract contextual data based on detected environment
-        contextual_data = extract_contextual_data(extracted_text)
-        
-        # Generate segments for preview using contextual data
-        segments = generate_segments_from_data(wss_data)
-        
-        # Calculate total estimated KK and dominant loads
-        total_estimated_kk = contextual_data.get('estimated_kk', 0)
-        dominant_loads = [contextual_data.get('dominant_load', 'Tidak Diketahui')]
-        
-        # Create preview data with contextual information
-        preview_data = {
-            'map_id': wss_data.get('map_id', 'Tidak ditemukan'),
-            'province': wss_data.get('province', 'Tidak ditemukan'),
-            'regency': wss_data.get('regency', 'Tidak ditemukan'),
-            'district': wss_data.get('district', 'Tidak ditemukan'),
-            'village': wss_data.get('village', 'Tidak ditemukan'),
-            'scale': wss_data.get('scale', 'Tidak ditemukan'),
-            'target_environment': contextual_data.get('target_environment', 'Tidak terdeteksi'),
-            'area_type': contextual_data.get('area_type', 'Tidak terdeteksi'),
-            'businesses': contextual_data.get('businesses', []),
-            'business_types': wss_data.get('business_types', {}),
-            'business_details': contextual_data.get('business_details', {}),
-            'streets': contextual_data.get('streets', []),
-            'environments': wss_data.get('environments', []),
-            'landmarks': contextual_data.get('landmarks', []),
-            'coordinates': contextual_data.get('coordinates', []),
-            'total_businesses': contextual_data.get('total_businesses', 0),
-            'total_streets': contextual_data.get('total_streets', 0),
-            'total_environments': wss_data.get('total_environments', 0),
-            'total_landmarks': contextual_data.get('total_landmarks', 0),
-            'total_coordinates': len(contextual_data.get('coordinates', [])),
-            'total_estimated_kk': total_estimated_kk,
-            'dominant_loads': dominant_loads,
-            'segments': segments,
-            'economic_centers': wss_data.get('economic_centers', [])
-        }
+        # Tiered pipeline: with deferred enrichment the preview only waits for OCR, parsing and segments
+        deferred_mode = app.config['DEFERRED_ENRICHMENT']
+        if deferred_mode in ('background', 'on_demand'):
+            deadline = time.monotonic()
+        start_background = deferred_mode != 'on_demand'
+        
+        # Lookups are memoized per map so corrections of the OCR text re-parse without repeating them
+        lookups = {}
+        enrich = tier_settings['enrich']
+        with enrichment_memo(lookups), tier_lookups(tier_settings):
+            # Parse WSS data for basic map information
+            # One pass over the OCR text feeds both the map data and the contextual data,
+            # with each business looked up while the lines after it are still being parsed
+            scan = stream_wss_text(extracted_text, deadline) if enrich else scan_wss_text(extracted_text)
+            wss_data = parse_wss_data_improved(extracted_text, deadline=deadline, start_background=start_background, scan=scan, enrich=enrich)
+            # Where the labels sit on the map decides which LINGKUNGAN each business belongs to
+            if layout is not None:
+                assign_layout_regions(wss_data, layout)
+            
+            # Validate map data
+            is_valid, missing_fields, message = validate_map_data(wss_data)
+            if not is_valid:
+                # Clean up temp file
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                return jsonify({
+                    'error': message, 
+                    'missing_fields': missing_fields,
+                    'extracted_data': {
+                        'map_id': wss_data.get('map_id', ''),
+                        'province': wss_data.get('province', ''),
+                        'regency': wss_data.get('regency', ''),
+                        'district': wss_data.get('district', ''),
+                        'village': wss_data.get('village', ''),
+                        'scale': wss_data.get('scale', '')
+                    }
+                }), 400
+            save_processed_map(wss_data, extracted_text)
+            
+            preview_data = build_preview_data(extracted_text, wss_data, scan, deadline=deadline, start_background=start_background, enrich=enrich)
+        preview_data['processing_tier'] = tier
+        open_edit_session(preview_data['map_id'], extracted_text, lookups, tier)
         
         # Clean up temp file
         if os.path.exists(temp_path):
             os.remove(temp_path)
         
-        # Add building data to preview
-        preview_data['building_data'] = wss_data.get('building_data', {})
-        
         logger.info(f"Successfully processed captured image. Preview data: {preview_data}")
+        message = 'Foto map berhasil diproses! Data valid dan sesuai kriteria.'
+        if preview_data['pending_businesses']:
+            message += f" Detail {len(preview_data['pending_businesses'])} bisnis masih dilengkapi di latar belakang dan akan ikut di file Excel."
+        
         return jsonify({
             'success': True, 
             'preview': preview_data, 
-            'message': 'Foto map berhasil diproses! Data valid dan sesuai kriteria.'
+            'message': message
         })
         
     except Exception as e:
@@ -1628,6 +2221,55 @@ def capture_map():
         traceback.print_exc()
         return jsonify({'error': f'Processing error: {str(e)}'}), 500
 
+@app.route('/parse-text', methods=['POST'])
+def parse_text():
+    """
+    Parse already-extracted OCR text without an image: {"text": ...} for one map, {"texts": [...]}
+    for a batch, or {"map_ids": [...]} / {"map_ids": "all"} to re-parse stored processed maps.
+    Enrichment (geocoding) only runs with "enrich": true, or as the "tier" given ('fast', 'standard', 'full')
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({'error': 'No data received'}), 400
+        enrich = bool(data.get('enrich', False))
+        tier = data.get('tier')
+        if tier is not None:
+            try:
+                tier, tier_settings = get_processing_tier(tier)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            enrich = tier_settings['enrich']
+        
+        if 'text' in data:
+            if not isinstance(data['text'], str) or not data['text'].strip():
+                return jsonify({'error': 'Teks OCR kosong'}), 400
+            deadline = time.monotonic() + app.config['REQUEST_BUDGET_SECONDS'] if enrich else None
+            result = parse_map_text(data['text'], enrich=enrich, deadline=deadline, save=bool(data.get('save', False)), tier=tier)
+            if not result['success']:
+                return jsonify(result), 400
+            return jsonify(result)
+        
+        if 'texts' in data:
+            if not isinstance(data['texts'], list) or not all(isinstance(text, str) for text in data['texts']):
+                return jsonify({'error': 'texts harus berupa daftar teks OCR'}), 400
+            results = parse_map_texts(data['texts'], enrich=enrich, save=bool(data.get('save', False)), tier=tier)
+        elif 'map_ids' in data:
+            map_ids = None if data['map_ids'] == 'all' else data['map_ids']
+            if map_ids is not None and not isinstance(map_ids, list):
+                return jsonify({'error': 'map_ids harus berupa daftar ID peta atau "all"'}), 400
+            results = reparse_processed_maps(map_ids, enrich=enrich, tier=tier)
+        else:
+            return jsonify({'error': 'Kirim text, texts atau map_ids'}), 400
+        
+        valid = sum(1 for result in results if result['success'])
+        return jsonify({'success': True, 'total': len(results), 'valid': valid,
+                        'invalid': len(results) - valid, 'results': results})
+    
+    except Exception as e:
+        logger.error(f"Error parsing text: {e}")
+        return jsonify({'error': f'Processing error: {str(e)}'}), 500
+
 @app.route('/download', methods=['POST'])
 def download_excel():
     """Download Excel file after preview"""
@@ -1650,15 +2292,23 @@ def download_excel():
             'business_details': data.get('business_details', {}),
             'streets': data.get('streets', []),
             'environments': data.get('environments', []),
+            'environment_business_counts': data.get('environment_business_counts'),
             'landmarks': data.get('landmarks', []),
             'coordinates': data.get('coordinates', []),
             'total_businesses': data.get('total_businesses', 0),
             'total_streets': data.get('total_streets', 0),
             'total_environments': data.get('total_environments', 0),
             'total_landmarks': data.get('total_landmarks', 0),
-            'building_data': data.get('building_data', {})
+            'building_data': data.get('building_data', {}),
+            'economic_centers': data.get('economic_centers', [])
         }
         
+        # Pick up businesses resolved in the background after the preview was returned,
+        # starting on-demand enrichment and giving unfinished work one request budget to complete
+        start_deferred_enrichment(wss_data['map_id'])
+        wait_for_enrichment(wss_data['map_id'], app.config['REQUEST_BUDGET_SECONDS'])
+        merge_background_enrichment(wss_data)
+        
         # Generate Excel template
         excel_output = generate_excel_template(wss_data)
         
@@ -1676,88 +2326,260 @@ def download_excel():
         traceback.print_exc()
         return jsonify({'error': f'Download error: {str(e)}'}), 500
 
-def detect_economic_centers(businesses, business_details, environments=None, dominant_load=None):
+@app.route('/maps/<map_id>/business-details', methods=['GET'])
+def map_business_details(map_id):
+    """
+    Enriched business_details and economic_centers of a previewed map
+    Starts on-demand enrichment; ?wait=<seconds> blocks until it completes (bounded by the request budget)
+    """
+    start_deferred_enrichment(map_id)
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        return jsonify({'error': 'Parameter wait harus berupa angka'}), 400
+    if wait > 0:
+        wait_for_enrichment(map_id, min(wait, app.config['REQUEST_BUDGET_SECONDS']))
+    
+    map_details = get_enriched_map_details(map_id)
+    if map_details is None:
+        return jsonify({'error': f'Peta {map_id} tidak ditemukan. Silakan upload ulang.'}), 404
+    return jsonify(map_details)
+
+@app.route('/maps/<map_id>/text', methods=['POST'])
+def correct_map_text(map_id):
+    """
+    Correct the OCR text of a previewed map and return the updated preview
+    Body: {"edits": [{"line": 3, "text": "..."}]} or {"text": "..."} for the whole text
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data or ('edits' not in data and 'text' not in data):
+            return jsonify({'error': 'Kirim edits atau text'}), 400
+        if 'text' in data and not isinstance(data['text'], str):
+            return jsonify({'error': 'text harus berupa teks OCR'}), 400
+        if 'edits' in data and not isinstance(data['edits'], list):
+            return jsonify({'error': 'edits harus berupa daftar koreksi baris'}), 400
+        
+        start = time.perf_counter()
+        deadline = time.monotonic() + app.config['REQUEST_BUDGET_SECONDS']
+        try:
+            result = reparse_edited_map(map_id, edits=data.get('edits'), text=data.get('text'), deadline=deadline)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if result is None:
+            return jsonify({'error': f'Peta {map_id} tidak ditemukan. Silakan upload ulang.'}), 404
+        result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        if not result['success']:
+            return jsonify(result), 400
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Error correcting map text: {e}")
+        return jsonify({'error': f'Processing error: {str(e)}'}), 500
+
+@app.route('/metrics/geocoding', methods=['GET'])
+def geocoding_metrics():
+    """Expose geocoding client counters (calls, retries, breaker trips, latency)"""
+    return jsonify(geocoder.get_stats())
+
+@app.route('/metrics/pipeline', methods=['GET'])
+def pipeline_metrics():
+    """Expose the streaming parse counters per stage (items, busy/blocked time, queue depth)"""
+    return jsonify(streaming_stats.get_stats())
+
+@app.route('/metrics/classifier', methods=['GET'])
+def classifier_metrics():
+    """Expose the name classification memo counters (hits, misses, size)"""
+    return jsonify(name_classifier_stats())
+
+# UMKM adjustment of an economic center by the map's context, first matching rule wins:
+# (environment keyword, area type keyword, {center type: (operation, factor, bound)}), where
+# 'reduce' is max(bound, umkm // factor) and 'grow' is min(bound, umkm * factor)
+ECONOMIC_CENTER_CONTEXT_RULES = [
+    ('perkambingan', 'ternak', {'mall': ('reduce', 2, 20), 'pasar': ('reduce', 2, 30)}),   # Livestock area
+    ('sawah', 'pertanian', {'mall': ('reduce', 1.3, 25), 'pasar': ('reduce', 1.2, 50)}),   # Agricultural area
+    ('pabrik', 'industri', {'mall': ('grow', 1.1, 80), 'pasar': ('grow', 1.1, 120)})       # Industrial area
+]
+
+def economic_center_context(environments=None, dominant_load=None):
+    """(environment context, area type): lowercased environment names and dominant load description"""
+    environment_context = ' '.join(env.get('name', '').lower() for env in environments or [])
+    area_type = get_dominant_load_description(dominant_load).lower() if dominant_load else ""
+    return environment_context, area_type
+
+def context_rule_index(environment_context, area_type):
+    """Position of the first ECONOMIC_CENTER_CONTEXT_RULES entry matching the map context, or -1"""
+    for index, (environment_keyword, area_keyword, _) in enumerate(ECONOMIC_CENTER_CONTEXT_RULES):
+        if environment_keyword in environment_context or area_keyword in area_type:
+            return index
+    return -1
+
+def base_center_umkm(business_name):
+    """(center type, UMKM before context) of a business; (None, 0) when it is not a mall or pasar"""
+    hits = KEYWORD_MATCHER.scan(business_name)
+    center_type = hits.first('economic_center')
+    # Estimate UMKM based on mall size indicators / pasar type
+    if center_type == 'mall':
+        return center_type, hits.first('mall_size') or 40  # Smaller commercial center
+    if center_type == 'pasar':
+        return center_type, hits.first('pasar_size') or 100  # Standard traditional market
+    return None, 0
+
+def adjust_center_umkm(center_type, estimated_umkm, context_rule):
+    """UMKM of one economic center after the context rule (see context_rule_index)"""
+    if context_rule < 0:
+        return estimated_umkm
+    operation, factor, bound = ECONOMIC_CENTER_CONTEXT_RULES[context_rule][2][center_type]
+    if operation == 'reduce':
+        return max(bound, estimated_umkm // factor)
+    return min(bound, estimated_umkm * factor)
+
+def estimate_center_umkm(center_types, base_umkm, context_rules):
+    """adjust_center_umkm over arrays of centers (of any number of maps); returns float UMKM"""
+    center_types = np.asarray(center_types, dtype=object)
+    context_rules = np.asarray(context_rules, dtype=np.int64)
+    umkm = np.asarray(base_umkm, dtype=float).copy()
+    for index, (_, _, adjustments) in enumerate(ECONOMIC_CENTER_CONTEXT_RULES):
+        for center_type, (operation, factor, bound) in adjustments.items():
+            rows = (context_rules == index) & (center_types == center_type)
+            if operation == 'reduce':
+                umkm[rows] = np.maximum(bound, np.floor_divide(umkm[rows], factor))
+            else:
+                umkm[rows] = np.minimum(bound, umkm[rows] * factor)
+    return umkm
+
+def parse_coordinate_pair(value):
+    """(lat, lon) floats of a 'lat, lon' string inside Indonesia's bounds, or None"""
+    try:
+        lat, lon = (float(part) for part in str(value).split(','))
+    except (TypeError, ValueError):
+        return None
+    if -11.0 <= lat <= 6.0 and 95.0 <= lon <= 141.0:
+        return lat, lon
+    return None
+
+def coordinates_in_hand(details, expected_admin=None):
+    """
+    Precise-coordinate fields (as get_precise_coordinates returns them) built from the coordinates
+    a business's details already carry, or {} when there are none or they lie outside expected_admin
+    """
+    pair = parse_coordinate_pair(details.get('coordinates'))
+    if pair is None:
+        return {}
+    admin = reverse_lookup_admin(*pair)
+    if expected_admin and admin and not admin_matches(admin, expected_admin):
+        return {}
+    precise_coords = build_coordinate_fields(*pair)
+    precise_coords.update({
+        'location_type': details.get('business_type_osm') or 'business',
+        'province': admin.get('province', ''),
+        'regency': admin.get('regency', ''),
+        'district': admin.get('district', ''),
+        'village': admin.get('village', ''),
+        'accuracy': 'high',
+        'validated': True
+    })
+    return precise_coords
+
+def cluster_businesses(business_details, radius_m=None, min_businesses=None):
+    """
+    Groups of businesses located close together (DBSCAN over a grid index), from the coordinates
+    their details already carry; no lookups
+    Returns: list of {'latitude', 'longitude' (centroid), 'size', 'members', 'center'}, largest
+    first; 'center' is filled in by detect_economic_centers
+    """
+    radius_m = app.config['ECONOMIC_CLUSTER_RADIUS_M'] if radius_m is None else radius_m
+    min_businesses = app.config['ECONOMIC_CLUSTER_MIN_BUSINESSES'] if min_businesses is None else min_businesses
+    names, pairs = [], []
+    for name, details in business_details.items():
+        pair = parse_coordinate_pair(details.get('coordinates'))
+        if pair is not None:
+            names.append(name)
+            pairs.append(pair)
+    if not pairs:
+        return []
+    origin_lat = sum(lat for lat, _ in pairs) / len(pairs)
+    labels = dbscan([local_meters(lat, lon, origin_lat) for lat, lon in pairs], radius_m, min_businesses)
+    
+    groups = {}
+    for name, pair, label in zip(names, pairs, labels):
+        if label >= 0:
+            groups.setdefault(label, []).append((name, pair))
+    clusters = []
+    for members in groups.values():
+        clusters.append({
+            'latitude': f"{sum(lat for _, (lat, _) in members) / len(members):.6f}",
+            'longitude': f"{sum(lon for _, (_, lon) in members) / len(members):.6f}",
+            'size': len(members),
+            'members': [name for name, _ in members],
+            'center': None
+        })
+    clusters.sort(key=lambda cluster: -cluster['size'])
+    return clusters
+
+def find_business_cluster(name, precise_coords, clusters, radius_m=None):
+    """Index of the cluster an economic center belongs to: by membership, else by a cluster centroid within radius"""
+    for index, cluster in enumerate(clusters):
+        if name in cluster['members']:
+            return index
+    pair = parse_coordinate_pair(precise_coords.get('coordinates'))
+    if pair is None:
+        return None
+    radius_m = app.config['ECONOMIC_CLUSTER_RADIUS_M'] if radius_m is None else radius_m
+    lat, lon = pair
+    x, y = local_meters(lat, lon, lat)
+    for index, cluster in enumerate(clusters):
+        member_x, member_y = local_meters(float(cluster['latitude']), float(cluster['longitude']), lat)
+        if math.hypot(member_x - x, member_y - y) <= radius_m:
+            return index
+    return None
+
+def candidate_economic_centers(clusters):
+    """
+    Clusters no keyword-named center (mall, pasar) claimed, as candidate economic centers for the
+    surveyor to confirm; call after detect_economic_centers has filled in the clusters' 'center'
+    """
+    candidates = []
+    for cluster in clusters:
+        if cluster['center'] is not None:
+            continue
+        candidates.append({
+            'name': f"Klaster UMKM {cluster['members'][0]}",
+            'type': 'klaster',
+            'estimated_umkm': cluster['size'],
+            'coordinates': f"{cluster['latitude']}, {cluster['longitude']}",
+            'latitude': cluster['latitude'],
+            'longitude': cluster['longitude'],
+            'cluster_members': list(cluster['members']),
+            'cluster_size': cluster['size'],
+            'context': f"Kandidat pusat ekonomi: {cluster['size']} usaha berdekatan tanpa mall/pasar"
+        })
+    return candidates
+
+def detect_economic_centers(businesses, business_details, environments=None, dominant_load=None, area_index=None, deadline=None, map_id='', start_background=True, expected_admin=None, enrich=True, clusters=None):
     """
     Detect economic centers (mall, pasar) that contain multiple UMKM
     Focused on high accuracy detection of malls and traditional markets
+    Each center gets the businesses of the cluster it sits in (see cluster_businesses); pass
+    clusters to reuse ones already computed for this map, their 'center' is filled in
     Returns: dict with economic center information
     """
     economic_centers = []
+    pending_centers = []
+    if clusters is None:
+        clusters = cluster_businesses(business_details)
     
-    # Get environment context
-    environment_context = ""
-    if environments:
-        env_names = [env.get('name', '').lower() for env in environments]
-        environment_context = ' '.join(env_names)
-    
-    # Determine area type based on dominant load
-    area_type = ""
-    if dominant_load:
-        area_type = get_dominant_load_description(dominant_load).lower()
-    
-    # High-accuracy keywords for mall and pasar detection
-    mall_keywords = [
-        'mall', 'plaza', 'shopping center', 'pusat perbelanjaan', 
-        'supermarket', 'hypermarket', 'department store', 'mal',
-        'shopping mall', 'retail center', 'commercial center'
-    ]
-    
-    pasar_keywords = [
-        'pasar', 'market', 'traditional market', 'pasar tradisional',
-        'pasar induk', 'pasar besar', 'pasar utama', 'pasar raya', 
-        'pasar modern', 'pasar swalayan'
-    ]
+    # Environment context and area type (from the dominant load) the UMKM rules look at
+    environment_context, area_type = economic_center_context(environments, dominant_load)
+    context_rule = context_rule_index(environment_context, area_type)
     
     for business_name, details in business_details.items():
-        business_name_lower = business_name.lower()
-        
         # Check if this business is an economic center (mall or pasar only)
-        center_type = None
-        estimated_umkm = 0
-        
-        # High-accuracy detection for mall
-        if any(keyword in business_name_lower for keyword in mall_keywords):
-            center_type = 'mall'
-            # Estimate UMKM based on mall size indicators
-            if any(word in business_name_lower for word in ['supermarket', 'hypermarket', 'department store']):
-                estimated_umkm = 80  # Large retail chains
-            elif any(word in business_name_lower for word in ['mall', 'plaza', 'shopping center']):
-                estimated_umkm = 60  # Standard mall
-            else:
-                estimated_umkm = 40  # Smaller commercial center
-        
-        # High-accuracy detection for pasar
-        elif any(keyword in business_name_lower for keyword in pasar_keywords):
-            center_type = 'pasar'
-            # Estimate UMKM based on pasar type
-            if any(word in business_name_lower for word in ['pasar induk', 'pasar besar', 'pasar utama']):
-                estimated_umkm = 150  # Large traditional market
-            elif any(word in business_name_lower for word in ['pasar modern', 'pasar swalayan']):
-                estimated_umkm = 80  # Modern market
-            else:
-                estimated_umkm = 100  # Standard traditional market
+        center_type, estimated_umkm = base_center_umkm(business_name)
         
         # Adjust UMKM count based on map context and environment
         if center_type:
-            # Context-based adjustments for higher accuracy
-            if 'perkambingan' in environment_context or 'ternak' in area_type:
-                # Livestock area - reduce estimates for non-agricultural centers
-                if center_type == 'mall':
-                    estimated_umkm = max(20, estimated_umkm // 2)
-                elif center_type == 'pasar':
-                    estimated_umkm = max(30, estimated_umkm // 2)
-            elif 'pertanian' in area_type or 'sawah' in environment_context:
-                # Agricultural area - moderate adjustment
-                if center_type == 'mall':
-                    estimated_umkm = max(25, estimated_umkm // 1.3)
-                elif center_type == 'pasar':
-                    estimated_umkm = max(50, estimated_umkm // 1.2)
-            elif 'industri' in area_type or 'pabrik' in environment_context:
-                # Industrial area - may have larger commercial centers
-                if center_type == 'mall':
-                    estimated_umkm = min(80, estimated_umkm * 1.1)
-                elif center_type == 'pasar':
-                    estimated_umkm = min(120, estimated_umkm * 1.1)
+            estimated_umkm = adjust_center_umkm(center_type, estimated_umkm, context_rule)
             
             # Create context-aware description with high accuracy focus
             context_description = ""
@@ -1768,8 +2590,24 @@ def detect_economic_centers(businesses, business_details, environments=None, dom
             else:
                 context_description = f"Pusat ekonomi ({center_type}) yang berisi multiple UMKM"
             
-            # Get precise coordinates for economic center
-            precise_coords = get_precise_coordinates(business_name, "Indonesia")
+            # Get precise coordinates for economic center, from the prefetched area POIs when available
+            coordinates_pending = False
+            coordinates_found = coordinates_in_hand(details, expected_admin) if enrich else {}
+            if not enrich:
+                precise_coords = {}
+            elif coordinates_found:
+                # The business lookup already located it, no second lookup
+                precise_coords = coordinates_found
+            elif area_index is not None:
+                poi = match_area_poi(business_name, area_index)
+                precise_coords = area_poi_to_business_info(poi, center_type) if poi else {}
+            elif budget_spent(deadline):
+                precise_coords = {}
+                coordinates_pending = True
+            else:
+                with geocoding_deadline(deadline):
+                    precise_coords = get_precise_coordinates(business_name, "Indonesia", expected_admin)
+                coordinates_pending = not precise_coords.get('validated') and budget_spent(deadline)
             
             economic_centers.append({
                 'name': business_name,
@@ -1799,23 +2637,80 @@ def detect_economic_centers(businesses, business_details, environments=None, dom
                 'environment': environment_context,
                 'area_type': area_type
             })
+            cluster_index = find_business_cluster(business_name, precise_coords, clusters)
+            cluster = clusters[cluster_index] if cluster_index is not None else None
+            economic_centers[-1]['cluster_members'] = [
+                member for member in cluster['members'] if member != business_name] if cluster else []
+            economic_centers[-1]['cluster_size'] = len(economic_centers[-1]['cluster_members'])
+            if cluster and cluster['center'] is None:
+                cluster['center'] = business_name
+            if coordinates_pending:
+                economic_centers[-1]['status'] = 'pending'
+                pending_centers.append((business_name, details.get('type', center_type)))
+    
+    if pending_centers:
+        schedule_background_enrichment(map_id, pending_centers, "Indonesia", start=start_background)
     
     return economic_centers
 
-def search_business_info_improved(business_name, location="Indonesia"):
+def get_default_operational_hours(business_type):
+    """Default operational hours for a business type when the map source has none"""
+    if business_type in ['restaurant', 'cafe', 'fast_food']:
+        return '08:00-22:00'
+    elif business_type in ['bank', 'atm']:
+        return '08:00-16:00'
+    elif business_type in ['shop', 'supermarket', 'mall']:
+        return '09:00-21:00'
+    elif business_type in ['hotel', 'guest_house']:
+        return '24 Jam'
+    elif business_type in ['hospital', 'klinik']:
+        return '24 Jam'
+    elif business_type in ['school', 'sekolah']:
+        return '07:00-15:00'
+    elif business_type in ['office', 'kantor']:
+        return '08:00-17:00'
+    elif business_type in ['gas_station', 'spbu']:
+        return '06:00-22:00'
+    elif business_type in ['car_wash', 'cuci']:
+        return '08:00-18:00'
+    elif business_type in ['salon', 'spa']:
+        return '09:00-20:00'
+    elif business_type in ['motorcycle', 'motor']:
+        return '08:00-17:00'
+    elif business_type in ['dental', 'gigi']:
+        return '09:00-17:00'
+    elif business_type in ['music', 'gitar']:
+        return '09:00-18:00'
+    elif business_type in ['battery', 'aki']:
+        return '08:00-17:00'
+    elif business_type in ['pharmacy', 'apotek']:
+        return '08:00-21:00'
+    elif business_type in ['mosque', 'masjid']:
+        return '24 Jam'
+    elif business_type in ['church', 'gereja']:
+        return '24 Jam'
+    elif business_type in ['temple', 'pura']:
+        return '24 Jam'
+    elif business_type in ['park', 'taman']:
+        return '06:00-22:00'
+    else:
+        return '08:00-17:00'
+
+@memoized_lookup
+def search_business_info_improved(business_name, location="Indonesia", expected_admin=None):
     """
     Improved business information search with better accuracy
     Returns: dict with business details
     """
     try:
         # Clean business name for search
-        clean_name = re.sub(r'[^\w\s]', '', business_name).strip()
+        clean_name = BUSINESS_NAME_CLEANUP.sub('', business_name).strip()
         if len(clean_name) < 3:
             return {}
         
         # Enhanced search query with location context
         search_query = f"{clean_name}, {location}"
-        url = "https://nominatim.openstreetmap.org/search"
+        url = f"{app.config['NOMINATIM_URL']}/search"
         params = {
             'q': search_query,
             'format': 'json',
@@ -1828,7 +2723,7 @@ def search_business_info_improved(business_name, location="Indonesia"):
         }
         
         logger.info(f"Searching for business: {search_query}")
-        response = requests.get(url, params=params, headers=headers, timeout=15)
+        response = geocoder.get(url, params=params, headers=headers, timeout=15)
         
         if response.status_code == 200:
             data = response.json()
@@ -1975,55 +2870,16 @@ def search_business_info_improved(business_name, location="Indonesia"):
                     opening_hours = extratags['opening_hours']
                 else:
                     # Try to find hours in display_name
-                    hours_match = re.search(r'(\d{1,2}:\d{2}\s*[-–]\s*\d{1,2}:\d{2})', address)
+                    hours_match = OPENING_HOURS.search(address)
                     if hours_match:
                         opening_hours = hours_match.group(1)
                 
                 # Set default operational hours based on business type
                 if not opening_hours:
-                    if business_type in ['restaurant', 'cafe', 'fast_food']:
-                        opening_hours = '08:00-22:00'
-                    elif business_type in ['bank', 'atm']:
-                        opening_hours = '08:00-16:00'
-                    elif business_type in ['shop', 'supermarket', 'mall']:
-                        opening_hours = '09:00-21:00'
-                    elif business_type in ['hotel', 'guest_house']:
-                        opening_hours = '24 Jam'
-                    elif business_type in ['hospital', 'klinik']:
-                        opening_hours = '24 Jam'
-                    elif business_type in ['school', 'sekolah']:
-                        opening_hours = '07:00-15:00'
-                    elif business_type in ['office', 'kantor']:
-                        opening_hours = '08:00-17:00'
-                    elif business_type in ['gas_station', 'spbu']:
-                        opening_hours = '06:00-22:00'
-                    elif business_type in ['car_wash', 'cuci']:
-                        opening_hours = '08:00-18:00'
-                    elif business_type in ['salon', 'spa']:
-                        opening_hours = '09:00-20:00'
-                    elif business_type in ['motorcycle', 'motor']:
-                        opening_hours = '08:00-17:00'
-                    elif business_type in ['dental', 'gigi']:
-                        opening_hours = '09:00-17:00'
-                    elif business_type in ['music', 'gitar']:
-                        opening_hours = '09:00-18:00'
-                    elif business_type in ['battery', 'aki']:
-                        opening_hours = '08:00-17:00'
-                    elif business_type in ['pharmacy', 'apotek']:
-                        opening_hours = '08:00-21:00'
-                    elif business_type in ['mosque', 'masjid']:
-                        opening_hours = '24 Jam'
-                    elif business_type in ['church', 'gereja']:
-                        opening_hours = '24 Jam'
-                    elif business_type in ['temple', 'pura']:
-                        opening_hours = '24 Jam'
-                    elif business_type in ['park', 'taman']:
-                        opening_hours = '06:00-22:00'
-                    else:
-                        opening_hours = '08:00-17:00'
+                    opening_hours = get_default_operational_hours(business_type)
                 
                 # Get precise coordinates
-                precise_coords = get_precise_coordinates(business_name, location)
+                precise_coords = get_precise_coordinates(business_name, location, expected_admin)
                 
                 return {
                     'address': address,
@@ -2055,242 +2911,906 @@ def search_business_info_improved(business_name, location="Indonesia"):
         logger.error(f"Error searching business info: {e}")
         return {}
 
-def parse_wss_data_improved(text):
-    """Improved WSS map data parsing with better accuracy"""
-    logger.info(f"Parsing WSS data from text:\n{text}")
-    data = {
-        'map_id': '', 'province': '', 'regency': '', 'district': '', 'village': '', 'scale': '',
-        'businesses': [], 'business_details': {},
-        'streets': [], 'environments': [], 'coordinates': [], 'landmarks': [],
-        'business_types': {}, 'total_businesses': 0, 'total_streets': 0,
-        'total_environments': 0, 'total_landmarks': 0,
+# Area prefetch: one bounding-box POI pull per map instead of one search per business
+area_poi_cache = {}
+poi_extract_cache = {}
+
+def get_village_bbox(wss_data):
+    """
+    Look up the bounding box of the map's village from Nominatim
+    Falls back to a small box around coordinates printed on the map
+    Returns: (south, west, north, east) or None
+    """
+    query_parts = [wss_data.get(field, '') for field in ['village', 'district', 'regency', 'province']]
+    query = ', '.join(part for part in query_parts if part)
+    if query:
+        try:
+            params = {
+                'q': f"{query}, Indonesia",
+                'format': 'json',
+                'limit': 1
+            }
+            headers = {
+                'User-Agent': 'WSS-Map-Extractor/1.0'
+            }
+            logger.info(f"Looking up village bounding box: {query}")
+            response = geocoder.get(f"{app.config['NOMINATIM_URL']}/search", params=params, headers=headers, timeout=15)
+            if response.status_code == 200:
+                data = response.json()
+                if data and data[0].get('boundingbox'):
+                    # Nominatim returns [south, north, west, east]
+                    south, north, west, east = (float(value) for value in data[0]['boundingbox'])
+                    return (south, west, north, east)
+        except Exception as e:
+            logger.error(f"Error looking up village bounding box: {e}")
+    
+    coordinates = wss_data.get('coordinates', [])
+    if coordinates:
+        lats = [coord['latitude'] for coord in coordinates]
+        lons = [coord['longitude'] for coord in coordinates]
+        margin = 0.01  # ~1 km around the printed coordinates
+        return (min(lats) - margin, min(lons) - margin, max(lats) + margin, max(lons) + margin)
+    
+    return None
+
+def load_poi_extract(path):
+    """Load an Overpass-style JSON extract from disk, cached by modification time"""
+    mtime = os.path.getmtime(path)
+    cached = poi_extract_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        elements = json.load(f).get('elements', [])
+    poi_extract_cache[path] = (mtime, elements)
+    logger.info(f"Loaded {len(elements)} POIs from extract {path}")
+    return elements
+
+def get_element_position(element):
+    """Return (lat, lon) of an Overpass node, or of the center of a way/relation"""
+    if 'lat' in element and 'lon' in element:
+        return float(element['lat']), float(element['lon'])
+    center = element.get('center')
+    if center:
+        return float(center['lat']), float(center['lon'])
+    return None
+
+def fetch_area_pois(bbox):
+    """
+    Fetch every named POI inside a bounding box, from the local extract when configured, else from Overpass
+    Returns: list of Overpass elements
+    """
+    extract_path = app.config['POI_EXTRACT_PATH']
+    if extract_path and os.path.exists(extract_path):
+        elements = load_poi_extract(extract_path)
+        if bbox is None:
+            return elements
+        south, west, north, east = bbox
+        area_elements = []
+        for element in elements:
+            position = get_element_position(element)
+            if position and south <= position[0] <= north and west <= position[1] <= east:
+                area_elements.append(element)
+        return area_elements
+    
+    if bbox is None:
+        return []
+    
+    south, west, north, east = bbox
+    bbox_filter = f"({south},{west},{north},{east})"
+    query = f"""[out:json][timeout:25];
+(
+  node["name"]{bbox_filter};
+  way["name"]{bbox_filter};
+);
+out center tags;"""
+    headers = {
+        'User-Agent': 'WSS-Map-Extractor/1.0'
+    }
+    logger.info(f"Fetching area POIs from Overpass for bbox {bbox}")
+    response = geocoder.post(app.config['OVERPASS_URL'], data={'data': query}, headers=headers, timeout=30)
+    if response.status_code == 200:
+        return response.json().get('elements', [])
+    logger.warning(f"Overpass returned status {response.status_code}")
+    return []
+
+def normalize_poi_tokens(name):
+    """Lowercase word tokens of a business or POI name used for matching"""
+    return set(BUSINESS_NAME_CLEANUP.sub(' ', name.lower()).split())
+
+def build_area_poi_index(elements):
+    """
+    Build an in-memory index of named POIs with a token -> POI lookup table
+    Returns: dict with 'pois' list and 'tokens' dict
+    """
+    area_index = {'pois': [], 'tokens': {}}
+    for element in elements:
+        tags = element.get('tags', {})
+        name = tags.get('name', '').strip()
+        position = get_element_position(element)
+        if not name or not position:
+            continue
+        
+        tokens = normalize_poi_tokens(name)
+        poi_id = len(area_index['pois'])
+        area_index['pois'].append({
+            'name': name,
+            'lat': position[0],
+            'lon': position[1],
+            'tags': tags,
+            'tokens': tokens
+        })
+        for token in tokens:
+            area_index['tokens'].setdefault(token, []).append(poi_id)
+    return area_index
+
+def match_area_poi(business_name, area_index, min_score=0.5):
+    """
+    Match an OCR'd business name against the prefetched area POIs by token overlap
+    Returns: best matching POI dict or None
+    """
+    tokens = normalize_poi_tokens(business_name)
+    if not tokens:
+        return None
+    
+    candidate_ids = set()
+    for token in tokens:
+        candidate_ids.update(area_index['tokens'].get(token, []))
+    
+    best_poi = None
+    best_score = 0
+    for poi_id in candidate_ids:
+        poi = area_index['pois'][poi_id]
+        score = len(tokens & poi['tokens']) / len(tokens | poi['tokens'])
+        if score > best_score:
+            best_score = score
+            best_poi = poi
+    
+    if best_score >= min_score:
+        return best_poi
+    return None
+
+def area_poi_to_business_info(poi, business_type, wss_data=None):
+    """Convert a matched area POI into the business info dict returned by search_business_info_improved"""
+    tags = poi['tags']
+    wss_data = wss_data or {}
+    
+    address_parts = [tags.get('addr:street', ''), tags.get('addr:housenumber', ''), tags.get('addr:city', '')]
+    address = ', '.join(part for part in [poi['name']] + address_parts if part)
+    
+    location_type = tags.get('amenity') or tags.get('shop') or tags.get('tourism') or 'business'
+    
+    business_info = build_coordinate_fields(poi['lat'], poi['lon'])
+    business_info.update({
+        'address': address,
+        'location_type': location_type,
+        'province': wss_data.get('province', ''),
+        'regency': wss_data.get('regency', ''),
+        'district': wss_data.get('district', ''),
+        'village': wss_data.get('village', ''),
+        'accuracy': 'high',
+        'validated': True,
+        'phone': tags.get('phone', tags.get('contact:phone', '')),
+        'website': tags.get('website', tags.get('contact:website', '')),
+        'operational_hours': tags.get('opening_hours') or get_default_operational_hours(business_type),
+        'contact_person': 'Hubungi langsung',
+        'email': tags.get('email', tags.get('contact:email', '')),
+        'business_type': business_type
+    })
+    return business_info
+
+def prefetch_area_pois(wss_data):
+    """
+    Pull all named POIs of the map's village once and index them, cached per map ID
+    Returns: area index dict, or None when the area could not be fetched
+    """
+    map_id = wss_data.get('map_id', '')
+    if map_id and map_id in area_poi_cache:
+        return area_poi_cache[map_id]
+    
+    try:
+        bbox = get_village_bbox(wss_data)
+        elements = fetch_area_pois(bbox)
+    except Exception as e:
+        logger.error(f"Error prefetching area POIs: {e}")
+        return None
+    
+    area_index = build_area_poi_index(elements)
+    if not area_index['pois']:
+        logger.warning(f"No named POIs found for map {map_id}, falling back to per-business search")
+        return None
+    logger.info(f"Prefetched {len(area_index['pois'])} named POIs for map {map_id}")
+    if map_id:
+        area_poi_cache[map_id] = area_index
+    return area_index
+
+def lookup_business_info(business_name, business_type, location, area_index=None, wss_data=None):
+    """Resolve business info from the prefetched area index when available, else from Nominatim"""
+    if area_index is not None:
+        poi = match_area_poi(business_name, area_index)
+        if poi:
+            return area_poi_to_business_info(poi, business_type, wss_data)
+        return {}
+    return search_business_info_improved(business_name, location, get_expected_admin(wss_data))
+
+def build_business_detail(business_type, business_info, include_osm_type=True):
+    """Business detail entry shown in the preview, built from a business info lookup result"""
+    business_detail = {
+        'type': business_type,
+        'contact_person': business_info.get('contact_person', 'Hubungi langsung'),
+        'operational_hours': business_info.get('operational_hours', '08:00-17:00'),
+        'coordinates': business_info.get('coordinates', ''),
+        'address': business_info.get('address', ''),
+        'phone': business_info.get('phone', ''),
+        'email': business_info.get('email', '')
+    }
+    if include_osm_type:
+        business_detail['business_type_osm'] = business_info.get('business_type', 'general')
+    return business_detail
+
+def enrich_business_details(data, area_index=None, deadline=None, start_background=True, enrich=True):
+    """
+    Fill data['business_details'] for every parsed business
+    Businesses not resolved before the deadline are marked 'pending' and resolved in the background
+    (or recorded for on-demand resolution when start_background is False); enrich=False only
+    fills the defaults of each business type
+    """
+    location = data.get('regency') or 'Indonesia'
+    pending = []
+    with geocoding_deadline(deadline):
+        for business_name in data['businesses']:
+            business_type = data['business_types'].get(business_name, 'general')
+            business_detail = enrich_business(business_name, business_type, location, area_index, data, deadline, enrich)
+            if business_detail.get('status') == 'pending':
+                pending.append((business_name, business_type))
+            data['business_details'][business_name] = business_detail
+    schedule_pending_businesses(data, pending, area_index, start_background)
+
+def enrich_business(business_name, business_type, location, area_index=None, wss_data=None, deadline=None, enrich=True):
+    """Detail entry of one business; marked 'pending' when the budget ran out before its lookup"""
+    business_info = {}
+    if enrich and not budget_spent(deadline):
+        logger.info(f"Searching for business info: {business_name}")
+        business_info = lookup_business_info(business_name, business_type, location, area_index, wss_data)
+    
+    # Add detailed business information
+    business_detail = build_business_detail(business_type, business_info, include_osm_type=business_type != 'general')
+    if enrich and not business_info and budget_spent(deadline):
+        business_detail['status'] = 'pending'
+    return business_detail
+
+def schedule_pending_businesses(data, pending, area_index=None, start_background=True):
+    """Hand the businesses the request budget left pending to background enrichment"""
+    if pending:
+        logger.info(f"Request budget spent, {len(pending)} businesses left pending")
+        schedule_background_enrichment(data.get('map_id', ''), pending, data.get('regency') or 'Indonesia',
+                                       area_index, data, start=start_background)
+
+# Background enrichment of businesses left pending by the request budget, keyed by map ID
+enrichment_executor = ThreadPoolExecutor(max_workers=app.config['ENRICHMENT_WORKERS'])
+enrichment_results = OrderedDict()
+enrichment_lock = threading.Lock()
+enrichment_done = threading.Condition(enrichment_lock)
+MAX_ENRICHMENT_RESULTS = 200
+
+def get_enrichment_entry(map_id):
+    """Return (creating if needed) the background enrichment entry of a map; call with enrichment_lock held"""
+    entry = enrichment_results.get(map_id)
+    if entry is None:
+        entry = {'resolved': {}, 'pending': set(), 'deferred': [], 'preview': None}
+        enrichment_results[map_id] = entry
+        while len(enrichment_results) > MAX_ENRICHMENT_RESULTS:
+            enrichment_results.popitem(last=False)
+    return entry
+
+def resolve_pending_businesses(map_id, businesses, location, area_index=None, wss_data=None, cache_only=False):
+    """
+    Background job: resolve pending businesses one by one and store their info
+    cache_only keeps the lookups of the scheduling request's tier (see geocoding_cache_only)
+    """
+    with geocoding_cache_only(cache_only):
+        if area_index is None and wss_data and app.config['ENRICHMENT_MODE'] == 'area':
+            area_index = prefetch_area_pois(wss_data)
+        
+        for business_name, business_type in businesses:
+            try:
+                business_info = lookup_business_info(business_name, business_type, location, area_index, wss_data)
+            except Exception as e:
+                logger.error(f"Background enrichment failed for {business_name}: {e}")
+                business_info = {}
+            with enrichment_lock:
+                entry = get_enrichment_entry(map_id)
+                entry['resolved'][business_name] = business_info
+                entry['pending'].discard(business_name)
+                enrichment_done.notify_all()
+    logger.info(f"Background enrichment finished for map {map_id}")
+
+def schedule_background_enrichment(map_id, businesses, location, area_index=None, wss_data=None, start=True, cache_only=None):
+    """
+    Queue pending businesses of a map for background resolution, skipping ones already queued or resolved
+    With start=False the job is only recorded and runs once start_deferred_enrichment() is called
+    The job keeps the cache-only policy of the calling thread (or cache_only when given)
+    """
+    if not map_id:
+        return
+    if cache_only is None:
+        cache_only = getattr(cache_only_lookups, 'value', False)
+    with enrichment_lock:
+        entry = get_enrichment_entry(map_id)
+        queued = [(name, business_type) for name, business_type in businesses
+                  if name not in entry['pending'] and name not in entry['resolved']]
+        entry['pending'].update(name for name, _ in queued)
+        if queued and not start:
+            entry['deferred'].append((queued, location, area_index, wss_data, cache_only))
+            return
+    if queued:
+        enrichment_executor.submit(resolve_pending_businesses, map_id, queued, location, area_index, wss_data, cache_only)
+
+def start_deferred_enrichment(map_id):
+    """Submit the on-demand enrichment jobs recorded for a map"""
+    with enrichment_lock:
+        entry = enrichment_results.get(map_id)
+        if not entry or not entry['deferred']:
+            return
+        jobs, entry['deferred'] = entry['deferred'], []
+    for businesses, location, area_index, wss_data, cache_only in jobs:
+        enrichment_executor.submit(resolve_pending_businesses, map_id, businesses, location, area_index, wss_data, cache_only)
+
+def wait_for_enrichment(map_id, timeout):
+    """Block up to timeout seconds until no business of the map is pending; returns True when complete"""
+    with enrichment_lock:
+        entry = enrichment_results.get(map_id)
+        if not entry:
+            return True
+        return enrichment_done.wait_for(lambda: not entry['pending'], timeout=timeout)
+
+def register_map_preview(map_id, preview_data):
+    """Keep the preview's business details and economic centers so they can be served once enriched"""
+    if not map_id:
+        return
+    with enrichment_lock:
+        entry = get_enrichment_entry(map_id)
+        entry['preview'] = json.loads(json.dumps({
+            'map_id': map_id,
+            'business_details': preview_data.get('business_details', {}),
+            'economic_centers': preview_data.get('economic_centers', [])
+        }))
+
+def get_enriched_map_details(map_id):
+    """Enriched business_details and economic_centers of a previewed map, or None for unknown maps"""
+    with enrichment_lock:
+        entry = enrichment_results.get(map_id)
+        if not entry or entry['preview'] is None:
+            return None
+        map_details = json.loads(json.dumps(entry['preview']))
+    
+    merge_background_enrichment(map_details)
+    map_details['pending_businesses'] = get_pending_businesses(map_details)
+    map_details['status'] = 'pending' if map_details['pending_businesses'] else 'ready'
+    return map_details
+
+def merge_background_enrichment(wss_data):
+    """Replace 'pending' business details and economic-center coordinates with background results"""
+    with enrichment_lock:
+        entry = enrichment_results.get(wss_data.get('map_id', ''))
+        resolved = dict(entry['resolved']) if entry else {}
+    if not resolved:
+        return wss_data
+    
+    for business_name, business_detail in wss_data.get('business_details', {}).items():
+        if business_detail.get('status') == 'pending' and business_name in resolved:
+            business_type = business_detail.get('type', 'general')
+            business_detail.update(build_business_detail(business_type, resolved[business_name],
+                                                         include_osm_type='business_type_osm' in business_detail))
+            business_detail.pop('status')
+    
+    for center in wss_data.get('economic_centers', []):
+        if center.get('status') == 'pending' and center.get('name') in resolved:
+            business_info = resolved[center['name']]
+            for key in ['coordinates', 'coordinates_decimal', 'coordinates_dms', 'latitude', 'longitude',
+                        'google_maps_link', 'osm_link', 'location_type', 'province', 'regency',
+                        'district', 'village', 'accuracy', 'validated']:
+                if key in business_info:
+                    center[key] = business_info[key]
+            center.pop('status')
+    return wss_data
+
+def get_pending_businesses(preview_data):
+    """Names of businesses whose details are still being resolved"""
+    return [name for name, detail in preview_data.get('business_details', {}).items()
+            if detail.get('status') == 'pending']
+
+# Store of processed maps, one JSON file per map ID in PROCESSED_MAPS_FOLDER
+PROCESSED_MAP_FIELDS = ['map_id', 'province', 'regency', 'district', 'village', 'businesses', 'business_types',
+                        'streets', 'environments', 'environment_business_counts']
+
+def processed_map_path(map_id):
+    return os.path.join(app.config['PROCESSED_MAPS_FOLDER'], f"{secure_filename(map_id)}.json")
+
+def save_processed_map(wss_data, text):
+    """Keep the map's admin fields, businesses and OCR text for later batch jobs"""
+    map_id = wss_data.get('map_id', '')
+    if not map_id:
+        return
+    record = {field: wss_data.get(field) for field in PROCESSED_MAP_FIELDS}
+    record['text'] = text
+    # Figures of the current estimation rules, compared by reestimate_processed_maps after a rule change
+    record['estimates'] = {
+        'segments': generate_segments_from_data(wss_data),
+        'economic_centers': [
+            {field: center.get(field) for field in ECONOMIC_CENTER_ESTIMATE_FIELDS}
+            for center in wss_data.get('economic_centers', [])
+        ]
+    }
+    record['processed_at'] = datetime.now().isoformat(timespec='seconds')
+    try:
+        os.makedirs(app.config['PROCESSED_MAPS_FOLDER'], exist_ok=True)
+        with open(processed_map_path(map_id), 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False, indent=1)
+    except OSError as e:
+        logger.error(f"Could not store processed map {map_id}: {e}")
+
+def load_processed_map(map_id):
+    path = processed_map_path(map_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def iter_processed_maps():
+    """Yield every stored processed map record"""
+    folder = app.config['PROCESSED_MAPS_FOLDER']
+    if not os.path.isdir(folder):
+        return
+    for filename in sorted(os.listdir(folder)):
+        if filename.endswith('.json'):
+            with open(os.path.join(folder, filename), 'r', encoding='utf-8') as f:
+                yield json.load(f)
+
+ECONOMIC_CENTER_ESTIMATE_FIELDS = ['name', 'type', 'estimated_umkm']
+# BLOK III figures compared by the re-estimation diff report
+SEGMENT_ESTIMATE_FIELDS = ['muatan_dominan', 'muatan_kk', 'btt', 'btt_kosong', 'bku', 'bbtt_non_usaha',
+                           'muatan_usaha', 'total_muatan', 'area_type']
+
+def estimation_inputs(record):
+    """
+    WSS data the segment and economic center estimates read, from a stored map record
+    Records stored before the estimation inputs were kept are re-scanned from their OCR text
+    """
+    if 'environments' in record:
+        data = {field: record.get(field) for field in PROCESSED_MAP_FIELDS}
+    else:
+        data = scan_wss_text(record.get('text') or '')['data']
+        data.update({field: record[field] for field in PROCESSED_MAP_FIELDS if record.get(field) is not None})
+    for field in ['businesses', 'streets', 'environments']:
+        data[field] = data.get(field) or []
+    # Enrichment gives every business a details entry; the estimates only count them
+    data['business_details'] = {name: {} for name in data['businesses']}
+    return data
+
+def reestimate_economic_centers(maps):
+    """Economic center figures of many maps (WSS data dicts), estimated in one batch; one list per map"""
+    owners, names, center_types, base_umkm, context_rules = [], [], [], [], []
+    for position, wss_data in enumerate(maps):
+        environments = wss_data.get('environments') or []
+        # As parse_wss_data_improved: the dominant load of the first environment
+        dominant_load = determine_dominant_load(environments[0]['name']) if environments else None
+        context_rule = context_rule_index(*economic_center_context(environments, dominant_load))
+        for business_name in wss_data.get('business_details', {}):
+            center_type, umkm = base_center_umkm(business_name)
+            if center_type:
+                owners.append(position)
+                names.append(business_name)
+                center_types.append(center_type)
+                base_umkm.append(umkm)
+                context_rules.append(context_rule)
+    centers = [[] for _ in maps]
+    umkm = estimate_center_umkm(center_types, base_umkm, context_rules).tolist() if owners else []
+    # Whole numbers as int, like the figures detect_economic_centers stores
+    umkm = [int(value) if value.is_integer() else value for value in umkm]
+    for position, name, center_type, estimated_umkm in zip(owners, names, center_types, umkm):
+        centers[position].append({'name': name, 'type': center_type, 'estimated_umkm': estimated_umkm})
+    return centers
+
+def estimate_diff_rows(map_id, kind, key_field, old_rows, new_rows, fields):
+    """Diff report rows of one map's segments or economic centers, matched by key_field"""
+    old_by_key = {row.get(key_field): row for row in old_rows or []}
+    new_by_key = {row.get(key_field): row for row in new_rows}
+    diff = []
+    for key in list(new_by_key) + [key for key in old_by_key if key not in new_by_key]:
+        old_row, new_row = old_by_key.get(key, {}), new_by_key.get(key, {})
+        for field in fields:
+            old_value, new_value = old_row.get(field), new_row.get(field)
+            if isinstance(old_value, (int, float)) and isinstance(new_value, (int, float)):
+                if abs(old_value - new_value) < 1e-9:
+                    continue
+                change = new_value - old_value
+            elif old_value == new_value:
+                continue
+            else:
+                change = None
+            diff.append({'map_id': map_id, 'kind': kind, 'name': key, 'field': field,
+                         'old': old_value, 'new': new_value, 'change': change})
+    return diff
+
+def reestimate_processed_maps(map_ids=None, write=True):
+    """
+    Re-run segment and economic center estimation over stored maps (all of them, or the given
+    map IDs) with the current rules, as one batch, without OCR or geocoding
+    write: store the new figures in each map record
+    Returns: (records with the new 'estimates', diff report DataFrame with one row per changed
+    figure: map_id, kind, name, field, old, new, change)
+    """
+    if map_ids is None:
+        records = list(iter_processed_maps())
+    else:
+        records = [record for record in map(load_processed_map, map_ids) if record is not None]
+    inputs = [estimation_inputs(record) for record in records]
+    all_segments = generate_segments_for_maps(inputs)
+    all_centers = reestimate_economic_centers(inputs)
+    
+    diff = []
+    for record, segments, centers in zip(records, all_segments, all_centers):
+        previous = record.get('estimates')
+        map_id = record.get('map_id', '')
+        map_diff = estimate_diff_rows(map_id, 'segment', 'no_segmen', (previous or {}).get('segments'), segments,
+                                      SEGMENT_ESTIMATE_FIELDS)
+        map_diff += estimate_diff_rows(map_id, 'economic_center', 'name', (previous or {}).get('economic_centers'),
+                                       centers, ECONOMIC_CENTER_ESTIMATE_FIELDS[1:])
+        diff += map_diff
+        record['estimates'] = {'segments': segments, 'economic_centers': centers}
+        # Only maps whose figures changed are rewritten
+        if write and map_id and (map_diff or previous is None):
+            record['estimated_at'] = datetime.now().isoformat(timespec='seconds')
+            try:
+                with open(processed_map_path(map_id), 'w', encoding='utf-8') as f:
+                    json.dump(record, f, ensure_ascii=False, indent=1)
+            except OSError as e:
+                logger.error(f"Could not store re-estimated map {map_id}: {e}")
+    report = pd.DataFrame(diff, columns=['map_id', 'kind', 'name', 'field', 'old', 'new', 'change'])
+    return records, report
+
+def scan_wss_text(text, on_business=None):
+    """
+    Single pass over the OCR text: every line is tokenized once and feeds the map data
+    (admin fields, businesses, streets, environments, coordinates, landmarks), the building
+    categories and the environment context together
+    on_business: called with (business_name, business_type, data so far) for each new business
+    Returns: dict with 'data' (map data before enrichment), 'lines' (line tokens for
+    extract_contextual_data) and 'environments_mentioned'
+    """
+    logger.info(f"Parsing WSS data from text:\n{text}")
+    data = {
+        'map_id': '', 'province': '', 'regency': '', 'district': '', 'village': '', 'scale': '',
+        'businesses': [], 'business_details': {},
+        'streets': [], 'environments': [], 'coordinates': [], 'landmarks': [],
+        'business_types': {}, 'total_businesses': 0, 'total_streets': 0,
+        'total_environments': 0, 'total_landmarks': 0,
         'economic_centers': []  # New field for economic centers
     }
     lines = text.split('\n')
     logger.info(f"Processing {len(lines)} lines of text")
     
-    for i, line in enumerate(lines):
-        line = line.strip()
+    tokens = []
+    building_data = new_building_data()
+    environments_mentioned = set()
+    # Hashed, insertion-ordered collections keep deduplication O(1) per line
+    businesses = EntityIndex()
+    streets = EntityIndex()
+    environments = EnvironmentIndex()
+    coordinates = EntityIndex()
+    landmarks = EntityIndex()
+    # Businesses per LINGKUNGAN section: each business counts for the nearest LINGKUNGAN line
+    # above it (None until the first one)
+    current_environment = None
+    environment_business_counts = {}
+    
+    for i, raw_line in enumerate(lines):
+        line = clip_ocr_line(raw_line)
         if not line: continue
         logger.info(f"Processing line {i+1}: '{line}'")
+        token = tokenize_wss_line(line)
+        tokens.append(token)
+        hits = token['hits']
         
         # Extract Map ID (16 digit number) - improved regex
-        map_id_match = re.search(r'(\d{16})', line)
-        if map_id_match:
-            data['map_id'] = map_id_match.group(1)
+        if token['map_id']:
+            data['map_id'] = token['map_id']
             logger.info(f"Found Map ID: {data['map_id']}")
         
-        # Extract administrative data with improved matching
-        if 'PROVINSI' in line.upper() or 'PROVINCE' in line.upper():
-            province_match = re.search(r'PROVINSI\s*:\s*\[?\d+\]?\s*([A-Z\s]+)', line, re.IGNORECASE)
-            if province_match:
-                data['province'] = province_match.group(1).strip()
+        # Administrative fields come from one combined scan of the line
+        upper = token['upper']
+        admin = token['admin']
+        
+        if 'PROVINSI' in upper or 'PROVINCE' in upper:
+            if 'province' in admin:
+                data['province'] = admin['province'].strip()
                 logger.info(f"Found Province: {data['province']}")
             else:
                 # Enhanced province detection
-                if 'BALI' in line.upper(): data['province'] = 'BALI'
-                elif 'JAWA' in line.upper():
-                    if 'TIMUR' in line.upper(): data['province'] = 'JAWA TIMUR'
-                    elif 'TENGAH' in line.upper(): data['province'] = 'JAWA TENGAH'
-                    elif 'BARAT' in line.upper(): data['province'] = 'JAWA BARAT'
+                if 'BALI' in upper: data['province'] = 'BALI'
+                elif 'JAWA' in upper:
+                    if 'TIMUR' in upper: data['province'] = 'JAWA TIMUR'
+                    elif 'TENGAH' in upper: data['province'] = 'JAWA TENGAH'
+                    elif 'BARAT' in upper: data['province'] = 'JAWA BARAT'
                     else: data['province'] = 'JAWA'
-                elif 'SUMATERA' in line.upper() or 'SUMATRA' in line.upper(): data['province'] = 'SUMATERA'
-                elif 'KALIMANTAN' in line.upper(): data['province'] = 'KALIMANTAN'
-                elif 'SULAWESI' in line.upper(): data['province'] = 'SULAWESI'
-                elif 'PAPUA' in line.upper(): data['province'] = 'PAPUA'
-                elif 'MALUKU' in line.upper(): data['province'] = 'MALUKU'
-                elif 'NUSA TENGGARA' in line.upper(): data['province'] = 'NUSA TENGGARA'
+                elif 'SUMATERA' in upper or 'SUMATRA' in upper: data['province'] = 'SUMATERA'
+                elif 'KALIMANTAN' in upper: data['province'] = 'KALIMANTAN'
+                elif 'SULAWESI' in upper: data['province'] = 'SULAWESI'
+                elif 'PAPUA' in upper: data['province'] = 'PAPUA'
+                elif 'MALUKU' in upper: data['province'] = 'MALUKU'
+                elif 'NUSA TENGGARA' in upper: data['province'] = 'NUSA TENGGARA'
         
-        if 'KABUPATEN' in line.upper() or 'KOTA' in line.upper() or 'REGENCY' in line.upper():
-            regency_match = re.search(r'(?:KABUPATEN|KOTA)\s*:\s*\[?\d+\]?\s*([A-Z\s]+)', line, re.IGNORECASE)
-            if regency_match:
-                data['regency'] = regency_match.group(1).strip()
+        if 'KABUPATEN' in upper or 'KOTA' in upper or 'REGENCY' in upper:
+            if 'regency' in admin:
+                data['regency'] = admin['regency'].strip()
                 logger.info(f"Found Regency: {data['regency']}")
             else:
                 # Enhanced regency detection for Bali
-                if 'DENPASAR' in line.upper(): data['regency'] = 'DENPASAR'
-                elif 'BADUNG' in line.upper(): data['regency'] = 'BADUNG'
-                elif 'GIANYAR' in line.upper(): data['regency'] = 'GIANYAR'
-                elif 'KLUNGKUNG' in line.upper(): data['regency'] = 'KLUNGKUNG'
-                elif 'BANGLI' in line.upper(): data['regency'] = 'BANGLI'
-                elif 'KARANGASEM' in line.upper(): data['regency'] = 'KARANGASEM'
-                elif 'BULELENG' in line.upper(): data['regency'] = 'BULELENG'
-                elif 'JEMBRANA' in line.upper(): data['regency'] = 'JEMBRANA'
-                elif 'TABANAN' in line.upper(): data['regency'] = 'TABANAN'
+                if 'DENPASAR' in upper: data['regency'] = 'DENPASAR'
+                elif 'BADUNG' in upper: data['regency'] = 'BADUNG'
+                elif 'GIANYAR' in upper: data['regency'] = 'GIANYAR'
+                elif 'KLUNGKUNG' in upper: data['regency'] = 'KLUNGKUNG'
+                elif 'BANGLI' in upper: data['regency'] = 'BANGLI'
+                elif 'KARANGASEM' in upper: data['regency'] = 'KARANGASEM'
+                elif 'BULELENG' in upper: data['regency'] = 'BULELENG'
+                elif 'JEMBRANA' in upper: data['regency'] = 'JEMBRANA'
+                elif 'TABANAN' in upper: data['regency'] = 'TABANAN'
         
-        if 'KECAMATAN' in line.upper() or 'DISTRICT' in line.upper():
-            district_match = re.search(r'KECAMATAN\s*:\s*\[?\d+\]?\s*([A-Z\s]+)', line, re.IGNORECASE)
-            if district_match:
-                data['district'] = district_match.group(1).strip()
+        if 'KECAMATAN' in upper or 'DISTRICT' in upper:
+            if 'district' in admin:
+                data['district'] = admin['district'].strip()
                 logger.info(f"Found District: {data['district']}")
             else:
                 # Enhanced district detection for Denpasar
-                if 'DENPASAR BARAT' in line.upper(): data['district'] = 'DENPASAR BARAT'
-                elif 'DENPASAR TIMUR' in line.upper(): data['district'] = 'DENPASAR TIMUR'
-                elif 'DENPASAR SELATAN' in line.upper(): data['district'] = 'DENPASAR SELATAN'
-                elif 'DENPASAR UTARA' in line.upper(): data['district'] = 'DENPASAR UTARA'
+                if 'DENPASAR BARAT' in upper: data['district'] = 'DENPASAR BARAT'
+                elif 'DENPASAR TIMUR' in upper: data['district'] = 'DENPASAR TIMUR'
+                elif 'DENPASAR SELATAN' in upper: data['district'] = 'DENPASAR SELATAN'
+                elif 'DENPASAR UTARA' in upper: data['district'] = 'DENPASAR UTARA'
         
-        if 'DESA' in line.upper() or 'KELURAHAN' in line.upper() or 'VILLAGE' in line.upper():
-            village_match = re.search(r'(?:DESA|KELURAHAN)\s*:\s*\[?\d+\]?\s*([A-Z\s]+)', line, re.IGNORECASE)
-            if village_match:
-                data['village'] = village_match.group(1).strip()
+        if 'DESA' in upper or 'KELURAHAN' in upper or 'VILLAGE' in upper:
+            if 'village' in admin:
+                data['village'] = admin['village'].strip()
                 logger.info(f"Found Village: {data['village']}")
             else:
                 # Enhanced village detection
-                if 'DAUH PURI' in line.upper(): data['village'] = 'DAUH PURI'
-                elif 'KELURAHAN' in line.upper():
-                    kel_match = re.search(r'KELURAHAN\s+([A-Z\s]+)', line, re.IGNORECASE)
-                    if kel_match: data['village'] = kel_match.group(1).strip()
-                elif 'DESA' in line.upper():
-                    desa_match = re.search(r'DESA\s+([A-Z\s]+)', line, re.IGNORECASE)
-                    if desa_match: data['village'] = desa_match.group(1).strip()
+                if 'DAUH PURI' in upper: data['village'] = 'DAUH PURI'
+                elif 'KELURAHAN' in upper:
+                    if 'kelurahan' in admin: data['village'] = admin['kelurahan'].strip()
+                elif 'DESA' in upper:
+                    if 'desa' in admin: data['village'] = admin['desa'].strip()
         
         # Extract scale with improved pattern
-        if 'SKALA' in line.upper():
-            scale_match = re.search(r'SKALA\s*(\d+:\d+)', line, re.IGNORECASE)
-            if scale_match:
-                data['scale'] = scale_match.group(1)
+        if 'SKALA' in upper:
+            if 'scale' in admin:
+                data['scale'] = admin['scale']
                 logger.info(f"Found Scale: {data['scale']}")
             else:
-                scale_simple = re.search(r'(\d+:\d+)', line)
+                scale_simple = SCALE_RATIO.search(line)
                 if scale_simple:
                     data['scale'] = scale_simple.group(1)
                     logger.info(f"Found Scale: {data['scale']}")
                 
         # Extract business names with enhanced accuracy for mall and pasar detection
-        business_keywords = {
-            'mall': ['mall', 'plaza', 'center', 'supermarket', 'hypermarket', 'department store', 'pusat perbelanjaan'],
-            'pasar': ['pasar', 'market', 'traditional market', 'pasar tradisional', 'pasar induk', 'pasar besar'],
-            'hotel': ['hotel', 'resort', 'inn', 'guesthouse', 'penginapan'],
-            'restaurant': ['restaurant', 'cafe', 'warung', 'rumah makan', 'restoran'],
-            'bank': ['bank', 'atm', 'bca', 'mandiri', 'bni', 'bri'],
-            'hospital': ['hospital', 'rumah sakit', 'klinik', 'apotek', 'puskesmas'],
-            'school': ['school', 'sekolah', 'universitas', 'kampus', 'sd', 'smp', 'sma'],
-            'office': ['office', 'kantor', 'perkantoran', 'gedung'],
-            'gas_station': ['gas', 'spbu', 'pertamina', 'shell', 'bp'],
-            'car_wash': ['car wash', 'cuci mobil', 'cuci motor'],
-            'salon': ['salon', 'spa', 'beauty', 'kecantikan'],
-            'store': ['toko', 'store', 'shop', 'market', 'warung'],
-            'motorcycle': ['motor', 'honda', 'yamaha', 'suzuki', 'kawasaki'],
-            'dental': ['dental', 'gigi', 'drg', 'dokter gigi'],
-            'music': ['music', 'gitar', 'piano', 'alat musik'],
-            'battery': ['battery', 'aki', 'accu', 'baterai'],
-            'pharmacy': ['pharmacy', 'apotek', 'kimia farma', 'century'],
-            'mosque': ['mosque', 'masjid', 'musholla', 'surau'],
-            'church': ['church', 'gereja', 'kapel'],
-            'temple': ['temple', 'pura', 'vihara', 'klenteng'],
-            'park': ['park', 'taman', 'alun-alun', 'lapangan']
-        }
-        
-        business_found = False
-        for business_type, keywords in business_keywords.items():
-            if any(keyword.lower() in line.lower() for keyword in keywords):
-                business_name = re.sub(r'[^\w\s\-\.]', '', line).strip()
-                if len(business_name) > 2 and business_name not in data['businesses']:
-                    data['businesses'].append(business_name)
-                    data['business_types'][business_name] = business_type
-                    
-                    # Search for business information with improved accuracy
-                    logger.info(f"Searching for business info: {business_name}")
-                    business_info = search_business_info_improved(business_name, data.get('regency', 'Indonesia'))
-                    
-                    # Add detailed business information
-                    data['business_details'][business_name] = {
-                        'type': business_type,
-                        'contact_person': business_info.get('contact_person', 'Hubungi langsung'),
-                        'operational_hours': business_info.get('operational_hours', '08:00-17:00'),
-                        'coordinates': business_info.get('coordinates', ''),
-                        'address': business_info.get('address', ''),
-                        'phone': business_info.get('phone', ''),
-                        'email': business_info.get('email', ''),
-                        'business_type_osm': business_info.get('business_type', 'general')
-                    }
-                    
-                    business_found = True
+        business_type = hits.first('business')
+        if business_type is None and hits.any('general_business'):
+            # If no specific type found, categorize as general business
+            business_type = 'general'
+        if business_type:
+            business_name = token['name']
+            if len(business_name) > 2 and businesses.add(Business(business_name, business_type)):
+                environment_business_counts[current_environment] = environment_business_counts.get(current_environment, 0) + 1
+                if on_business is not None:
+                    on_business(business_name, business_type, data)
+                if business_type == 'general':
+                    logger.info(f"Found General Business: {business_name}")
+                else:
                     logger.info(f"Found Business: {business_name} (Type: {business_type})")
-                    break
-        
-        # If no specific type found, categorize as general business
-        if not business_found and any(keyword.lower() in line.lower() for keyword in ['warung', 'toko', 'restaurant', 'store', 'shop', 'gallery', 'motor', 'dental', 'battery', 'music', 'hotel', 'mall', 'market', 'cafe', 'bank', 'pharmacy', 'hospital', 'school', 'university', 'office', 'factory', 'warehouse', 'gas station', 'car wash', 'salon', 'spa']):
-            business_name = re.sub(r'[^\w\s\-\.]', '', line).strip()
-            if len(business_name) > 2 and business_name not in data['businesses']:
-                data['businesses'].append(business_name)
-                data['business_types'][business_name] = 'general'
-                
-                # Search for business information with improved accuracy
-                logger.info(f"Searching for business info: {business_name}")
-                business_info = search_business_info_improved(business_name, data.get('regency', 'Indonesia'))
-                
-                # Add detailed business information
-                data['business_details'][business_name] = {
-                    'type': 'general',
-                    'contact_person': business_info.get('contact_person', 'Hubungi langsung'),
-                    'operational_hours': business_info.get('operational_hours', '08:00-17:00'),
-                    'coordinates': business_info.get('coordinates', ''),
-                    'address': business_info.get('address', ''),
-                    'phone': business_info.get('phone', ''),
-                    'email': business_info.get('email', '')
-                }
-                
-                logger.info(f"Found General Business: {business_name}")
                 
         # Extract street names with improved regex
-        if 'Jl.' in line or 'Jalan' in line or 'Jl ' in line:
-            street_match = re.search(r'(Jl\.?\s*[A-Za-z\s]+)', line)
-            if street_match:
-                street_name = street_match.group(1).strip()
-                if street_name not in data['streets']:
-                    data['streets'].append(street_name)
-                    logger.info(f"Found Street: {street_name}")
-            else:
-                jalan_match = re.search(r'Jalan\s+([A-Za-z\s]+)', line)
-                if jalan_match:
-                    street_name = f"Jl. {jalan_match.group(1).strip()}"
-                    if street_name not in data['streets']:
-                        data['streets'].append(street_name)
-                        logger.info(f"Found Street: {street_name}")
+        street_name = token['street']
+        if street_name and streets.add(Street(street_name)):
+            logger.info(f"Found Street: {street_name}")
                 
         # Extract environment names with improved regex
-        if 'LINGKUNGAN' in line.upper():
-            env_match = re.search(r'LINGKUNGAN\s+([A-Z\s]+)\s*\[(\d+)\]', line, re.IGNORECASE)
-            if env_match:
-                env_name = env_match.group(1).strip()
-                env_code = env_match.group(2)
-                if not any(env['name'] == env_name and env['code'] == env_code for env in data['environments']):
-                    data['environments'].append({
-                        'name': env_name,
-                        'code': env_code
-                    })
+        if 'LINGKUNGAN' in upper:
+            if 'environment' in admin:
+                env_name = admin['environment'].strip()
+                env_code = admin['environment_code']
+                current_environment = env_name
+                if environments.add(Environment(env_name, env_code)):
+                    logger.info(f"Found Environment: {env_name} [{env_code}]")
+            elif 'environment_name' in admin:
+                env_name = admin['environment_name'].strip()
+                env_code = str(len(environments) + 1).zfill(2)
+                current_environment = env_name
+                if not environments.has_name(env_name):
+                    environments.add(Environment(env_name, env_code))
                     logger.info(f"Found Environment: {env_name} [{env_code}]")
-            else:
-                env_simple_match = re.search(r'LINGKUNGAN\s+([A-Z\s]+)', line, re.IGNORECASE)
-                if env_simple_match:
-                    env_name = env_simple_match.group(1).strip()
-                    env_code = str(len(data['environments']) + 1).zfill(2)
-                    if not any(env['name'] == env_name for env in data['environments']):
-                        data['environments'].append({
-                            'name': env_name,
-                            'code': env_code
-                        })
-                        logger.info(f"Found Environment: {env_name} [{env_code}]")
                 
         # Extract coordinates if present
-        coord_match = re.search(r'(-?\d+\.\d+),\s*(-?\d+\.\d+)', line)
-        if coord_match:
-            lat = float(coord_match.group(1))
-            lon = float(coord_match.group(2))
-            coord_data = {'latitude': lat, 'longitude': lon}
-            if coord_data not in data['coordinates']:
-                data['coordinates'].append(coord_data)
+        if token['coordinates']:
+            lat, lon = token['coordinates']
+            if coordinates.add(Coordinate(lat, lon)):
                 logger.info(f"Found Coordinates: {lat}, {lon}")
                 
         # Extract landmarks
-        landmark_keywords = ['Monument', 'Park', 'Square', 'Temple', 'Church', 'Mosque', 'Museum', 'Tugu', 'Patung', 'Alun-alun']
-        if any(keyword.lower() in line.lower() for keyword in landmark_keywords):
-            landmark_name = re.sub(r'[^\w\s\-\.]', '', line).strip()
-            if len(landmark_name) > 2 and landmark_name not in data['landmarks']:
-                data['landmarks'].append(landmark_name)
+        if hits.any('landmark'):
+            landmark_name = token['name']
+            if len(landmark_name) > 2 and landmarks.add(Landmark(landmark_name)):
                 logger.info(f"Found Landmark: {landmark_name}")
+        
+        # Building categories and environments mentioned anywhere in the map
+        add_building_types(building_data, token)
+        environments_mentioned.update(hits.categories('environment'))
+    
+    data['businesses'] = businesses.to_preview()
+    data['business_types'] = {business.name: business.type for business in businesses}
+    data['streets'] = streets.to_preview()
+    data['environments'] = environments.to_preview()
+    # Businesses listed above the first LINGKUNGAN line belong to the nearest one, the first
+    counts = {environment.name: environment_business_counts.get(environment.name, 0) for environment in environments}
+    if counts and None in environment_business_counts:
+        counts[next(iter(counts))] += environment_business_counts[None]
+    data['environment_business_counts'] = counts
+    data['coordinates'] = coordinates.to_preview()
+    data['landmarks'] = landmarks.to_preview()
+    data['building_data'] = building_data
+    logger.info(f"Building data detected: {building_data}")
+    return {'data': data, 'lines': tokens, 'environments_mentioned': environments_mentioned}
+
+# Counters of every streaming parse, exposed at /metrics/pipeline
+streaming_stats = PipelineStats()
+# Lookups of every streaming parse share one pool, like background enrichment
+pipeline_executor = ThreadPoolExecutor(max_workers=max(app.config['PIPELINE_WORKERS'], 1), thread_name_prefix='pipeline')
+ADMIN_CONTEXT_FIELDS = ['map_id', 'province', 'regency', 'district', 'village']
+
+def lookup_inputs(wss_data):
+    """What a business lookup depends on in the map's admin names: the location and the expected kecamatan/desa"""
+    return wss_data.get('regency') or 'Indonesia', tuple(sorted(get_expected_admin(wss_data).items()))
+
+def stream_wss_text(text, deadline=None):
+    """
+    scan_wss_text with the business lookups overlapped: parser -> enrichment -> aggregator (see
+    pipeline.py), run on pipeline_executor. Each business is looked up as soon as its line is
+    parsed, with the admin names read so far (header lines come first on a map); businesses
+    looked up before a header line that changes their lookup (regency, kecamatan, desa) are
+    looked up again with the final names, the others are kept. Per-stage counters go to
+    streaming_stats.
+    Returns the scan with data['business_details'] filled and scan['pending_businesses'] set, for
+    parse_wss_data_improved to skip its own enrichment (it schedules the pending businesses). Area enrichment, PIPELINE_WORKERS = 0 or a
+    spent budget give a plain scan instead.
+    """
+    workers = app.config['PIPELINE_WORKERS']
+    if workers <= 0 or app.config['ENRICHMENT_MODE'] == 'area' or budget_spent(deadline):
+        return scan_wss_text(text)
+    
+    # Lookups answer from the caller's lookup memo, under its lookup policy, like the caller would
+    memo = getattr(lookup_memo, 'value', None)
+    cache_only = getattr(cache_only_lookups, 'value', False)
+    contexts = {}
+    requested = {}
+    details = {}
+    
+    def lookup_context(data):
+        """Admin names read so far, resolved against the BPS master once per distinct header"""
+        raw = tuple(data.get(field, '') for field in ADMIN_CONTEXT_FIELDS)
+        if raw not in contexts:
+            context = dict(zip(ADMIN_CONTEXT_FIELDS, raw))
+            resolve_admin_names(context)
+            contexts[raw] = context
+        return contexts[raw]
+    
+    def request_lookup(business_name, business_type, context):
+        requested[business_name] = lookup_inputs(context)
+        pipeline.put((business_name, business_type, context))
+    
+    def enrich_stage(item):
+        business_name, business_type, wss_data = item
+        with geocoding_deadline(deadline), enrichment_memo(memo), geocoding_cache_only(cache_only):
+            detail = enrich_business(business_name, business_type, wss_data.get('regency') or 'Indonesia',
+                                     wss_data=wss_data, deadline=deadline)
+        return business_name, lookup_inputs(wss_data), detail
+    
+    def aggregate_stage(item):
+        business_name, inputs, detail = item
+        details[(business_name, inputs)] = detail
+    
+    pipeline = StreamingPipeline([
+        Stage('enrichment', enrich_stage, workers=workers, queue_size=app.config['PIPELINE_QUEUE_SIZE']),
+        Stage('aggregation', aggregate_stage)
+    ], producer='parser', executor=pipeline_executor)
+    with pipeline:
+        scan = scan_wss_text(text, on_business=lambda name, business_type, data: request_lookup(
+            name, business_type, lookup_context(data)))
+        data = scan['data']
+        final = lookup_context(data)
+        # Admin names printed below some businesses: only those looked up without them are repeated
+        stale = [name for name in data['businesses'] if requested[name] != lookup_inputs(final)]
+        if stale:
+            logger.info(f"Admin names changed after {len(stale)} businesses, looking them up again")
+        for name in stale:
+            request_lookup(name, data['business_types'].get(name, 'general'), final)
+    report = pipeline.metrics()
+    streaming_stats.record(report)
+    logger.info(f"Streaming parse: {report}")
+    
+    data['business_details'] = {name: details[(name, requested[name])] for name in data['businesses']}
+    scan['pending_businesses'] = [(name, data['business_types'].get(name, 'general')) for name in data['businesses']
+                                  if data['business_details'][name].get('status') == 'pending']
+    return scan
+
+def assign_layout_regions(data, layout):
+    """
+    Place businesses by where their labels sit on the map rather than by OCR reading order
+    Each business belongs to the LINGKUNGAN label nearest to it and is tagged with the nearest
+    street label. Overrides data['environment_business_counts'] and sets data['business_layout']
+    ({business: {'environment', 'nearest_street'}}); maps without a LINGKUNGAN label keep the
+    counts from scan_wss_text.
+    """
+    environment_rows, street_rows, business_rows = {}, {}, {}
+    for row, text in enumerate(layout.texts):
+        line = clip_ocr_line(text)
+        if not line:
+            continue
+        token = tokenize_wss_line(line)
+        admin = token['admin']
+        if 'LINGKUNGAN' in token['upper']:
+            environment_name = admin.get('environment') or admin.get('environment_name')
+            if environment_name:
+                environment_rows[row] = environment_name.strip()
+        if token['street']:
+            street_rows[row] = token['street']
+        # A business listed twice is placed where OCR first read it
+        if token['name'] in data.get('business_types', {}) and token['name'] not in business_rows.values():
+            business_rows[row] = token['name']
+    if not environment_rows:
+        return data
+    
+    environment_index = layout.index(environment_rows)
+    street_index = layout.index(street_rows)
+    centers = layout.centers
+    counts = {environment['name']: 0 for environment in data.get('environments', [])}
+    business_layout = {}
+    for row, business in business_rows.items():
+        x, y = float(centers[row, 0]), float(centers[row, 1])
+        environment = environment_rows[environment_index.nearest(x, y)[1]]
+        street = street_index.nearest(x, y)
+        counts[environment] = counts.get(environment, 0) + 1
+        business_layout[business] = {
+            'environment': environment,
+            'nearest_street': street_rows[street[1]] if street else None
+        }
+    data['environment_business_counts'] = counts
+    data['business_layout'] = business_layout
+    return data
+
+def parse_wss_data_improved(text, deadline=None, start_background=True, scan=None, enrich=True):
+    """
+    Improved WSS map data parsing with better accuracy
+    deadline: optional time.monotonic() value after which enrichment is left to background workers
+    start_background: False records pending enrichment for on-demand resolution instead
+    scan: result of scan_wss_text(text) or stream_wss_text(text) to reuse (its map data is filled
+    in place; businesses a streamed scan already enriched are not looked up again)
+    enrich: False skips business and economic-center lookups (text-only re-parsing)
+    """
+    if scan is None:
+        scan = scan_wss_text(text)
+    data = scan['data']
+    building_data = data.pop('building_data')
+    
+    # Noisy admin names are snapped to the BPS master, missing ones filled from the map ID
+    resolve_admin_names(data)
+    
+    # Enrich businesses once the header (village, regency) is known
+    area_index = None
+    if 'pending_businesses' in scan:
+        schedule_pending_businesses(data, scan['pending_businesses'], start_background=start_background)
+    else:
+        if enrich and app.config['ENRICHMENT_MODE'] == 'area' and not budget_spent(deadline):
+            with geocoding_deadline(deadline):
+                area_index = prefetch_area_pois(data)
+        enrich_business_details(data, area_index=area_index, deadline=deadline, start_background=start_background, enrich=enrich)
     
     # Detect economic centers with environmental context
     # Determine dominant load based on environments and business types
@@ -2300,40 +3820,256 @@ def parse_wss_data_improved(text):
         first_env = data['environments'][0]['name']
         dominant_load = determine_dominant_load(first_env)
     
+    # Clusters of businesses close together, from the coordinates the enrichment already found
+    data['business_clusters'] = cluster_businesses(data['business_details'])
     data['economic_centers'] = detect_economic_centers(
         data['businesses'], 
         data['business_details'],
         environments=data['environments'],
-        dominant_load=dominant_load
+        dominant_load=dominant_load,
+        area_index=area_index,
+        deadline=deadline,
+        map_id=data['map_id'],
+        start_background=start_background,
+        expected_admin=get_expected_admin(data),
+        enrich=enrich,
+        clusters=data['business_clusters']
     )
+    data['candidate_economic_centers'] = candidate_economic_centers(data['business_clusters'])
     
     data['total_businesses'] = len(data['businesses'])
     data['total_streets'] = len(data['streets'])
     data['total_environments'] = len(data['environments'])
     data['total_landmarks'] = len(data['landmarks'])
     
-    # Detect building types
-    building_data = detect_building_types(text)
+    # Building types were collected during the scan
     data['building_data'] = building_data
-    logger.info(f"Building data detected: {building_data}")
     
     logger.info(f"Final parsed data: {data}")
     return data
 
-def get_precise_coordinates(business_name, location="Indonesia"):
+# Local admin-boundary index, loaded once per ADMIN_BOUNDARY_PATH
+admin_boundary_cache = {}
+
+# GeoJSON property names accepted for each admin level (English, Indonesian and BPS export names)
+ADMIN_PROPERTY_ALIASES = {
+    'province': ['province', 'provinsi', 'nmprov'],
+    'regency': ['regency', 'kabupaten', 'kabkot', 'nmkab'],
+    'district': ['district', 'kecamatan', 'nmkec'],
+    'village': ['village', 'desa', 'kelurahan', 'nmdesa']
+}
+
+def load_admin_boundary_index(path):
+    """Build the grid index of village polygons from a GeoJSON file, cached by modification time"""
+    mtime = os.path.getmtime(path)
+    cached = admin_boundary_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        features = json.load(f).get('features', [])
+    
+    index = PolygonGridIndex()
+    for feature in features:
+        properties = {key.lower(): value for key, value in (feature.get('properties') or {}).items()}
+        admin = {}
+        for field, aliases in ADMIN_PROPERTY_ALIASES.items():
+            admin[field] = next((str(properties[alias]).strip() for alias in aliases if properties.get(alias)), '')
+        for polygon in geometry_polygons(feature.get('geometry')):
+            index.add(polygon, admin)
+    admin_boundary_cache[path] = (mtime, index)
+    logger.info(f"Loaded {len(index)} admin boundary polygons from {path}")
+    return index
+
+def reverse_lookup_admin(lat, lon):
+    """
+    Province/regency/district/village containing a coordinate, from the local boundary index
+    Returns: admin dict, or {} when no index is configured or the point is outside every polygon
+    """
+    path = app.config['ADMIN_BOUNDARY_PATH']
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        admin = load_admin_boundary_index(path).lookup(float(lat), float(lon))
+    except (ValueError, TypeError):
+        return {}
+    return dict(admin) if admin else {}
+
+def normalize_admin_name(name):
+    """Uppercase admin name without its level prefix (KECAMATAN, DESA, KELURAHAN, ...)"""
+    name = WHITESPACE.sub(' ', str(name or '')).strip().upper()
+    return ADMIN_LEVEL_PREFIX.sub('', name)
+
+def get_expected_admin(wss_data):
+    """Kecamatan/desa printed on the map, used to reject geocoding results from other areas"""
+    if not wss_data:
+        return {}
+    return {field: wss_data[field] for field in ['district', 'village'] if wss_data.get(field)}
+
+def admin_matches(admin, expected_admin):
+    """True unless a level known on both sides names a different area"""
+    for field, expected in expected_admin.items():
+        found = admin.get(field)
+        if found and expected and normalize_admin_name(found) != normalize_admin_name(expected):
+            return False
+    return True
+
+# BPS wilayah code master (code -> name) and its per-parent name index, loaded once per BPS_WILAYAH_PATH
+bps_wilayah_cache = {}
+
+# Digits of the 16-digit SLS map ID that make up each admin code: 51 / 5171 / 5171030 / 5171030005
+MAP_ID_LEVELS = [('province', 2), ('regency', 4), ('district', 7), ('village', 10)]
+# Parent code length of each admin code length ('' scopes the provinces)
+PARENT_CODE_LENGTH = {2: 0, 4: 2, 7: 4, 10: 7}
+
+def load_bps_wilayah(path):
+    """
+    BPS wilayah CSV (kode,nama), cached by modification time
+    Returns: (code -> name dict, parent code -> BKTree of child names carrying their codes)
+    """
+    mtime = os.path.getmtime(path)
+    cached = bps_wilayah_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    master = {}
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            row = {key.strip().lower(): value for key, value in row.items() if key}
+            # Codes may be exported dotted (51.71.030.0005)
+            code = re.sub(r'\D', '', row.get('kode') or '')
+            name = normalize_admin_name(row.get('nama'))
+            if code and name:
+                master[code] = name
+    
+    # Sibling names are only ever compared with each other, so each parent gets its own small tree
+    name_trees = {}
+    for code, name in master.items():
+        if len(code) in PARENT_CODE_LENGTH:
+            parent = code[:PARENT_CODE_LENGTH[len(code)]]
+            name_trees.setdefault(parent, BKTree()).add(name, code)
+    bps_wilayah_cache[path] = (mtime, (master, name_trees))
+    logger.info(f"Loaded {len(master)} BPS wilayah codes from {path}")
+    return master, name_trees
+
+def get_bps_wilayah():
+    """Configured BPS wilayah master and name index, or empty ones when BPS_WILAYAH_PATH is unset or missing"""
+    path = app.config['BPS_WILAYAH_PATH']
+    if not path or not os.path.exists(path):
+        return {}, {}
+    return load_bps_wilayah(path)
+
+def decode_map_id(map_id):
+    """
+    Admin codes encoded in a 16-digit SLS map ID, with their names from the BPS code master
+    Returns: dict with '<level>_code' for every level, '<level>' when the master knows the code,
+    plus 'sls' and 'sub_sls'; {} when the ID is not 16 digits
+    """
+    map_id = (map_id or '').strip()
+    if not MAP_ID_EXACT.match(map_id):
+        return {}
+    master, _ = get_bps_wilayah()
+    
+    decoded = {'sls': map_id[10:14], 'sub_sls': map_id[14:16]}
+    for field, length in MAP_ID_LEVELS:
+        code = map_id[:length]
+        decoded[f'{field}_code'] = code
+        if code in master:
+            decoded[field] = master[code]
+    return decoded
+
+def match_admin_name(name, name_tree):
+    """
+    Closest canonical name to an OCR'd admin name among its siblings
+    Returns: (canonical name, code, confidence 0-1), or None when nothing is close enough or
+    two siblings are equally close
+    """
+    name = normalize_admin_name(name)
+    if not name or not name_tree:
+        return None
+    # About one OCR error per five characters
+    matches = name_tree.search(name, max(1, len(name) // 5))
+    if not matches or (len(matches) > 1 and matches[1][0] == matches[0][0]):
+        return None
+    distance, canonical, code = matches[0]
+    return canonical, code, round(1 - distance / max(len(name), len(canonical)), 2)
+
+def resolve_admin_names(data):
+    """
+    Snap the admin fields to canonical BPS names and check them against the map ID
+    Each level is matched among the children of its parent code (from the map ID, or the parent
+    matched so far), fields OCR missed are filled from the map ID, and names that still point at
+    another area than the map ID are listed in data['admin_mismatches'] (field, ocr, expected).
+    data['admin_confidence'] holds the match confidence of each resolved field.
+    """
+    _, name_trees = get_bps_wilayah()
+    decoded = decode_map_id(data.get('map_id'))
+    mismatches = []
+    confidence = {}
+    parent = ''
+    for field, length in MAP_ID_LEVELS:
+        expected_code = decoded.get(f'{field}_code')
+        expected = decoded.get(field)
+        if expected_code:
+            parent = expected_code[:PARENT_CODE_LENGTH[length]]
+        found = (data.get(field) or '').strip()
+        code = None
+        if not found or found == 'Tidak ditemukan':
+            if expected:
+                data[field] = expected
+                confidence[field] = 1.0
+                code = expected_code
+                logger.info(f"{field} filled from map ID {data['map_id']}: {expected}")
+        elif parent is not None and parent in name_trees:
+            match = match_admin_name(found, name_trees[parent])
+            if match:
+                canonical, code, confidence[field] = match
+                if canonical != found:
+                    logger.info(f"{field} '{found}' corrected to '{canonical}' ({confidence[field]:.2f})")
+                    data[field] = canonical
+            else:
+                confidence[field] = 0.0
+        if expected and found and found != 'Tidak ditemukan' and code != expected_code:
+            mismatches.append({'field': field, 'ocr': found, 'expected': expected})
+            logger.warning(f"{field} '{found}' does not match map ID {data['map_id']} ({expected})")
+        # Lower levels are only scoped when this level's code is known
+        parent = code or expected_code
+    data['admin_mismatches'] = mismatches
+    data['admin_confidence'] = confidence
+    return data
+
+def build_coordinate_fields(lat_float, lon_float):
+    """Format a validated coordinate pair into the decimal, DMS and map-link fields used in the preview"""
+    # Format coordinates with higher precision
+    lat_formatted = f"{lat_float:.6f}"
+    lon_formatted = f"{lon_float:.6f}"
+    return {
+        'latitude': lat_formatted,
+        'longitude': lon_formatted,
+        'coordinates': f"{lat_formatted}, {lon_formatted}",
+        'coordinates_decimal': f"{lat_float:.6f}, {lon_float:.6f}",
+        'coordinates_dms': f"{int(lat_float)}°{int((lat_float % 1) * 60)}'{((lat_float % 1) * 60 % 1) * 60:.2f}\"S, {int(lon_float)}°{int((lon_float % 1) * 60)}'{((lon_float % 1) * 60 % 1) * 60:.2f}\"E",
+        'google_maps_link': f"https://www.google.com/maps?q={lat_float},{lon_float}",
+        'osm_link': f"https://www.openstreetmap.org/?mlat={lat_float}&mlon={lon_float}&zoom=18"
+    }
+
+@memoized_lookup
+def get_precise_coordinates(business_name, location="Indonesia", expected_admin=None):
     """
     Get precise coordinates with validation and higher accuracy
+    With a local admin-boundary index, results outside expected_admin (the map's kecamatan/desa)
+    are rejected and the admin fields come from the index instead of Nominatim's address block
     Returns: dict with validated coordinates and additional location data
     """
     try:
         # Clean business name for search
-        clean_name = re.sub(r'[^\w\s]', '', business_name).strip()
+        clean_name = BUSINESS_NAME_CLEANUP.sub('', business_name).strip()
         if len(clean_name) < 3:
             return {}
         
         # Enhanced search query with location context
         search_query = f"{clean_name}, {location}"
-        url = "https://nominatim.openstreetmap.org/search"
+        url = f"{app.config['NOMINATIM_URL']}/search"
         params = {
             'q': search_query,
             'format': 'json',
@@ -2348,20 +4084,34 @@ def get_precise_coordinates(business_name, location="Indonesia"):
         }
         
         logger.info(f"Getting precise coordinates for: {search_query}")
-        response = requests.get(url, params=params, headers=headers, timeout=20)
+        response = geocoder.get(url, params=params, headers=headers, timeout=20)
         
         if response.status_code == 200:
             data = response.json()
             if data:
-                # Find the best match with highest accuracy
+                # Find the best match with highest accuracy inside the map's own area
+                candidates = sorted(
+                    (result for result in data if result.get('importance', 0) > 0),
+                    key=lambda result: result.get('importance', 0),
+                    reverse=True
+                )
                 best_result = None
-                highest_importance = 0
+                admin = {}
+                for result in candidates:
+                    admin = reverse_lookup_admin(result.get('lat'), result.get('lon'))
+                    if expected_admin and admin and not admin_matches(admin, expected_admin):
+                        logger.info(f"Rejected {result.get('display_name', '')}: outside {expected_admin}")
+                        continue
+                    best_result = result
+                    break
                 
-                for result in data:
-                    importance = result.get('importance', 0)
-                    if importance > highest_importance:
-                        highest_importance = importance
-                        best_result = result
+                if candidates and best_result is None:
+                    return {
+                        'coordinates': '',
+                        'accuracy': 'low',
+                        'validated': False,
+                        'error': 'Koordinat di luar wilayah peta'
+                    }
                 
                 if best_result:
                     lat = best_result.get('lat', '')
@@ -2374,10 +4124,6 @@ def get_precise_coordinates(business_name, location="Indonesia"):
                         
                         # Check if coordinates are within reasonable bounds for Indonesia
                         if -11.0 <= lat_float <= 6.0 and 95.0 <= lon_float <= 141.0:
-                            # Format coordinates with higher precision
-                            lat_formatted = f"{lat_float:.6f}"
-                            lon_formatted = f"{lon_float:.6f}"
-                            
                             # Get additional location data
                             address_details = best_result.get('address', {})
                             extratags = best_result.get('extratags', {})
@@ -2391,34 +4137,18 @@ def get_precise_coordinates(business_name, location="Indonesia"):
                             elif extratags.get('tourism'):
                                 location_type = extratags.get('tourism')
                             
-                            # Get administrative boundaries for context
-                            province = address_details.get('state', '')
-                            regency = address_details.get('county', '')
-                            district = address_details.get('city_district', '')
-                            village = address_details.get('suburb', '')
-                            
-                            # Create Google Maps link
-                            google_maps_link = f"https://www.google.com/maps?q={lat_float},{lon_float}"
-                            
-                            # Create OpenStreetMap link
-                            osm_link = f"https://www.openstreetmap.org/?mlat={lat_float}&mlon={lon_float}&zoom=18"
-                            
-                            return {
-                                'latitude': lat_formatted,
-                                'longitude': lon_formatted,
-                                'coordinates': f"{lat_formatted}, {lon_formatted}",
-                                'coordinates_decimal': f"{lat_float:.6f}, {lon_float:.6f}",
-                                'coordinates_dms': f"{int(lat_float)}°{int((lat_float % 1) * 60)}'{((lat_float % 1) * 60 % 1) * 60:.2f}\"S, {int(lon_float)}°{int((lon_float % 1) * 60)}'{((lon_float % 1) * 60 % 1) * 60:.2f}\"E",
+                            precise_coords = build_coordinate_fields(lat_float, lon_float)
+                            precise_coords.update({
                                 'location_type': location_type,
-                                'province': province,
-                                'regency': regency,
-                                'district': district,
-                                'village': village,
-                                'google_maps_link': google_maps_link,
-                                'osm_link': osm_link,
+                                # Get administrative boundaries for context, locally when indexed
+                                'province': admin.get('province') or address_details.get('state', ''),
+                                'regency': admin.get('regency') or address_details.get('county', ''),
+                                'district': admin.get('district') or address_details.get('city_district', ''),
+                                'village': admin.get('village') or address_details.get('suburb', ''),
                                 'accuracy': 'high',
                                 'validated': True
-                            }
+                            })
+                            return precise_coords
                         else:
                             logger.warning(f"Coordinates outside Indonesia bounds: {lat}, {lon}")
                             return {
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Reproducible end-to-end benchmark of the business enrichment engine
+
+Parses a sample WSS map against mock_nominatim.py (replaying fixtures/nominatim_recordings.json)
+so timings depend only on the configured latency and error rate, not on the live OSM server:
+
+    python benchmark_enrichment.py --runs 5 --latency 0.1 --error-rate 0.05 --seed 42
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from app import GeocodingClient, parse_wss_data_improved
+from mock_nominatim import mock_nominatim_server
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'nominatim_recordings.json')
+
+SAMPLE_MAP = """
+Map ID: 5171030005000103
+Provinsi: BALI
+Kabupaten: DENPASAR
+Kecamatan: DENPASAR BARAT
+Desa: DAUH PURI
+Skala: 1:353
+
+KAWASAN KOMERSIAL
+Pasar Kumbasari
+Mall Bali Collection
+Hotel Bali
+Restaurant Sari
+Bank BCA
+Toko Elektronik
+Jl. Gajah Mada No. 10
+Koordinat: -8.6500, 115.2167
+"""
+
+def run_once():
+    """Parse SAMPLE_MAP with a fresh geocoding client; returns (seconds, client stats)"""
+    app.geocoder = GeocodingClient(
+        max_retries=app.app.config['GEOCODER_MAX_RETRIES'],
+        breaker_threshold=app.app.config['GEOCODER_BREAKER_THRESHOLD'],
+        breaker_cooldown=app.app.config['GEOCODER_BREAKER_COOLDOWN']
+    )
+    start = time.perf_counter()
+    parse_wss_data_improved(SAMPLE_MAP, start_background=False)
+    return time.perf_counter() - start, app.geocoder.get_stats()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark business enrichment against a local mock Nominatim')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.05, help='Mock latency per request (seconds)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of mock requests answered with 503')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for reproducible error injection')
+    parser.add_argument('--fixtures', default=FIXTURES_PATH)
+    args = parser.parse_args()
+
+    timings = []
+    with mock_nominatim_server(args.fixtures, latency=args.latency, error_rate=args.error_rate, seed=args.seed) as server:
+        for run in range(1, args.runs + 1):
+            seconds, stats = run_once()
+            timings.append(seconds)
+            print(f"Run {run}: {seconds:.3f}s, {stats['calls']} calls, {stats['retries']} retries, "
+                  f"{stats['failures']} failures, breaker {stats['breaker_state']}")
+        mock_stats = server.mock.stats
+
+    print("=" * 50)
+    print(f"Mode: {app.app.config['ENRICHMENT_MODE']}, latency {args.latency}s, error rate {args.error_rate}")
+    print(f"Median: {statistics.median(timings):.3f}s  Min: {min(timings):.3f}s  Max: {max(timings):.3f}s")
+    print(f"Mock: {mock_stats['requests']} requests, {mock_stats['hits']} hits, "
+          f"{mock_stats['misses']} misses, {mock_stats['errors']} injected errors")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark of WSS text parsing on large synthetic OCR texts
+
+Compares parsing a map with separate passes (parse_wss_data_improved and extract_contextual_data
+each reading the text) against one shared scan_wss_text pass. Enrichment is stubbed out so only
+parsing is measured:
+
+    python benchmark_parser.py --lines 1000 10000 50000 --runs 3
+"""
+
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from app import extract_contextual_data, parse_wss_data_improved, scan_wss_text
+
+HEADER = """5171030005000103
+Provinsi : [51] BALI
+Kabupaten/Kota : [71] DENPASAR
+Kecamatan : [030] DENPASAR BARAT
+Desa/Kelurahan : [005] DAUH PURI
+Skala 1:353"""
+
+LINE_TEMPLATES = [
+    "Toko {name}", "Warung Makan {name}", "Pasar {name}", "Bank BCA {name}", "Hotel {name}",
+    "Masjid {name}", "Pura {name}", "Kos Putri {name}", "Rumah Kosong", "Jl. {name} No. {number}",
+    "Jalan {name}", "LINGKUNGAN {upper} [{code}]", "Koordinat: -8.{number}, 115.{number}",
+    "Bengkel Motor {name}", "Apotek {name}", "Kantor Desa {name}", "{name}", "Perumahan {name}"
+]
+
+NAMES = ['Sari', 'Makmur', 'Jaya', 'Sentosa', 'Kenanga', 'Melati', 'Gajah Mada', 'Sudirman', 'Diponegoro']
+
+def synthetic_text(line_count, seed=42):
+    """Header plus line_count random map lines"""
+    rng = random.Random(seed)
+    lines = [HEADER]
+    for _ in range(line_count):
+        name = f"{rng.choice(NAMES)} {rng.randint(1, line_count)}"
+        lines.append(rng.choice(LINE_TEMPLATES).format(
+            name=name, upper=name.upper(), number=rng.randint(1000, 9999), code=str(rng.randint(1, 99)).zfill(2)))
+    return '\n'.join(lines)
+
+def separate_passes(text):
+    parse_wss_data_improved(text, start_background=False)
+    extract_contextual_data(text, start_background=False)
+
+def shared_scan(text):
+    scan = scan_wss_text(text)
+    parse_wss_data_improved(text, start_background=False, scan=scan)
+    extract_contextual_data(text, start_background=False, scan=scan)
+
+def time_runs(function, text, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function(text)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark WSS parsing on synthetic OCR texts')
+    parser.add_argument('--lines', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    # Per-line INFO logging would dominate the timings
+    logging.getLogger().setLevel(logging.WARNING)
+    app.logger.setLevel(logging.WARNING)
+    app.search_business_info = lambda *args, **kwargs: {}
+    app.search_business_info_improved = lambda *args, **kwargs: {}
+    app.get_precise_coordinates = lambda *args, **kwargs: {}
+    # Measure cold parsing: repeated runs would otherwise be served from the line token cache
+    app.MAX_LINE_TOKENS = 0
+
+    print(f"{'Lines':>8}{'Separate (s)':>15}{'Shared scan (s)':>18}{'Speed-up':>10}")
+    for line_count in args.lines:
+        text = synthetic_text(line_count)
+        separate = time_runs(separate_passes, text, args.runs)
+        shared = time_runs(shared_scan, text, args.runs)
+        print(f"{line_count:>8}{separate:>15.3f}{shared:>18.3f}{separate / shared:>9.2f}x")
+
+if __name__ == '__main__':
+    main()
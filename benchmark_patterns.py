@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the per-line cost of WSS text parsing, by kind of OCR line
+
+Each kind of line (header fields, businesses, streets, coordinates, plain labels) is repeated
+and parsed with parse_wss_data_improved, enrichment stubbed out. --baseline loads another
+version of app.py (e.g. from git) to compare against:
+
+    git show HEAD~1:app.py > /tmp/app_before.py
+    python benchmark_patterns.py --baseline /tmp/app_before.py
+"""
+
+import argparse
+import importlib.util
+import logging
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from wss_patterns import ADMIN_FIELD_SCANNER, scan_admin_fields
+
+LINE_KINDS = {
+    'header': [
+        "Provinsi : [51] BALI", "Kabupaten/Kota : [71] DENPASAR", "Kecamatan : [030] DENPASAR BARAT",
+        "Desa/Kelurahan : [005] DAUH PURI", "Skala 1:353", "LINGKUNGAN BANJAR SARI [03]"
+    ],
+    'business': ["Toko Sari Makmur", "Warung Makan Jaya", "Bank BCA Cabang Sudirman", "Pasar Kumbasari"],
+    'street': ["Jl. Gajah Mada No. 10", "Jalan Sudirman", "Jl Diponegoro"],
+    'coordinates': ["Koordinat: -8.6500, 115.2167", "-8.6612, 115.2098"],
+    'plain': ["Rumah Kosong", "Perumahan Griya Kenanga", "Sari Makmur 12"]
+}
+
+# The separate per-field searches the combined scanner replaces
+SEPARATE_ADMIN_PATTERNS = [
+    r'PROVINSI\s*:\s*\[?\d+\]?\s*([A-Z\s]+)', r'(?:KABUPATEN|KOTA)\s*:\s*\[?\d+\]?\s*([A-Z\s]+)',
+    r'KECAMATAN\s*:\s*\[?\d+\]?\s*([A-Z\s]+)', r'(?:DESA|KELURAHAN)\s*:\s*\[?\d+\]?\s*([A-Z\s]+)',
+    r'SKALA\s*(\d+:\d+)', r'LINGKUNGAN\s+([A-Z\s]+)\s*\[(\d+)\]'
+]
+
+def load_baseline(path):
+    spec = importlib.util.spec_from_file_location('app_baseline', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def quiet(module):
+    """Stub enrichment, per-line INFO logging and the line token cache, which would dominate the timings"""
+    module.logger.setLevel(logging.WARNING)
+    module.search_business_info = lambda *args, **kwargs: {}
+    module.search_business_info_improved = lambda *args, **kwargs: {}
+    module.get_precise_coordinates = lambda *args, **kwargs: {}
+    # Measure cold parsing: the repeated lines would otherwise be served from the line token cache
+    module.MAX_LINE_TOKENS = 0
+
+def per_line_microseconds(function, lines, repeat, runs):
+    """Median cost of one line, in microseconds"""
+    text = '\n'.join(lines * repeat)
+    line_count = len(lines) * repeat
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function(text)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) / line_count * 1e6
+
+def admin_scan_microseconds(lines, runs, number=2000):
+    """Per-line cost of the combined scanner against one search per admin field"""
+    combined, separate = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for _ in range(number):
+            for line in lines:
+                scan_admin_fields(line)
+        combined.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in range(number):
+            for line in lines:
+                for pattern in SEPARATE_ADMIN_PATTERNS:
+                    re.search(pattern, line, re.IGNORECASE)
+        separate.append(time.perf_counter() - start)
+    count = number * len(lines)
+    return statistics.median(combined) / count * 1e6, statistics.median(separate) / count * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-line cost of WSS parsing by kind of OCR line')
+    parser.add_argument('--baseline', help='Another app.py to compare against')
+    parser.add_argument('--repeat', type=int, default=2000, help='Copies of each kind of line')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    modules = {'current': app}
+    if args.baseline:
+        modules['baseline'] = load_baseline(args.baseline)
+    for module in modules.values():
+        quiet(module)
+
+    print(f"{'Line kind':<14}" + ''.join(f"{name + ' (us/line)':>22}" for name in modules))
+    for kind, lines in LINE_KINDS.items():
+        costs = [per_line_microseconds(lambda text, m=module: m.parse_wss_data_improved(text, start_background=False),
+                                       lines, args.repeat, args.runs)
+                 for module in modules.values()]
+        print(f"{kind:<14}" + ''.join(f"{cost:>22.2f}" for cost in costs))
+
+    combined, separate = admin_scan_microseconds(LINE_KINDS['header'], args.runs)
+    print(f"\nAdmin fields of a header line: combined scanner {combined:.2f} us, "
+          f"{len(SEPARATE_ADMIN_PATTERNS)} separate searches {separate:.2f} us "
+          f"({ADMIN_FIELD_SCANNER.groups} named groups)")
+
+if __name__ == '__main__':
+    main()
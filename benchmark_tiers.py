@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the processing tiers (fast / standard / full) against their latency targets
+
+Uploads one map image per tier through /upload, with geocoding served by mock_nominatim.py
+(replaying fixtures/nominatim_recordings.json) and a fresh geocode cache warmed by one 'full'
+upload, so 'standard' runs on cache hits only. Without --image the OCR reader is a stand-in
+returning the blocks of a sample map that lie inside the image it is given (so 'fast' reads the
+header only), charging --ocr-cost seconds per megapixel read:
+
+    python benchmark_tiers.py --runs 3 --latency 0.1 --ocr-cost 2.0
+    python benchmark_tiers.py --image peta.jpg
+
+Exits with status 1 when a tier's median exceeds its target (PROCESSING_TIERS target_seconds).
+"""
+
+import argparse
+import io
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+import app
+from app import PROCESSING_TIERS
+from mock_nominatim import mock_nominatim_server
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'nominatim_recordings.json')
+
+HEADER_LINES = [
+    "Map ID: 5171030005000103", "Provinsi: BALI", "Kabupaten: DENPASAR",
+    "Kecamatan: DENPASAR BARAT", "Desa: DAUH PURI", "Skala: 1:353"
+]
+MAP_LINES = [
+    "KAWASAN KOMERSIAL", "Pasar Kumbasari", "Mall Bali Collection", "Hotel Bali", "Restaurant Sari",
+    "Bank BCA", "Toko Elektronik", "Jl. Gajah Mada No. 10", "Koordinat: -8.6500, 115.2167"
+]
+IMAGE_SIZE = (1200, 1600)
+
+def sample_blocks():
+    """EasyOCR-style blocks: the header in the top rows, the map body below it"""
+    blocks = []
+    for row, text in enumerate(HEADER_LINES):
+        y = 20 + row * 40
+        blocks.append(([[40, y], [600, y], [600, y + 30], [40, y + 30]], text, 0.9))
+    for row, text in enumerate(MAP_LINES):
+        y = 700 + row * 80
+        blocks.append(([[200, y], [800, y], [800, y + 30], [200, y + 30]], text, 0.9))
+    return blocks
+
+class StandInReader:
+    """OCR stand-in: the sample blocks inside the image, after ocr_cost seconds per megapixel"""
+
+    def __init__(self, ocr_cost):
+        self.ocr_cost = ocr_cost
+        self.blocks = sample_blocks()
+
+    def readtext(self, image, paragraph=False):
+        height, width = image.shape[:2]
+        time.sleep(self.ocr_cost * width * height / 1e6)
+        return [block for block in self.blocks if block[0][2][1] <= height and block[0][2][0] <= width]
+
+def upload(client, image_bytes, tier):
+    """POST the image to /upload with the tier; returns (seconds, response JSON)"""
+    start = time.perf_counter()
+    response = client.post('/upload', data={'file': (io.BytesIO(image_bytes), 'peta.png'), 'tier': tier},
+                           content_type='multipart/form-data')
+    return time.perf_counter() - start, response.get_json()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /upload per processing tier against its latency target')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.05, help='Mock Nominatim latency per request (seconds)')
+    parser.add_argument('--ocr-cost', type=float, default=1.0, help='Stand-in OCR seconds per megapixel')
+    parser.add_argument('--image', help='Real map image, read with EasyOCR instead of the stand-in')
+    parser.add_argument('--fixtures', default=FIXTURES_PATH)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    app.logger.setLevel(logging.WARNING)
+    if args.image:
+        with open(args.image, 'rb') as f:
+            image_bytes = f.read()
+    else:
+        app.get_reader = lambda: StandInReader(args.ocr_cost)
+        buffer = io.BytesIO()
+        Image.new('RGB', IMAGE_SIZE, 'white').save(buffer, format='PNG')
+        image_bytes = buffer.getvalue()
+
+    client = app.app.test_client()
+    timings = {tier: [] for tier in PROCESSING_TIERS}
+    businesses = {}
+    with tempfile.TemporaryDirectory() as folder, \
+            mock_nominatim_server(args.fixtures, latency=args.latency) as server:
+        app.app.config.update(UPLOAD_FOLDER=folder, PROCESSED_MAPS_FOLDER=os.path.join(folder, 'maps'),
+                              GEOCODE_CACHE_PATH=os.path.join(folder, 'geocode_cache.sqlite'))
+        upload(client, image_bytes, 'full')  # Warms the geocode cache for 'standard'
+        requests_before = server.mock.stats['requests']
+        for tier in PROCESSING_TIERS:
+            for _ in range(args.runs):
+                app.edit_sessions.clear()
+                seconds, result = upload(client, image_bytes, tier)
+                if not result or not result.get('success'):
+                    sys.exit(f"{tier}: upload failed: {result}")
+                timings[tier].append(seconds)
+                businesses[tier] = len(result['preview']['business_types'])
+            requests_now = server.mock.stats['requests']
+            print(f"{tier}: {requests_now - requests_before} geocoding requests over {args.runs} runs")
+            requests_before = requests_now
+
+    print("=" * 50)
+    print(f"{'Tier':<10}{'Median (s)':>12}{'Max (s)':>10}{'Target (s)':>12}{'Businesses':>12}  Status")
+    failed = False
+    for tier, settings in PROCESSING_TIERS.items():
+        median = statistics.median(timings[tier])
+        within = median <= settings['target_seconds']
+        failed = failed or not within
+        print(f"{tier:<10}{median:>12.3f}{max(timings[tier]):>10.3f}{settings['target_seconds']:>12.1f}"
+              f"{businesses[tier]:>12}  {'OK' if within else 'OVER TARGET'}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Worst-case benchmark of WSS parsing on adversarial OCR lines
+
+OCR output is untrusted: a smudged map can produce long runs of letters, spaces or digits
+around labels. Each family below targets a pattern that used to backtrack (long space runs
+after LINGKUNGAN, digit runs before coordinates or scales, repeated labels), plus random lines
+built from the same fragments. Every line is parsed on its own with scan_wss_text and must
+stay under the per-line time limit; the exit status is 1 when one does not:
+
+    python benchmark_worst_case.py --lengths 250 1000 4000 --limit-ms 50 --fuzz 500
+
+--no-line-limit disables MAX_OCR_LINE_LENGTH, to time the patterns themselves on long lines.
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from app import scan_wss_text
+
+def repeat_to(fragment, length):
+    return (fragment * (length // len(fragment) + 1))[:length]
+
+# Adversarial line families, by length
+FAMILIES = {
+    'lingkungan_spaces': lambda n: 'LINGKUNGAN' + ' ' * n + '!',
+    'lingkungan_letters': lambda n: 'LINGKUNGAN ' + 'A' * n + ' [',
+    'lingkungan_repeated': lambda n: repeat_to('LINGKUNGAN ', n),
+    'label_spaces': lambda n: 'PROVINSI' + ' ' * (n // 2) + ':' + ' ' * (n // 2) + '!',
+    'label_digits': lambda n: 'Kecamatan : [' + '1' * n + '!',
+    'digits': lambda n: '1' * n,
+    'digit_runs_with_dots': lambda n: repeat_to('1' * 40 + '.', n),
+    'coordinate_like': lambda n: repeat_to('-8.6500,', n),
+    'scale_like': lambda n: 'Skala ' + repeat_to('1:', n) + '1',
+    'street_spaces': lambda n: 'Jl' + ' ' * n + '!',
+    'letters_and_spaces': lambda n: repeat_to('a ', n)
+}
+
+FUZZ_FRAGMENTS = [
+    'LINGKUNGAN', 'Provinsi', 'Kabupaten/Kota', 'Kecamatan', 'Desa', 'Kelurahan', 'Skala', 'Jl.', 'Jalan',
+    ' ', '     ', ':', '[', ']', '[03]', '-', '.', ',', '1', '12345', '8.65', '115.2', '1:353', 'A', 'Toko', 'é'
+]
+
+def fuzz_line(rng, length):
+    """Random line of the given length from label, separator and digit fragments, with long runs"""
+    parts = []
+    while sum(map(len, parts)) < length:
+        fragment = rng.choice(FUZZ_FRAGMENTS)
+        parts.append(fragment * rng.choice([1, 1, 1, 10, 100]))
+    return ''.join(parts)[:length]
+
+def time_line(line):
+    start = time.perf_counter()
+    scan_wss_text(line)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-line parse time on adversarial OCR lines')
+    parser.add_argument('--lengths', type=int, nargs='+', default=[250, 1000, 4000])
+    parser.add_argument('--limit-ms', type=float, default=50.0, help='Maximum parse time of one line')
+    parser.add_argument('--fuzz', type=int, default=300, help='Random adversarial lines per length')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-line-limit', action='store_true', help='Disable MAX_OCR_LINE_LENGTH')
+    args = parser.parse_args()
+
+    # Per-line INFO logging would dominate the timings
+    logging.getLogger().setLevel(logging.ERROR)
+    app.logger.setLevel(logging.ERROR)
+    if args.no_line_limit:
+        app.app.config['MAX_OCR_LINE_LENGTH'] = 0
+
+    rng = random.Random(args.seed)
+    failures = []
+    print(f"MAX_OCR_LINE_LENGTH={app.app.config['MAX_OCR_LINE_LENGTH']}, limit {args.limit_ms:.0f} ms per line")
+    print(f"{'Family':<22}" + ''.join(f"{f'{length} (ms)':>12}" for length in args.lengths))
+
+    families = dict(FAMILIES)
+    families['fuzz (max)'] = None
+    for name, make_line in families.items():
+        row = []
+        for length in args.lengths:
+            if make_line is None:
+                lines = [fuzz_line(rng, length) for _ in range(args.fuzz)]
+            else:
+                lines = [make_line(length)]
+            timings = [(time_line(line), line) for line in lines]
+            worst, worst_line = max(timings)
+            row.append(worst * 1000)
+            if worst * 1000 > args.limit_ms:
+                failures.append((name, length, worst * 1000, worst_line[:80]))
+        print(f"{name:<22}" + ''.join(f"{ms:>12.2f}" for ms in row))
+
+    if failures:
+        print("\nLines over the per-line limit:")
+        for name, length, ms, line in failures:
+            print(f"   {name} ({length} chars): {ms:.1f} ms  {line!r}...")
+        sys.exit(1)
+    print("\nAll lines within the per-line limit")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Approximate string matching for the WSS Map Extractor
+A BK-tree indexes names by Levenshtein distance, so a noisy OCR name is matched against a
+set of canonical names while visiting only the branches the triangle inequality allows.
+"""
+
+def levenshtein(a, b, limit=None):
+    """
+    Edit distance between two strings, bit-parallel (Myers/Hyyro): one column of the
+    dynamic-programming table per character of b, kept as bit vectors in Python ints
+    limit: stop early and return limit + 1 once the distance is known to exceed it
+    """
+    if a == b:
+        return 0
+    # Vectors run over the shorter string, the columns over the longer one
+    if len(a) > len(b):
+        a, b = b, a
+    if limit is not None and len(b) - len(a) > limit:
+        return limit + 1
+    if not a:
+        return len(b)
+    match_masks = {}
+    for i, char in enumerate(a):
+        match_masks[char] = match_masks.get(char, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    positive, negative = full, 0
+    distance = len(a)
+    remaining = len(b)
+    for char in b:
+        eq = match_masks.get(char, 0)
+        xv = eq | negative
+        xh = (((eq & positive) + positive) ^ positive) | eq
+        h_positive = negative | (~(xh | positive) & full)
+        h_negative = positive & xh
+        if h_positive & last:
+            distance += 1
+        elif h_negative & last:
+            distance -= 1
+        remaining -= 1
+        # Each remaining column lowers the distance by at most one
+        if limit is not None and distance - remaining > limit:
+            return limit + 1
+        h_positive = ((h_positive << 1) | 1) & full
+        h_negative = (h_negative << 1) & full
+        positive = h_negative | (~(xv | h_positive) & full)
+        negative = h_positive & xv
+    return distance
+
+class BKTree:
+    """Burkhard-Keller tree of words, each carrying a value (e.g. its admin code)"""
+
+    __slots__ = ('root', 'size')
+
+    def __init__(self, words=None):
+        # Node: [word, value, {distance: child node}]
+        self.root = None
+        self.size = 0
+        for word, value in (words or {}).items():
+            self.add(word, value)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, word, value=None):
+        """Add a word; adding an existing word replaces its value"""
+        if self.root is None:
+            self.root = [word, value, {}]
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            distance = levenshtein(word, node[0])
+            if distance == 0:
+                node[1] = value
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [word, value, {}]
+                self.size += 1
+                return
+            node = child
+
+    def search(self, word, max_distance):
+        """(distance, word, value) of every word within max_distance, closest first"""
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            distance = levenshtein(word, node[0])
+            if distance <= max_distance:
+                found.append((distance, node[0], node[1]))
+            for edge, child in node[2].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        found.sort(key=lambda match: (match[0], match[1]))
+        return found
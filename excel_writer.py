@@ -0,0 +1,62 @@
+"""
+Streaming Excel output for the WSS Map Extractor
+Sheets are written in openpyxl's write-only mode: every row goes straight into the sheet's XML
+as it is appended, so memory stays flat however many businesses a map has. Header rows look like
+pandas' to_excel headers (bold, thin border, centered); empty values are skipped, as pandas leaves them.
+"""
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
+
+THIN = Side(style='thin')
+HEADER_FONT = Font(bold=True)
+HEADER_BORDER = Border(left=THIN, right=THIN, top=THIN, bottom=THIN)
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='top')
+
+def column_widths(rows, padding=2, max_width=50):
+    """{column letter: width} fitting the longest value of each column, capped at max_width"""
+    lengths = []
+    for row in rows:
+        for index, value in enumerate(row):
+            length = len(str('' if value is None else value))
+            if index == len(lengths):
+                lengths.append(length)
+            elif length > lengths[index]:
+                lengths[index] = length
+    return {get_column_letter(index + 1): min(length + padding, max_width) for index, length in enumerate(lengths)}
+
+class StreamingWorkbook:
+    """Write-only workbook built sheet by sheet"""
+
+    def __init__(self):
+        self.workbook = Workbook(write_only=True)
+
+    def add_sheet(self, title, columns, rows, widths=None):
+        """
+        Write a sheet: the header row, then each row (sequence of values in column order) of the
+        iterable as it is produced. Widths ({column letter: width}) must be known up front, the
+        write-only format puts them before the rows. Returns the sheet for rows appended after.
+        """
+        sheet = self.workbook.create_sheet(title)
+        for letter, width in (widths or {}).items():
+            sheet.column_dimensions[letter].width = width
+        sheet.append([self.header_cell(sheet, column) for column in columns])
+        for row in rows:
+            # Empty values are left out of the XML; rows left blank for manual entry still get their cells
+            values = [None if value == '' else value for value in row]
+            sheet.append(values if any(value is not None for value in values) else [''] * len(values))
+        return sheet
+
+    @staticmethod
+    def header_cell(sheet, value):
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.font = HEADER_FONT
+        cell.border = HEADER_BORDER
+        cell.alignment = HEADER_ALIGNMENT
+        return cell
+
+    def save(self, output):
+        """Write the workbook to a path or binary file object"""
+        self.workbook.save(output)
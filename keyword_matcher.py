@@ -0,0 +1,108 @@
+"""
+Multi-pattern keyword matching for the WSS Map Extractor
+Every keyword table is compiled into one Aho-Corasick automaton, so a line is scanned once
+no matter how many tables and keywords there are. Matching is case-insensitive substring
+matching, the same as `keyword.lower() in line.lower()`.
+"""
+
+from collections import deque
+
+class KeywordHits:
+    """Categories hit by one scan, grouped per table"""
+
+    __slots__ = ('matcher', 'hits')
+
+    def __init__(self, matcher, hits):
+        self.matcher = matcher
+        self.hits = hits
+
+    def any(self, table):
+        """True when any keyword of the table occurs"""
+        return table in self.hits
+
+    def has(self, table, category):
+        return category in self.hits.get(table, ())
+
+    def categories(self, table):
+        """Hit categories of the table, in the table's own order"""
+        found = self.hits.get(table, ())
+        return [category for category in self.matcher.tables[table] if category in found]
+
+    def first(self, table):
+        """First hit category in the table's order (the first branch of an if/elif chain), or None"""
+        found = self.hits.get(table)
+        if not found:
+            return None
+        for category in self.matcher.tables[table]:
+            if category in found:
+                return category
+        return None
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over named keyword tables
+    A table maps categories to keyword lists; category order is kept for first()
+    """
+
+    def __init__(self, tables=None):
+        self.tables = {}
+        self.keywords = {}
+        self.transitions = None
+        self.outputs = None
+        for name, categories in (tables or {}).items():
+            self.add_table(name, categories)
+        if tables:
+            self.build()
+
+    def add_table(self, name, categories):
+        self.tables[name] = list(categories)
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                self.keywords.setdefault(keyword.lower(), set()).add((name, category))
+        self.transitions = None
+
+    def build(self):
+        """Compile the keyword trie into a deterministic automaton (failure links folded in)"""
+        goto = [{}]
+        outputs = [set()]
+        for keyword, labels in self.keywords.items():
+            state = 0
+            for char in keyword:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append(set())
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].update(labels)
+
+        # Breadth-first: each state inherits the transitions and outputs of its failure state,
+        # so scanning needs exactly one dict lookup per character
+        transitions = [dict(goto[0])] + [None] * (len(goto) - 1)
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] |= outputs[fail[state]]
+            transitions[state] = dict(transitions[fail[state]])
+            for char, child in goto[state].items():
+                fail[child] = transitions[fail[state]].get(char, 0)
+                transitions[state][char] = child
+                queue.append(child)
+
+        self.transitions = transitions
+        self.outputs = [tuple(labels) for labels in outputs]
+
+    def scan(self, text):
+        """All (table, category) hits of the text in one pass"""
+        if self.transitions is None:
+            self.build()
+        transitions = self.transitions
+        outputs = self.outputs
+        hits = {}
+        state = 0
+        for char in text.lower():
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                for table, category in outputs[state]:
+                    hits.setdefault(table, set()).add(category)
+        return KeywordHits(self, hits)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Local Nominatim stand-in that replays recorded geocoding responses
+
+Record fixtures by running the app, a test or a benchmark with GEOCODER_RECORD_PATH set,
+then replay them offline with configurable latency and error injection:
+
+    python mock_nominatim.py --fixtures fixtures/nominatim_recordings.json --port 8088 --latency 0.2 --error-rate 0.1
+    NOMINATIM_URL=http://127.0.0.1:8088 python app.py
+
+Requests without a recording get Nominatim's empty answer ([] for /search, no elements for Overpass).
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import make_server, WSGIServer, WSGIRequestHandler
+
+import app
+from app import geocoding_fixture_key
+
+class MockNominatim:
+    """WSGI app replaying recorded Nominatim/Overpass responses"""
+
+    def __init__(self, recordings=None, latency=0.0, error_rate=0.0, error_status=503, seed=None):
+        if isinstance(recordings, str):
+            with open(recordings, 'r', encoding='utf-8') as f:
+                recordings = json.load(f)
+        self.recordings = recordings or {}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'hits': 0, 'misses': 0, 'errors': 0}
+        self.missed_keys = []
+
+    def __call__(self, environ, start_response):
+        method = environ['REQUEST_METHOD']
+        body = ''
+        if method == 'POST':
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+            body = environ['wsgi.input'].read(length).decode('utf-8')
+        key = geocoding_fixture_key(method, environ.get('PATH_INFO', ''), environ.get('QUERY_STRING', ''), body)
+
+        with self.lock:
+            self.stats['requests'] += 1
+            inject_error = self.random.random() < self.error_rate
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if inject_error:
+            with self.lock:
+                self.stats['errors'] += 1
+            return self._respond(start_response, self.error_status, {'error': 'Injected error'})
+
+        recording = self.recordings.get(key)
+        with self.lock:
+            self.stats['hits' if recording else 'misses'] += 1
+            if recording is None:
+                self.missed_keys.append(key)
+        if recording is None:
+            return self._respond(start_response, 200, {'elements': []} if method == 'POST' else [])
+        return self._respond(start_response, recording['status'], recording['body'])
+
+    def _respond(self, start_response, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        reason = {200: 'OK', 404: 'Not Found', 429: 'Too Many Requests', 500: 'Internal Server Error',
+                  502: 'Bad Gateway', 503: 'Service Unavailable', 504: 'Gateway Timeout'}.get(status, 'Unknown')
+        start_response(f"{status} {reason}", [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(body)))
+        ])
+        return [body]
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def start_mock_nominatim(recordings=None, host='127.0.0.1', port=0, **options):
+    """
+    Serve MockNominatim from a background thread
+    Returns: the server, with .mock (the WSGI app) and .base_url for NOMINATIM_URL
+    """
+    mock = MockNominatim(recordings, **options)
+    server = make_server(host, port, mock, server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.mock = mock
+    server.base_url = f"http://{host}:{server.server_port}"
+    return server
+
+@contextmanager
+def mock_nominatim_server(recordings=None, **options):
+    """Point the app's NOMINATIM_URL at a replaying mock for the duration of the block"""
+    server = start_mock_nominatim(recordings, **options)
+    previous_url = app.app.config['NOMINATIM_URL']
+    app.app.config['NOMINATIM_URL'] = server.base_url
+    try:
+        yield server
+    finally:
+        app.app.config['NOMINATIM_URL'] = previous_url
+        server.shutdown()
+        server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Nominatim stand-in replaying recorded responses')
+    parser.add_argument('--fixtures', default='fixtures/nominatim_recordings.json', help='Recorded responses (JSON)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8088)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with --error-status')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible error injection')
+    args = parser.parse_args()
+
+    mock = MockNominatim(args.fixtures, latency=args.latency, error_rate=args.error_rate,
+                         error_status=args.error_status, seed=args.seed)
+    server = make_server(args.host, args.port, mock, server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+    print(f"Mock Nominatim serving {len(mock.recordings)} recordings on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+OCR layout for the WSS Map Extractor
+Keeps where each OCR text block sits on the map image, one row per block: texts in a list,
+boxes and confidences in numpy arrays, so layout questions ("which label is closest to this
+shop") are answered with a spatial index instead of by the order OCR listed the blocks.
+"""
+
+import numpy as np
+
+from spatial import PointGridIndex
+
+class OcrLayout:
+    """Text blocks of one OCR pass with their axis-aligned boxes [min_x, min_y, max_x, max_y]"""
+
+    def __init__(self, texts, boxes, confidences=None):
+        self.texts = list(texts)
+        self.boxes = np.asarray(boxes, dtype=float).reshape(len(self.texts), 4)
+        if confidences is None:
+            confidences = np.ones(len(self.texts))
+        self.confidences = np.asarray(confidences, dtype=float)
+
+    @classmethod
+    def from_easyocr(cls, results, min_confidence=0.01):
+        """
+        Layout of EasyOCR readtext results: (bbox points, text[, confidence]) per block
+        Blocks at or below min_confidence, empty blocks and malformed results are dropped
+        """
+        texts, boxes, confidences = [], [], []
+        for result in results:
+            if not isinstance(result, (tuple, list)) or len(result) < 2:
+                continue
+            bbox, text = result[:2]
+            confidence = result[2] if len(result) > 2 else 1.0
+            text = text.strip()
+            if confidence <= min_confidence or not text:
+                continue
+            points = np.asarray(bbox, dtype=float).reshape(-1, 2)
+            texts.append(text)
+            boxes.append([points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max()])
+            confidences.append(confidence)
+        return cls(texts, boxes, confidences)
+
+    def __len__(self):
+        return len(self.texts)
+
+    @property
+    def text(self):
+        """OCR text, one block per line in reading order"""
+        return '\n'.join(self.texts)
+
+    @property
+    def centers(self):
+        """(n, 2) array of box centers"""
+        return (self.boxes[:, :2] + self.boxes[:, 2:]) / 2
+
+    def line_height(self):
+        """Median box height, the scale of the map's lettering"""
+        if not len(self):
+            return 0.0
+        return float(np.median(self.boxes[:, 3] - self.boxes[:, 1]))
+
+    def index(self, rows=None):
+        """
+        Grid index over the centers of the given rows (all rows by default), payload = row number
+        Cells span a few text lines, so a nearest-label query looks at the labels around it only
+        """
+        rows = range(len(self)) if rows is None else rows
+        grid = PointGridIndex(max(self.line_height() * 4, 1.0))
+        centers = self.centers
+        for row in rows:
+            grid.add(float(centers[row, 0]), float(centers[row, 1]), row)
+        return grid
+
+    def rows_within(self, min_x, min_y, max_x, max_y):
+        """Rows whose box center lies inside the rectangle, in reading order"""
+        centers = self.centers
+        inside = ((centers[:, 0] >= min_x) & (centers[:, 0] <= max_x) &
+                  (centers[:, 1] >= min_y) & (centers[:, 1] <= max_y))
+        return np.flatnonzero(inside).tolist()
@@ -0,0 +1,222 @@
+"""
+Streaming stages for the WSS Map Extractor
+A producer (the thread that parses the OCR lines) feeds items into a chain of stages connected
+by bounded queues; each stage runs its own worker threads. A full queue blocks the stage in
+front of it (backpressure), and every stage counts its items, busy time, time blocked on the
+next queue and the deepest its input queue got.
+Given an executor, a pipeline starts no threads of its own: each item runs through every stage as
+one task of the shared pool, and the pool's size bounds the work of all runs together.
+"""
+
+import queue
+import threading
+import time
+
+_DONE = object()
+
+class StageMetrics:
+    """Counters of one stage during one pipeline run"""
+
+    def __init__(self, name, workers, queue_size):
+        self.name = name
+        self.workers = workers
+        self.queue_size = queue_size
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.max_queue_depth = 0
+        self.lock = threading.Lock()
+
+    def add(self, items=0, busy=0.0, blocked=0.0, queue_depth=0):
+        with self.lock:
+            self.items += items
+            self.busy_seconds += busy
+            self.blocked_seconds += blocked
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+
+    def snapshot(self, elapsed):
+        """Counters plus throughput over the run's wall time (items per second)"""
+        with self.lock:
+            return {
+                'name': self.name,
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'items': self.items,
+                'busy_seconds': round(self.busy_seconds, 6),
+                'blocked_seconds': round(self.blocked_seconds, 6),
+                'max_queue_depth': self.max_queue_depth,
+                'throughput': round(self.items / elapsed, 3) if elapsed > 0 else 0.0
+            }
+
+class Stage:
+    """
+    One pipeline stage: function(item) is called by `workers` threads for every item of the
+    stage's input queue (at most queue_size waiting; 0 = unbounded); a non-None return value is
+    passed on to the next stage
+    """
+
+    def __init__(self, name, function, workers=1, queue_size=0):
+        self.name = name
+        self.function = function
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+
+class StreamingPipeline:
+    """
+    Chain of stages fed by the calling thread
+    Use as a context manager: put() items while producing them; leaving the block waits for every
+    stage to drain and re-raises the first error a worker hit. metrics() is the run's report.
+    With an executor, at most workers + queue_size of the first stage's items are in flight at
+    once (put() blocks beyond that) and the stage functions must be thread-safe.
+    """
+
+    def __init__(self, stages, producer='producer', executor=None):
+        self.stages = list(stages)
+        self.queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        self.producer = StageMetrics(producer, 1, 0)
+        self.stage_metrics = [StageMetrics(stage.name, stage.workers, stage.queue_size) for stage in self.stages]
+        self.executor = executor
+        first = self.stages[0]
+        self.slots = threading.Semaphore(first.workers + first.queue_size) if executor and first.queue_size else None
+        self.in_flight = 0
+        self.drained = threading.Condition()
+        self.threads = []
+        self.errors = []
+        self.started = None
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        if self.executor is not None:
+            return self
+        for position, stage in enumerate(self.stages):
+            threads = [threading.Thread(target=self._work, args=(position,), daemon=True, name=f"{stage.name}-{number}")
+                       for number in range(stage.workers)]
+            for thread in threads:
+                thread.start()
+            self.threads.append(threads)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _send(self, position, item, metrics):
+        """Put item on the queue of stage `position`, counting the wait as blocked time of `metrics`"""
+        target = self.queues[position]
+        start = time.perf_counter()
+        target.put(item)
+        metrics.add(blocked=time.perf_counter() - start)
+        self.stage_metrics[position].add(queue_depth=target.qsize())
+
+    def put(self, item):
+        """Hand one item to the first stage; blocks while its queue is full"""
+        self.producer.add(items=1)
+        if self.executor is None:
+            self._send(0, item, self.producer)
+            return
+        start = time.perf_counter()
+        if self.slots is not None:
+            self.slots.acquire()
+        self.producer.add(blocked=time.perf_counter() - start)
+        with self.drained:
+            self.in_flight += 1
+            waiting = self.in_flight - self.stages[0].workers
+        self.stage_metrics[0].add(queue_depth=max(waiting, 0))
+        self.executor.submit(self._run_task, item)
+
+    def _run_task(self, item):
+        """Executor task: one item through every stage in turn"""
+        try:
+            for stage, metrics in zip(self.stages, self.stage_metrics):
+                if self.errors:
+                    return
+                start = time.perf_counter()
+                try:
+                    item = stage.function(item)
+                except Exception as e:
+                    self.errors.append(e)
+                    return
+                metrics.add(items=1, busy=time.perf_counter() - start)
+                if item is None:
+                    return
+        finally:
+            if self.slots is not None:
+                self.slots.release()
+            with self.drained:
+                self.in_flight -= 1
+                self.drained.notify_all()
+
+    def _work(self, position):
+        stage, metrics = self.stages[position], self.stage_metrics[position]
+        source = self.queues[position]
+        while True:
+            item = source.get()
+            if item is _DONE:
+                return
+            if self.errors:
+                continue  # Drain without working once the run has failed
+            start = time.perf_counter()
+            try:
+                result = stage.function(item)
+            except Exception as e:
+                self.errors.append(e)
+                continue
+            metrics.add(items=1, busy=time.perf_counter() - start)
+            if result is not None and position + 1 < len(self.stages):
+                self._send(position + 1, result, metrics)
+
+    def close(self):
+        """Wait for every stage to finish its items, stage by stage; re-raise the first worker error"""
+        if self.started is None or self.elapsed:
+            return
+        self.producer.add(busy=max(time.perf_counter() - self.started - self.producer.blocked_seconds, 0.0))
+        with self.drained:
+            self.drained.wait_for(lambda: self.in_flight == 0)
+        for position, threads in enumerate(self.threads):
+            for _ in threads:
+                self.queues[position].put(_DONE)
+            for thread in threads:
+                thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        if self.errors:
+            raise self.errors[0]
+
+    def metrics(self):
+        """Per-stage report of the run: producer first, then the stages in order"""
+        elapsed = self.elapsed or (time.perf_counter() - self.started if self.started else 0.0)
+        return {
+            'elapsed_seconds': round(elapsed, 6),
+            'stages': [self.producer.snapshot(elapsed)] + [metrics.snapshot(elapsed) for metrics in self.stage_metrics]
+        }
+
+class PipelineStats:
+    """Totals per stage over every pipeline run, plus the report of the latest run"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.runs = 0
+        self.totals = {}
+        self.last_run = None
+
+    def record(self, report):
+        with self.lock:
+            self.runs += 1
+            self.last_run = report
+            for stage in report['stages']:
+                total = self.totals.setdefault(stage['name'], {
+                    'items': 0, 'busy_seconds': 0.0, 'blocked_seconds': 0.0, 'max_queue_depth': 0})
+                total['items'] += stage['items']
+                total['busy_seconds'] += stage['busy_seconds']
+                total['blocked_seconds'] += stage['blocked_seconds']
+                total['max_queue_depth'] = max(total['max_queue_depth'], stage['max_queue_depth'])
+
+    def get_stats(self):
+        """Snapshot: runs, per-stage totals (with items per busy second) and the latest run"""
+        with self.lock:
+            totals = {}
+            for name, total in self.totals.items():
+                totals[name] = dict(total)
+                totals[name]['items_per_busy_second'] = (
+                    round(total['items'] / total['busy_seconds'], 3) if total['busy_seconds'] else 0.0)
+            return {'runs': self.runs, 'stages': totals, 'last_run': self.last_run}
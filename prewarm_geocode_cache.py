@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Pre-warm the geocoding cache before a census campaign
+
+Reads a list of areas (regency, kecamatan or desa names, one per line) and looks up every business
+seen in previously processed maps of those areas exactly as the app does, so the first uploads of
+the campaign are served from GEOCODE_CACHE_PATH instead of rate-limited Nominatim calls:
+
+    python prewarm_geocode_cache.py areas.txt --cache geocode_cache.sqlite --rate-limit 1.0
+
+Progress is checkpointed after every lookup; rerunning the same command resumes where it stopped.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from app import (
+    detect_economic_centers,
+    get_geocode_cache,
+    iter_processed_maps,
+    normalize_admin_name,
+    search_business_info_improved
+)
+
+def read_areas(path):
+    """Area names from a text file, skipping blank lines and # comments"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+def collect_tasks(areas):
+    """
+    (area, business name, location) lookups for every business of the stored maps in the given areas
+    Location follows the app: the map's regency, or Indonesia when unknown
+    """
+    wanted = {normalize_admin_name(area): area for area in areas}
+    tasks = {area: [] for area in areas}
+    seen = set()
+    for record in iter_processed_maps():
+        levels = [normalize_admin_name(record.get(field)) for field in ['regency', 'district', 'village']]
+        area = next((wanted[level] for level in levels if level in wanted), None)
+        if area is None:
+            continue
+        location = record.get('regency') or 'Indonesia'
+        for business_name in record.get('businesses') or []:
+            if (business_name, location) not in seen:
+                seen.add((business_name, location))
+                tasks[area].append((business_name, location))
+    return tasks
+
+def task_key(business_name, location):
+    return f"{location}|{business_name}"
+
+def load_checkpoint(path):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'done': {}}
+
+def save_checkpoint(path, checkpoint):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+def warm_business(business_name, location):
+    """
+    Run the app's lookups for one business: the business search and, for malls and markets,
+    the economic center coordinates
+    Returns: 'found', 'not_found' or 'failed' (a lookup hit an error or the open circuit breaker)
+    """
+    before = app.geocoder.get_stats()
+    info = search_business_info_improved(business_name, location)
+    detect_economic_centers([business_name], {business_name: {}})
+    after = app.geocoder.get_stats()
+
+    if after['failures'] > before['failures'] or after['breaker_rejections'] > before['breaker_rejections']:
+        return 'failed'
+    return 'found' if info else 'not_found'
+
+def prewarm(areas, checkpoint_path):
+    """Warm the cache for all areas; returns the coverage report"""
+    tasks = collect_tasks(areas)
+    checkpoint = load_checkpoint(checkpoint_path)
+    done = checkpoint['done']
+    report = {'areas': {}, 'stopped_early': False}
+
+    for area, area_tasks in tasks.items():
+        counts = {'businesses': len(area_tasks), 'found': 0, 'not_found': 0, 'failed': 0, 'remaining': 0}
+        for business_name, location in area_tasks:
+            key = task_key(business_name, location)
+            if key not in done and not report['stopped_early']:
+                outcome = warm_business(business_name, location)
+                print(f"[{area}] {business_name}: {outcome}")
+                if outcome == 'failed':
+                    counts['failed'] += 1
+                    if app.geocoder.breaker_is_open():
+                        print("Geocoding circuit breaker is open, stopping. Rerun later to resume.")
+                        report['stopped_early'] = True
+                    continue
+                done[key] = outcome
+                save_checkpoint(checkpoint_path, checkpoint)
+            if key in done:
+                counts[done[key]] += 1
+            else:
+                counts['remaining'] += 1
+
+        warmed = counts['found'] + counts['not_found']
+        counts['coverage'] = round(warmed / counts['businesses'], 3) if counts['businesses'] else 0.0
+        report['areas'][area] = counts
+
+    cache = get_geocode_cache()
+    report['cache_entries'] = len(cache) if cache is not None else 0
+    report['geocoding'] = app.geocoder.get_stats()
+    return report
+
+def print_report(report):
+    print("=" * 60)
+    print(f"{'Area':<25}{'Bisnis':>8}{'Ditemukan':>11}{'Tidak':>7}{'Sisa':>7}{'Cakupan':>10}")
+    for area, counts in report['areas'].items():
+        print(f"{area:<25}{counts['businesses']:>8}{counts['found']:>11}{counts['not_found']:>7}"
+              f"{counts['failed'] + counts['remaining']:>7}{counts['coverage']:>10.0%}")
+        if not counts['businesses']:
+            print(f"   (belum ada peta terproses untuk {area})")
+    stats = report['geocoding']
+    print(f"Cache entries: {report['cache_entries']}, network calls: {stats['calls']}, cache hits: {stats['cache_hits']}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-warm the geocoding cache for a list of areas')
+    parser.add_argument('areas_file', help='Text file with one regency/kecamatan/desa per line')
+    parser.add_argument('--cache', default=app.app.config['GEOCODE_CACHE_PATH'] or 'geocode_cache.sqlite',
+                        help='Geocoding cache file (GEOCODE_CACHE_PATH)')
+    parser.add_argument('--maps-folder', default=app.app.config['PROCESSED_MAPS_FOLDER'],
+                        help='Folder of processed maps (PROCESSED_MAPS_FOLDER)')
+    parser.add_argument('--rate-limit', type=float, default=1.0, help='Minimum seconds between Nominatim requests')
+    parser.add_argument('--checkpoint', default='prewarm_checkpoint.json', help='Resume file')
+    parser.add_argument('--report', help='Write the coverage report to this JSON file')
+    args = parser.parse_args()
+
+    app.app.config['GEOCODE_CACHE_PATH'] = args.cache
+    app.app.config['PROCESSED_MAPS_FOLDER'] = args.maps_folder
+    app.geocoder.min_interval = args.rate_limit
+
+    report = prewarm(read_areas(args.areas_file), args.checkpoint)
+    print_report(report)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+
+if __name__ == '__main__':
+    main()
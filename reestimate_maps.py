@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Re-estimate stored maps after an estimation rule change
+
+Re-runs the segment (BLOK III) and economic center estimates of every processed map with the
+current rules, as one batch and without OCR or geocoding, stores the new figures in each map
+record and reports what changed:
+
+    python reestimate_maps.py --report perubahan_estimasi.csv
+    python reestimate_maps.py 5171030005000103 --dry-run
+
+Maps stored before the estimation inputs were kept are re-scanned from their OCR text.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from app import reestimate_processed_maps
+
+def summarize(records, report):
+    """Per-kind totals of the diff report, for the console"""
+    changed_maps = report['map_id'].nunique() if len(report) else 0
+    summary = {'maps': len(records), 'changed_maps': changed_maps, 'changes': len(report)}
+    totals = report[(report['kind'] == 'segment') & (report['field'] == 'total_muatan')]
+    summary['total_muatan_change'] = totals['change'].fillna(0).sum() if len(totals) else 0
+    centers = report[(report['kind'] == 'economic_center') & (report['field'] == 'estimated_umkm')]
+    summary['umkm_change'] = centers['change'].fillna(0).sum() if len(centers) else 0
+    return summary
+
+def print_summary(summary):
+    print("=" * 60)
+    print(f"Peta diestimasi ulang : {summary['maps']}")
+    print(f"Peta berubah          : {summary['changed_maps']}")
+    print(f"Nilai berubah         : {summary['changes']}")
+    print(f"Perubahan total muatan: {summary['total_muatan_change']:+g}")
+    print(f"Perubahan UMKM pusat ekonomi: {summary['umkm_change']:+g}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-estimate segments and economic centers of stored maps')
+    parser.add_argument('map_ids', nargs='*', help='Map IDs to re-estimate (default: all stored maps)')
+    parser.add_argument('--maps-folder', default=app.app.config['PROCESSED_MAPS_FOLDER'],
+                        help='Folder of processed maps (PROCESSED_MAPS_FOLDER)')
+    parser.add_argument('--report', help='Write the diff report to this CSV file')
+    parser.add_argument('--dry-run', action='store_true', help='Report only, keep the stored figures')
+    args = parser.parse_args()
+
+    app.app.config['PROCESSED_MAPS_FOLDER'] = args.maps_folder
+    records, report = reestimate_processed_maps(args.map_ids or None, write=not args.dry_run)
+    print_summary(summarize(records, report))
+    if args.report:
+        report.to_csv(args.report, index=False)
+        print(f"Laporan perubahan: {args.report}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+Pure-Python spatial helpers for the WSS Map Extractor
+Coordinates are (lon, lat) pairs as in GeoJSON, or (x, y) image pixels for OCR layouts
+"""
+
+import math
+
+def point_in_ring(lon, lat, ring):
+    """Ray-casting test of a point against one closed linear ring"""
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i][0], ring[i][1]
+        xj, yj = ring[j][0], ring[j][1]
+        if (yi > lat) != (yj > lat) and lon < (xj - xi) * (lat - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+def point_in_polygon(lon, lat, polygon):
+    """Point-in-polygon for a GeoJSON Polygon coordinate list: outer ring followed by holes"""
+    if not polygon or not point_in_ring(lon, lat, polygon[0]):
+        return False
+    return not any(point_in_ring(lon, lat, hole) for hole in polygon[1:])
+
+def geometry_polygons(geometry):
+    """List of Polygon coordinate lists of a GeoJSON Polygon/MultiPolygon geometry"""
+    if not geometry:
+        return []
+    if geometry.get('type') == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry.get('type') == 'MultiPolygon':
+        return list(geometry['coordinates'])
+    return []
+
+def polygon_bounds(polygon):
+    """(min_lon, min_lat, max_lon, max_lat) of a polygon's outer ring"""
+    lons = [point[0] for point in polygon[0]]
+    lats = [point[1] for point in polygon[0]]
+    return min(lons), min(lats), max(lons), max(lats)
+
+class PolygonGridIndex:
+    """
+    Uniform grid over polygon bounding boxes
+    A lookup only runs point-in-polygon against the few polygons registered in the point's cell
+    """
+
+    def __init__(self, cell_size=0.01):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entries = []
+
+    def _cell(self, lon, lat):
+        return math.floor(lon / self.cell_size), math.floor(lat / self.cell_size)
+
+    def add(self, polygon, payload):
+        """Register one GeoJSON Polygon coordinate list with the payload returned on a hit"""
+        min_lon, min_lat, max_lon, max_lat = polygon_bounds(polygon)
+        entry_id = len(self.entries)
+        self.entries.append((polygon, (min_lon, min_lat, max_lon, max_lat), payload))
+        min_x, min_y = self._cell(min_lon, min_lat)
+        max_x, max_y = self._cell(max_lon, max_lat)
+        for x in range(min_x, max_x + 1):
+            for y in range(min_y, max_y + 1):
+                self.cells.setdefault((x, y), []).append(entry_id)
+
+    def lookup(self, lat, lon):
+        """Payload of the first polygon containing the point, or None"""
+        for entry_id in self.cells.get(self._cell(lon, lat), ()):
+            polygon, (min_lon, min_lat, max_lon, max_lat), payload = self.entries[entry_id]
+            if min_lon <= lon <= max_lon and min_lat <= lat <= max_lat and point_in_polygon(lon, lat, polygon):
+                return payload
+        return None
+
+    def __len__(self):
+        return len(self.entries)
+
+class PointGridIndex:
+    """
+    Uniform grid over points (e.g. centers of OCR text boxes)
+    Nearest-neighbour search visits rings of cells outward from the query point and stops once
+    no unvisited cell can hold a closer point, so a query only looks at the points nearby
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = float(cell_size)
+        self.cells = {}
+        self.size = 0
+        self.bounds = None
+
+    def _cell(self, x, y):
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def add(self, x, y, payload):
+        cell = self._cell(x, y)
+        self.cells.setdefault(cell, []).append((x, y, payload))
+        self.size += 1
+        if self.bounds is None:
+            self.bounds = [cell[0], cell[1], cell[0], cell[1]]
+        else:
+            self.bounds = [min(self.bounds[0], cell[0]), min(self.bounds[1], cell[1]),
+                           max(self.bounds[2], cell[0]), max(self.bounds[3], cell[1])]
+
+    def nearest(self, x, y):
+        """(distance, payload) of the point closest to (x, y), or None when the index is empty"""
+        if not self.size:
+            return None
+        cx, cy = self._cell(x, y)
+        low_x, low_y, high_x, high_y = self.bounds
+        # Rings before the first one reaching the occupied cells, and after the last, are empty
+        first_ring = max(low_x - cx, cx - high_x, low_y - cy, cy - high_y, 0)
+        last_ring = max(cx - low_x, high_x - cx, cy - low_y, high_y - cy)
+        best = None
+        visited = 0
+        for ring in range(first_ring, last_ring + 1):
+            # Every point in ring r is at least (r - 1) cells away from the query point
+            if best is not None and best[0] <= (ring - 1) * self.cell_size:
+                break
+            for cell in self._ring_cells(cx, cy, ring):
+                visited += 1
+                for px, py, payload in self.cells.get(cell, ()):
+                    distance = math.hypot(px - x, py - y)
+                    if best is None or distance < best[0]:
+                        best = (distance, payload)
+            # On a grid too fine for its points, scanning every occupied cell is cheaper
+            if visited > len(self.cells):
+                for points in self.cells.values():
+                    for px, py, payload in points:
+                        distance = math.hypot(px - x, py - y)
+                        if best is None or distance < best[0]:
+                            best = (distance, payload)
+                break
+        return best
+
+    def within(self, min_x, min_y, max_x, max_y):
+        """Payloads of every point inside the rectangle"""
+        if not self.size:
+            return []
+        low_x, low_y = self._cell(min_x, min_y)
+        high_x, high_y = self._cell(max_x, max_y)
+        range_x = range(max(low_x, self.bounds[0]), min(high_x, self.bounds[2]) + 1)
+        range_y = range(max(low_y, self.bounds[1]), min(high_y, self.bounds[3]) + 1)
+        if len(range_x) * len(range_y) > len(self.cells):
+            cells = (points for cell, points in self.cells.items() if cell[0] in range_x and cell[1] in range_y)
+        else:
+            cells = (self.cells.get((gx, gy), ()) for gx in range_x for gy in range_y)
+        return [payload for points in cells for px, py, payload in points
+                if min_x <= px <= max_x and min_y <= py <= max_y]
+
+    def within_radius(self, x, y, radius):
+        """Payloads of every point within radius of (x, y)"""
+        if not self.size:
+            return []
+        low_x, low_y = self._cell(x - radius, y - radius)
+        high_x, high_y = self._cell(x + radius, y + radius)
+        found = []
+        for gx in range(max(low_x, self.bounds[0]), min(high_x, self.bounds[2]) + 1):
+            for gy in range(max(low_y, self.bounds[1]), min(high_y, self.bounds[3]) + 1):
+                for px, py, payload in self.cells.get((gx, gy), ()):
+                    if math.hypot(px - x, py - y) <= radius:
+                        found.append(payload)
+        return found
+
+    def _ring_cells(self, cx, cy, ring):
+        """Cells at Chebyshev distance ring from (cx, cy), clipped to the occupied cells"""
+        low_x, low_y, high_x, high_y = self.bounds
+        if ring == 0:
+            yield cx, cy
+            return
+        for gy in (cy - ring, cy + ring):
+            if low_y <= gy <= high_y:
+                for gx in range(max(cx - ring, low_x), min(cx + ring, high_x) + 1):
+                    yield gx, gy
+        for gx in (cx - ring, cx + ring):
+            if low_x <= gx <= high_x:
+                for gy in range(max(cy - ring + 1, low_y), min(cy + ring - 1, high_y) + 1):
+                    yield gx, gy
+
+    def __len__(self):
+        return self.size
+
+def dbscan(points, radius, min_points):
+    """
+    Density-based clustering (DBSCAN) of (x, y) points
+    A point with at least min_points points (itself included) within radius is a core point;
+    a cluster is a set of cores linked through each other plus the points they reach
+    Returns: cluster label (0, 1, ...) per point in input order, -1 for noise
+    """
+    grid = PointGridIndex(radius)
+    for index, (x, y) in enumerate(points):
+        grid.add(x, y, index)
+    labels = [None] * len(points)
+    cluster = 0
+    for index, (x, y) in enumerate(points):
+        if labels[index] is not None:
+            continue
+        neighbours = grid.within_radius(x, y, radius)
+        if len(neighbours) < min_points:
+            labels[index] = -1
+            continue
+        labels[index] = cluster
+        queue = list(neighbours)
+        while queue:
+            other = queue.pop()
+            if labels[other] == -1:
+                labels[other] = cluster  # Border point
+            if labels[other] is not None:
+                continue
+            labels[other] = cluster
+            reached = grid.within_radius(points[other][0], points[other][1], radius)
+            if len(reached) >= min_points:
+                queue.extend(reached)
+        cluster += 1
+    return labels
+
+def local_meters(lat, lon, origin_lat):
+    """(x, y) in meters of a lat/lon point, equirectangular around origin_lat (fine within a city)"""
+    return lon * 111320 * math.cos(math.radians(origin_lat)), lat * 110574
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script untuk indeks batas wilayah lokal (reverse lookup dan validasi koordinat)
+"""
+
+import sys
+import os
+import json
+import tempfile
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from app import reverse_lookup_admin, get_precise_coordinates, geocoding_fixture_key
+from mock_nominatim import mock_nominatim_server
+
+def village(name, district, west, south, east, north, holes=()):
+    ring = [[west, south], [east, south], [east, north], [west, north], [west, south]]
+    return {
+        'type': 'Feature',
+        'properties': {'PROVINSI': 'BALI', 'KABUPATEN': 'KOTA DENPASAR', 'KECAMATAN': district, 'DESA': name},
+        'geometry': {'type': 'Polygon', 'coordinates': [ring] + [list(hole) for hole in holes]}
+    }
+
+BOUNDARIES = {
+    'type': 'FeatureCollection',
+    'features': [
+        village('DAUH PURI', 'DENPASAR BARAT', 115.200, -8.670, 115.215, -8.650,
+                holes=[[[115.205, -8.662], [115.207, -8.662], [115.207, -8.660], [115.205, -8.660], [115.205, -8.662]]]),
+        village('DANGIN PURI', 'DENPASAR TIMUR', 115.215, -8.670, 115.230, -8.650)
+    ]
+}
+
+@contextmanager
+def boundary_file():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'desa.geojson')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(BOUNDARIES, f)
+        previous_path = app.app.config['ADMIN_BOUNDARY_PATH']
+        app.app.config['ADMIN_BOUNDARY_PATH'] = path
+        try:
+            yield path
+        finally:
+            app.app.config['ADMIN_BOUNDARY_PATH'] = previous_path
+
+def nominatim_result(name, lat, lon, importance):
+    return {'lat': str(lat), 'lon': str(lon), 'importance': importance, 'display_name': name,
+            'address': {'state': 'Bali', 'suburb': 'Nominatim Suburb'}, 'extratags': {'amenity': 'bank'}}
+
+def test_reverse_lookup():
+    """Test reverse lookup titik ke desa/kecamatan"""
+    print("🧪 Testing Admin Boundary Reverse Lookup")
+    print("=" * 50)
+
+    with boundary_file():
+        admin = reverse_lookup_admin(-8.655, 115.210)
+        print(f"   (-8.655, 115.210) -> {admin}")
+        assert admin['village'] == 'DAUH PURI' and admin['district'] == 'DENPASAR BARAT'
+        assert admin['province'] == 'BALI'
+
+        admin = reverse_lookup_admin(-8.655, 115.220)
+        print(f"   (-8.655, 115.220) -> {admin}")
+        assert admin['village'] == 'DANGIN PURI'
+
+        assert reverse_lookup_admin(-8.661, 115.206) == {}, "Titik di dalam lubang poligon bukan bagian desa"
+        assert reverse_lookup_admin(-8.800, 115.210) == {}
+
+def test_reject_outside_map_area():
+    """Test hasil geocoding di luar desa peta ditolak dan field wilayah diisi dari indeks"""
+    print("\n🧪 Testing Rejection Outside Map Area")
+    print("=" * 50)
+
+    query = urlencode({'q': 'Bank BCA, Indonesia', 'format': 'json', 'limit': 10,
+                       'addressdetails': 1, 'extratags': 1, 'polygon': 1})
+    recordings = {geocoding_fixture_key('GET', '/search', query): {'status': 200, 'body': [
+        nominatim_result('Bank BCA Dangin Puri', -8.655, 115.220, 0.6),
+        nominatim_result('Bank BCA Dauh Puri', -8.655, 115.210, 0.4)
+    ]}}
+
+    with boundary_file(), mock_nominatim_server(recordings):
+        coords = get_precise_coordinates("Bank BCA", "Indonesia", {'district': 'DENPASAR BARAT', 'village': 'Kelurahan Dauh Puri'})
+        print(f"   Expected Dauh Puri -> {coords.get('coordinates')} ({coords.get('village')})")
+        assert coords['validated'] and coords['latitude'] == '-8.655000' and coords['longitude'] == '115.210000'
+        assert coords['village'] == 'DAUH PURI' and coords['district'] == 'DENPASAR BARAT'
+
+        coords = get_precise_coordinates("Bank BCA", "Indonesia")
+        print(f"   No expected area -> {coords.get('coordinates')} ({coords.get('village')})")
+        assert coords['longitude'] == '115.220000' and coords['village'] == 'DANGIN PURI'
+
+        coords = get_precise_coordinates("Bank BCA", "Indonesia", {'village': 'PEMECUTAN'})
+        print(f"   Expected Pemecutan -> {coords}")
+        assert not coords['validated'] and coords['error'] == 'Koordinat di luar wilayah peta'
+
+if __name__ == "__main__":
+    test_reverse_lookup()
+    test_reject_outside_map_area()
+    print("\n✅ All admin boundary tests passed!")
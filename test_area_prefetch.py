@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script untuk mode enrichment area (satu kali tarik POI per peta)
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from app import build_area_poi_index, match_area_poi, area_poi_to_business_info, fetch_area_pois
+
+SAMPLE_ELEMENTS = [
+    {'type': 'node', 'id': 1, 'lat': -8.6551, 'lon': 115.2094,
+     'tags': {'name': 'Pasar Kumbasari', 'amenity': 'marketplace', 'opening_hours': '06:00-18:00'}},
+    {'type': 'node', 'id': 2, 'lat': -8.6560, 'lon': 115.2101,
+     'tags': {'name': 'Bank BCA Gajah Mada', 'amenity': 'bank', 'phone': '+62 361 123456'}},
+    {'type': 'way', 'id': 3, 'center': {'lat': -8.6572, 'lon': 115.2110},
+     'tags': {'name': 'Toko Sederhana', 'shop': 'convenience', 'addr:street': 'Jalan Gajah Mada'}},
+    {'type': 'node', 'id': 4, 'lat': -8.7900, 'lon': 115.1700,
+     'tags': {'name': 'Hotel Jauh Sekali', 'tourism': 'hotel'}},
+    {'type': 'node', 'id': 5, 'lat': -8.6565, 'lon': 115.2105, 'tags': {'amenity': 'bench'}}
+]
+
+def test_area_poi_matching():
+    """Test pencocokan nama bisnis OCR dengan POI area"""
+    print("🧪 Testing Area POI Matching")
+    print("=" * 50)
+
+    area_index = build_area_poi_index(SAMPLE_ELEMENTS)
+    print(f"   Indexed POIs: {len(area_index['pois'])}")
+    assert len(area_index['pois']) == 4, "POI tanpa nama harus diabaikan"
+
+    poi = match_area_poi("PASAR KUMBASARI", area_index)
+    print(f"   PASAR KUMBASARI -> {poi['name'] if poi else None}")
+    assert poi and poi['name'] == 'Pasar Kumbasari'
+
+    poi = match_area_poi("Bank BCA", area_index)
+    print(f"   Bank BCA -> {poi['name'] if poi else None}")
+    assert poi and poi['name'] == 'Bank BCA Gajah Mada'
+
+    poi = match_area_poi("Warung Tidak Ada", area_index)
+    print(f"   Warung Tidak Ada -> {poi}")
+    assert poi is None
+
+    info = area_poi_to_business_info(match_area_poi("Toko Sederhana", area_index), 'store', {'village': 'DAUH PURI'})
+    print(f"   Toko Sederhana info: {info}")
+    assert info['latitude'] == '-8.657200'
+    assert info['address'] == 'Toko Sederhana, Jalan Gajah Mada'
+    assert info['village'] == 'DAUH PURI'
+    assert info['operational_hours'] == '08:00-17:00'
+
+def test_local_extract_bbox_filter():
+    """Test pemuatan extract lokal dan filter bounding box desa"""
+    print("\n🧪 Testing Local Extract Bounding Box Filter")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        extract_path = os.path.join(tmp_dir, 'extract.json')
+        with open(extract_path, 'w', encoding='utf-8') as f:
+            json.dump({'elements': SAMPLE_ELEMENTS}, f)
+
+        previous_path = app.app.config['POI_EXTRACT_PATH']
+        app.app.config['POI_EXTRACT_PATH'] = extract_path
+        try:
+            elements = fetch_area_pois((-8.66, 115.20, -8.65, 115.22))
+        finally:
+            app.app.config['POI_EXTRACT_PATH'] = previous_path
+
+    names = [element.get('tags', {}).get('name') for element in elements]
+    print(f"   Elements in bbox: {names}")
+    assert 'Hotel Jauh Sekali' not in names, "POI di luar bbox harus disaring"
+    assert 'Pasar Kumbasari' in names
+
+def test_parse_in_area_mode():
+    """Test parsing peta dengan mode area: satu kali prefetch, tanpa pencarian per bisnis"""
+    print("\n🧪 Testing Parse In Area Mode")
+    print("=" * 50)
+
+    text = """
+    5171030005000103
+    Provinsi : [51] BALI
+    Kabupaten/Kota : [71] DENPASAR
+    Kecamatan : [030] DENPASAR BARAT
+    Desa/Kelurahan : [005] DAUH PURI
+    Pasar Kumbasari
+    Bank BCA
+    Toko Sederhana
+    Koordinat: -8.6551, 115.2094
+    """
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        extract_path = os.path.join(tmp_dir, 'extract.json')
+        with open(extract_path, 'w', encoding='utf-8') as f:
+            json.dump({'elements': SAMPLE_ELEMENTS}, f)
+
+        previous = dict(app.app.config)
+        previous_bbox = app.get_village_bbox
+        previous_search = app.search_business_info_improved
+        searches = []
+        app.app.config['POI_EXTRACT_PATH'] = extract_path
+        app.app.config['ENRICHMENT_MODE'] = 'area'
+        app.get_village_bbox = lambda wss_data: (-8.66, 115.20, -8.65, 115.22)
+        app.search_business_info_improved = lambda *args, **kwargs: searches.append(args) or {}
+        app.area_poi_cache.clear()
+        try:
+            data = app.parse_wss_data_improved(text)
+        finally:
+            app.app.config.update(previous)
+            app.get_village_bbox = previous_bbox
+            app.search_business_info_improved = previous_search
+            app.area_poi_cache.clear()
+
+    print(f"   Businesses: {data['businesses']}")
+    print(f"   Per-business searches: {len(searches)}")
+    assert not searches, "Mode area tidak boleh mencari per bisnis"
+    assert data['business_details']['Pasar Kumbasari']['coordinates'] == '-8.655100, 115.209400'
+    assert data['business_details']['Pasar Kumbasari']['operational_hours'] == '06:00-18:00'
+    centers = {center['name']: center for center in data['economic_centers']}
+    assert centers['Pasar Kumbasari']['latitude'] == '-8.655100'
+
+if __name__ == "__main__":
+    test_area_poi_matching()
+    test_local_extract_bbox_filter()
+    test_parse_in_area_mode()
+    print("\n✅ All area prefetch tests passed!")
@@ -10,6 +10,9 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app import extract_contextual_data
+from mock_nominatim import mock_nominatim_server
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'nominatim_recordings.json')
 
 def test_contextual_extraction():
     """Test the contextual data extraction function"""
@@ -106,7 +109,8 @@ def test_contextual_extraction():
         
         try:
             # Extract contextual data
-            result = extract_contextual_data(test_case['text'])
+            with mock_nominatim_server(FIXTURES_PATH):
+                result = extract_contextual_data(test_case['text'])
             
             # Check if result is a dictionary
             if isinstance(result, dict):
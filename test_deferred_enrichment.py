@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script untuk enrichment detail bisnis yang ditunda (on-demand)
+"""
+
+import sys
+import os
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+
+SAMPLE_TEXT = """
+5171030005000103
+Provinsi : [51] BALI
+Kabupaten/Kota : [71] DENPASAR
+Kecamatan : [030] DENPASAR BARAT
+Desa/Kelurahan : [005] DAUH PURI
+Mall Bali Galeria
+Warung Makan Sederhana
+"""
+
+def test_on_demand_business_details():
+    """Test preview tanpa enrichment, lalu detail bisnis diisi saat endpoint per-peta diminta"""
+    print("🧪 Testing On-Demand Business Details")
+    print("=" * 50)
+
+    lookups = []
+
+    def fake_business_info(business_name, location="Indonesia", expected_admin=None):
+        lookups.append(business_name)
+        return {'operational_hours': '10:00-22:00', 'latitude': '-8.700000', 'longitude': '115.200000',
+                'coordinates': '-8.700000, 115.200000', 'validated': True, 'accuracy': 'high'}
+
+    previous_search = app.search_business_info_improved
+    app.search_business_info_improved = fake_business_info
+    app.enrichment_results.clear()
+    client = app.app.test_client()
+    try:
+        wss_data = app.parse_wss_data_improved(SAMPLE_TEXT, deadline=time.monotonic(), start_background=False)
+        app.register_map_preview(wss_data['map_id'], wss_data)
+        print(f"   Lookups during parse: {lookups}")
+        assert not lookups, "Preview tidak boleh menunggu geocoding"
+
+        time.sleep(0.1)
+        assert not lookups, "Mode on-demand tidak boleh mulai sebelum diminta"
+
+        response = client.get(f"/maps/{wss_data['map_id']}/business-details?wait=5")
+        details = response.get_json()
+        print(f"   Endpoint status: {details['status']}")
+        print(f"   Lookups after request: {lookups}")
+
+        missing = client.get("/maps/0000000000000000/business-details")
+    finally:
+        app.search_business_info_improved = previous_search
+        app.enrichment_results.clear()
+
+    assert response.status_code == 200
+    assert details['status'] == 'ready'
+    assert details['business_details']['Mall Bali Galeria']['operational_hours'] == '10:00-22:00'
+    assert 'status' not in details['business_details']['Warung Makan Sederhana']
+    mall = [center for center in details['economic_centers'] if center['name'] == 'Mall Bali Galeria'][0]
+    assert mall['latitude'] == '-8.700000'
+    assert missing.status_code == 404
+
+if __name__ == "__main__":
+    test_on_demand_business_details()
+    print("\n✅ All deferred enrichment tests passed!")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script untuk klaster usaha dari koordinat dan anggota UMKM pusat ekonomi
+"""
+
+import sys
+import os
+import random
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from app import candidate_economic_centers, cluster_businesses, detect_economic_centers, find_business_cluster, parse_coordinate_pair
+from spatial import dbscan
+
+def details_at(lat, lon):
+    return {'coordinates': f"{lat:.6f}, {lon:.6f}"}
+
+# A market with four shops around it, two shops together elsewhere and one shop on its own
+BUSINESS_DETAILS = {
+    'Pasar Kumbasari': details_at(-8.657000, 115.211000),
+    'Warung Makan Sari': details_at(-8.657300, 115.211200),
+    'Toko Kain Ayu': details_at(-8.656800, 115.210700),
+    'Bengkel Motor Jaya': details_at(-8.657600, 115.211500),
+    'Apotek Sehat': details_at(-8.657900, 115.211800),
+    'Salon Ayu': details_at(-8.670000, 115.230000),
+    'Bank BCA': details_at(-8.670200, 115.230100),
+    'Toko Jauh': details_at(-8.700000, 115.260000),
+    'Toko Tanpa Koordinat': {},
+    'Toko Koordinat Rusak': {'coordinates': 'Tidak tersedia'}
+}
+
+def test_dbscan_matches_brute_force():
+    """Test label DBSCAN dengan indeks grid sama dengan pencarian tetangga linear"""
+    print("🧪 Testing Grid DBSCAN")
+    print("=" * 50)
+
+    rng = random.Random(47)
+    points = [(rng.gauss(cx, 30), rng.gauss(cy, 30)) for cx, cy in [(0, 0), (500, 200), (900, 900)] for _ in range(40)]
+    points += [(rng.uniform(-500, 1500), rng.uniform(-500, 1500)) for _ in range(40)]
+    labels = dbscan(points, 50, 4)
+
+    def neighbours(i):
+        return [j for j, (x, y) in enumerate(points)
+                if (x - points[i][0]) ** 2 + (y - points[i][1]) ** 2 <= 50 ** 2]
+    core = [len(neighbours(i)) >= 4 for i in range(len(points))]
+    for i, label in enumerate(labels):
+        if core[i]:
+            assert all(labels[j] == label for j in neighbours(i) if core[j])
+        elif label >= 0:
+            assert any(core[j] and labels[j] == label for j in neighbours(i))
+        else:
+            assert not any(core[j] for j in neighbours(i))
+    print(f"   {len(set(labels) - {-1})} clusters, {labels.count(-1)} noise points")
+    assert len(set(labels) - {-1}) >= 3
+    assert dbscan([], 50, 4) == []
+
+def test_cluster_businesses():
+    """Test usaha yang berdekatan menjadi satu klaster dan usaha tanpa koordinat diabaikan"""
+    print("\n🧪 Testing Business Clusters")
+    print("=" * 50)
+
+    assert parse_coordinate_pair('-8.657000, 115.211000') == (-8.657, 115.211)
+    assert parse_coordinate_pair('40.7, -74.0') is None and parse_coordinate_pair('') is None
+
+    clusters = cluster_businesses(BUSINESS_DETAILS, radius_m=100, min_businesses=3)
+    for cluster in clusters:
+        print(f"   {cluster['size']} usaha di {cluster['latitude']}, {cluster['longitude']}: {cluster['members']}")
+    assert len(clusters) == 1
+    assert set(clusters[0]['members']) == {'Pasar Kumbasari', 'Warung Makan Sari', 'Toko Kain Ayu',
+                                           'Bengkel Motor Jaya', 'Apotek Sehat'}
+    assert cluster_businesses(BUSINESS_DETAILS, radius_m=100, min_businesses=2)[1]['members'] == ['Salon Ayu', 'Bank BCA']
+    assert cluster_businesses({}) == []
+
+def test_centers_reuse_coordinates_and_get_members():
+    """Test pusat ekonomi memakai koordinat yang sudah ada (tanpa geocoding) dan mendapat anggota klasternya"""
+    print("\n🧪 Testing Economic Centers From Clusters")
+    print("=" * 50)
+
+    lookups = []
+
+    def counting_coordinates(business_name, location="Indonesia", expected_admin=None):
+        lookups.append(business_name)
+        return {}
+
+    previous = app.get_precise_coordinates
+    app.get_precise_coordinates = counting_coordinates
+    try:
+        clusters = cluster_businesses(BUSINESS_DETAILS, radius_m=100, min_businesses=3)
+        centers = detect_economic_centers(list(BUSINESS_DETAILS), BUSINESS_DETAILS, clusters=clusters)
+        unlocated = detect_economic_centers(['Pasar Baru'], {'Pasar Baru': {}})
+    finally:
+        app.get_precise_coordinates = previous
+
+    market = centers[0]
+    print(f"   {market['name']}: {market['cluster_size']} UMKM sekitar, lookups {lookups}")
+    assert [center['name'] for center in centers] == ['Pasar Kumbasari']
+    assert market['latitude'] == '-8.657000' and market['validated']
+    assert market['cluster_size'] == 4 and 'Pasar Kumbasari' not in market['cluster_members']
+    assert clusters[0]['center'] == 'Pasar Kumbasari'
+    assert lookups == ['Pasar Baru'], "Hanya pusat ekonomi tanpa koordinat yang dicari"
+    assert unlocated[0]['cluster_members'] == [] and unlocated[0]['cluster_size'] == 0
+
+def test_candidate_centers():
+    """Test klaster tanpa mall/pasar menjadi kandidat pusat ekonomi dan dicocokkan lewat titik tengahnya"""
+    print("\n🧪 Testing Candidate Economic Centers")
+    print("=" * 50)
+
+    clusters = cluster_businesses(BUSINESS_DETAILS, radius_m=100, min_businesses=2)
+    detect_economic_centers(list(BUSINESS_DETAILS), BUSINESS_DETAILS, clusters=clusters)
+    candidates = candidate_economic_centers(clusters)
+    for candidate in candidates:
+        print(f"   {candidate['name']}: {candidate['cluster_members']} di {candidate['coordinates']}")
+    assert [candidate['cluster_members'] for candidate in candidates] == [['Salon Ayu', 'Bank BCA']]
+    assert candidates[0]['type'] == 'klaster' and candidates[0]['estimated_umkm'] == 2
+    assert candidate_economic_centers([]) == []
+
+    # A center outside every cluster joins the one whose centroid is within the radius
+    centroid = f"{clusters[1]['latitude']}, {clusters[1]['longitude']}"
+    assert find_business_cluster('Pasar Baru', {'coordinates': centroid}, clusters, radius_m=10) == 1
+    assert find_business_cluster('Pasar Baru', {'coordinates': '-8.700000, 115.260000'}, clusters, radius_m=10) is None
+
+if __name__ == "__main__":
+    test_dbscan_matches_brute_force()
+    test_cluster_businesses()
+    test_centers_reuse_coordinates_and_get_members()
+    test_candidate_centers()
+    print("\n✅ All economic cluster tests passed!")
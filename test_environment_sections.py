@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script untuk pembagian baris peta ke beberapa lingkungan sekaligus
+"""
+
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import (
+    extract_contextual_data, extract_contextual_sections, generate_segments_from_data, parse_map_text,
+    partition_environment_sections, scan_wss_text, tokenize_wss_text
+)
+
+MULTI_ENVIRONMENT_TEXT = """
+5171030005000103
+Provinsi : [51] BALI
+Perumahan Griya Kenanga
+Warung Makan Sari
+Jl. Kenanga
+Kawasan Industri Sentosa
+Bengkel Motor Jaya
+Apotek Sehat
+Sawah Subak Anggabaya
+Warung Makan Subak
+"""
+
+# Business lines whose names are environment keywords too (toko: komersial, hotel: pariwisata)
+BUSINESS_KEYWORD_TEXT = """
+5171030005000103
+Provinsi : [51] BALI
+LINGKUNGAN Perumahan Griya
+Toko Sinar Jaya
+Warung Bu Ani
+Hotel Bali Indah
+Apotek Sehat
+Jl. Gatot Subroto
+Kawasan Industri Sentosa
+Klinik Sehat Bersama
+"""
+
+SEGMENT_TEXT = """
+5171030005000103
+Warung Makan Sari
+LINGKUNGAN BANJAR SARI [01]
+Bengkel Motor Jaya
+LINGKUNGAN BANJAR KAJA [02]
+Apotek Sehat
+Salon Ayu
+Bank BCA
+"""
+
+def test_partition_sections():
+    """Test setiap baris masuk ke bagian lingkungan terdekat di atasnya dalam satu kali lintas"""
+    print("🧪 Testing Environment Partition")
+    print("=" * 50)
+
+    sections = partition_environment_sections(tokenize_wss_text(MULTI_ENVIRONMENT_TEXT))
+    for section in sections:
+        print(f"   {section['categories']}: {[token['text'] for token in section['lines']]}")
+    assert [section['categories'] for section in sections] == [['perumahan'], ['industri'], ['pertanian']]
+    assert [token['text'] for token in sections[1]['lines']] == ['Kawasan Industri Sentosa', 'Bengkel Motor Jaya', 'Apotek Sehat']
+    assert [token['text'] for token in sections[2]['lines']] == ['Sawah Subak Anggabaya', 'Warung Makan Subak']
+
+def test_business_lines_stay_in_their_section():
+    """Test baris usaha yang memuat kata lingkungan (Toko, Hotel, Klinik) tetap menjadi data, bukan judul bagian"""
+    print("\n🧪 Testing Business Lines With Environment Words")
+    print("=" * 50)
+
+    sections = partition_environment_sections(tokenize_wss_text(BUSINESS_KEYWORD_TEXT))
+    for section in sections:
+        print(f"   {section['categories']}: {[token['text'] for token in section['lines']]}")
+    assert [section['heading']['text'] for section in sections] == ['LINGKUNGAN Perumahan Griya', 'Kawasan Industri Sentosa']
+    assert [token['text'] for token in sections[1]['lines']] == ['Kawasan Industri Sentosa', 'Klinik Sehat Bersama']
+
+    perumahan = extract_contextual_data(BUSINESS_KEYWORD_TEXT, enrich=False)
+    assert perumahan['target_environment'] == 'perumahan'
+    assert perumahan['businesses'] == ['Toko Sinar Jaya', 'Warung Bu Ani', 'Hotel Bali Indah', 'Apotek Sehat']
+    assert perumahan['streets'] == ['Jl. Gatot Subroto']
+
+def test_contextual_data_for_every_environment():
+    """Test data kontekstual semua lingkungan dihasilkan sekaligus tanpa tercampur"""
+    print("\n🧪 Testing Contextual Data Per Environment")
+    print("=" * 50)
+
+    scan = scan_wss_text(MULTI_ENVIRONMENT_TEXT)
+    sections = extract_contextual_sections(MULTI_ENVIRONMENT_TEXT, scan=scan, enrich=False)
+    for category, data in sections.items():
+        print(f"   {category}: {data['businesses']} ({data['area_type']})")
+    assert set(sections) == {'perumahan', 'industri', 'pertanian'}
+    assert sections['perumahan']['businesses'] == ['Warung Makan Sari']
+    assert sections['perumahan']['streets'] == ['Jl. Kenanga']
+    assert sections['industri']['businesses'] == ['Bengkel Motor Jaya', 'Apotek Sehat']
+    assert sections['pertanian']['businesses'] == ['Warung Makan Subak']
+
+    # The single-environment API returns only its own sections, not everything after them
+    perumahan = extract_contextual_data(MULTI_ENVIRONMENT_TEXT, scan=scan, enrich=False)
+    assert perumahan['target_environment'] == 'perumahan'
+    assert perumahan['businesses'] == ['Warung Makan Sari']
+    assert extract_contextual_data(MULTI_ENVIRONMENT_TEXT, 'kehutanan', enrich=False)['businesses'] == []
+
+def test_segment_business_counts():
+    """Test jumlah muatan usaha segmen dihitung per lingkungan dari hasil scan"""
+    print("\n🧪 Testing Segment Business Counts")
+    print("=" * 50)
+
+    data = scan_wss_text(SEGMENT_TEXT)['data']
+    print(f"   Counts: {data['environment_business_counts']}")
+    assert data['environment_business_counts'] == {'BANJAR SARI': 2, 'BANJAR KAJA': 3}
+
+    segments = generate_segments_from_data(data)
+    assert [segment['muatan_usaha'] for segment in segments] == [2, 3]
+
+    # Preview data from before the counts existed keeps the previous estimate
+    data.pop('environment_business_counts')
+    data['business_details'] = {name: {} for name in data['businesses']}
+    assert [segment['muatan_usaha'] for segment in generate_segments_from_data(data)] == [5, 5]
+
+def test_preview_lists_every_environment():
+    """Test preview memuat data kontekstual setiap lingkungan, bukan hanya lingkungan target"""
+    print("\n🧪 Testing Contextual Sections In Preview")
+    print("=" * 50)
+
+    preview = parse_map_text(MULTI_ENVIRONMENT_TEXT)['preview']
+    sections = preview['contextual_sections']
+    print(f"   Target: {preview['target_environment']}, sections: {list(sections)}")
+    assert set(sections) == {'perumahan', 'industri', 'pertanian'}
+    assert sections['industri']['businesses'] == ['Bengkel Motor Jaya', 'Apotek Sehat']
+    assert sections[preview['target_environment']]['businesses'] == preview['businesses']
+    assert 'business_details' not in sections['pertanian']
+
+if __name__ == "__main__":
+    test_partition_sections()
+    test_business_lines_stay_in_their_section()
+    test_contextual_data_for_every_environment()
+    test_segment_business_counts()
+    test_preview_lists_every_environment()
+    print("\n✅ All environment section tests passed!")
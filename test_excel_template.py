@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script untuk template Excel yang ditulis baris demi baris (mode write-only)
+"""
+
+import sys
+import os
+import tracemalloc
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from openpyxl import load_workbook
+
+from app import BLOK3_SHEET, BUSINESS_COLUMNS, generate_excel_template
+from excel_writer import column_widths
+
+def map_data(count):
+    names = [f"Warung Makan {number}" for number in range(count)]
+    return {
+        'map_id': '5171030005000103',
+        'province': 'BALI',
+        'village': 'DAUH PURI',
+        'businesses': names,
+        'business_types': {name: 'restaurant' for name in names},
+        'business_details': {name: {'type': 'restaurant', 'latitude': -8.65, 'longitude': 115.22,
+                                    'validated': True, 'address': ''} for name in names},
+        'streets': ['Jl. Kenanga'],
+        'environments': [],
+        'economic_centers': [{'name': 'Pasar Badung', 'type': 'pasar', 'estimated_umkm': 100,
+                              'cluster_members': names[:2], 'cluster_size': 2}],
+        'building_data': {'bangunan_kosong': 1, 'bangunan_usaha': 0,
+                          'details': {'bangunan_kosong': ['Rumah Kosong']}}
+    }
+
+def test_template_sheets():
+    """Test sheet, header, baris kosong dan catatan BLOK III tetap sama dengan template sebelumnya"""
+    print("🧪 Testing Excel Template Sheets")
+    print("=" * 50)
+
+    workbook = load_workbook(generate_excel_template(map_data(3)))
+    print(f"   Sheets: {workbook.sheetnames}")
+    assert workbook.sheetnames == [BLOK3_SHEET, 'Detail Bisnis', 'Pusat Ekonomi', 'Data Bangunan', 'Informasi Peta']
+
+    blok3 = workbook[BLOK3_SHEET]
+    header = blok3['A1']
+    assert header.font.b and header.border.left.style == 'thin' and header.alignment.horizontal == 'center'
+    assert [cell.value for cell in blok3[2]] == [cell.value for cell in blok3[1]], "Baris pertama mengulang nama kolom"
+    note_row = blok3.max_row - 1
+    assert blok3.cell(note_row, 1).value.startswith('Note:') and blok3.cell(note_row - 1, 1).value is None
+    assert blok3.column_dimensions['A'].width == 8 and blok3.column_dimensions['E'].width == 50
+
+    business = workbook['Detail Bisnis']
+    assert [cell.value for cell in business[1]] == BUSINESS_COLUMNS + ['Koordinat']
+    assert business['A2'].value == 'Warung Makan 0' and business['Q2'].value is True
+    assert business['R2'].value is None and business.max_row == 1 + 3 + 10
+    assert workbook['Pusat Ekonomi']['E2'].value == 'Warung Makan 0, Warung Makan 1'
+    assert workbook['Data Bangunan']['B2'].value == 'Rumah Kosong' and workbook['Data Bangunan'].max_row == 7
+    assert workbook['Informasi Peta']['I2'].value == 3
+
+    empty = load_workbook(generate_excel_template({}))
+    assert empty.sheetnames == [BLOK3_SHEET, 'Detail Bisnis', 'Informasi Peta']
+    assert empty['Detail Bisnis'].max_column == 9 and empty['Detail Bisnis'].max_row == 11
+
+def test_column_widths():
+    """Test lebar kolom dari nilai terpanjang, dengan batas maksimum"""
+    print("\n🧪 Testing Column Widths")
+    print("=" * 50)
+
+    widths = column_widths([['No', None, 'x' * 80], [12345, 'Bali', '']])
+    print(f"   Widths: {widths}")
+    assert widths == {'A': 7, 'B': 6, 'C': 50}
+
+def test_memory_stays_flat():
+    """Test puncak memori tidak tumbuh sebanding dengan jumlah bisnis"""
+    print("\n🧪 Testing Flat Memory")
+    print("=" * 50)
+
+    peaks = {}
+    for count in (500, 5000):
+        data = map_data(count)
+        tracemalloc.start()
+        generate_excel_template(data)
+        peaks[count] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    print(f"   Peak MiB: { {count: round(peak / 2 ** 20, 2) for count, peak in peaks.items()} }")
+    assert peaks[5000] < peaks[500] * 3, "10x bisnis tidak boleh menaikkan memori 10x"
+
+if __name__ == "__main__":
+    test_template_sheets()
+    test_column_widths()
+    test_memory_stays_flat()
+    print("\n✅ All Excel template tests passed!")
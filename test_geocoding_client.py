@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script untuk klien geocoding (retry, backoff, circuit breaker, statistik)
+"""
+
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import GeocodingClient, GeocodingUnavailable
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Responds 503 for the first `failures` requests, then 200"""
+    failures = 0
+    seen = 0
+
+    def do_GET(self):
+        FlakyHandler.seen += 1
+        status = 503 if FlakyHandler.seen <= FlakyHandler.failures else 200
+        body = b'[]'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(failures):
+    FlakyHandler.failures = failures
+    FlakyHandler.seen = 0
+    server = HTTPServer(('127.0.0.1', 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/search"
+
+def test_retry_with_backoff():
+    """Test retry pada 5xx sampai berhasil"""
+    print("🧪 Testing Retry With Backoff")
+    print("=" * 50)
+
+    server, url = start_server(failures=2)
+    try:
+        client = GeocodingClient(max_retries=2, backoff_base=0.01, breaker_threshold=10)
+        response = client.get(url, timeout=5)
+        stats = client.get_stats()
+    finally:
+        server.shutdown()
+
+    print(f"   Status: {response.status_code}")
+    print(f"   Stats: {stats}")
+    assert response.status_code == 200
+    assert stats['calls'] == 3
+    assert stats['retries'] == 2
+    assert stats['breaker_state'] == 'closed'
+
+def test_circuit_breaker():
+    """Test circuit breaker terbuka setelah kegagalan berturut-turut dan gagal cepat"""
+    print("\n🧪 Testing Circuit Breaker")
+    print("=" * 50)
+
+    server, url = start_server(failures=100)
+    try:
+        client = GeocodingClient(max_retries=1, backoff_base=0.01, breaker_threshold=3, breaker_cooldown=60)
+        response = client.get(url, timeout=5)
+        assert response.status_code == 503, "Setelah retry habis, respons terakhir dikembalikan"
+
+        # Third consecutive failure trips the breaker; the pending retry fails fast
+        rejected = 0
+        for _ in range(2):
+            try:
+                client.get(url, timeout=5)
+            except GeocodingUnavailable:
+                rejected += 1
+        stats = client.get_stats()
+        requests_seen = FlakyHandler.seen
+    finally:
+        server.shutdown()
+
+    print(f"   Stats: {stats}")
+    assert rejected == 2, "Breaker terbuka harus menolak panggilan"
+    assert stats['breaker_trips'] == 1
+    assert stats['breaker_state'] == 'open'
+    assert requests_seen == 3, "Panggilan setelah breaker terbuka tidak boleh sampai ke server"
+
+if __name__ == "__main__":
+    test_retry_with_backoff()
+    test_circuit_breaker()
+    print("\n✅ All geocoding client tests passed!")
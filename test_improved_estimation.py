@@ -15,6 +15,9 @@ from app import (
     estimate_business_count_improved,
     search_business_info
 )
+from mock_nominatim import mock_nominatim_server
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'nominatim_recordings.json')
 
 def test_residential_detection():
     """Test deteksi area permukiman"""
@@ -79,9 +82,12 @@ def test_business_info_search():
         "Bank BCA Denpasar"
     ]
     
+    with mock_nominatim_server(FIXTURES_PATH):
+        results = {name: search_business_info(name, "Denpasar") for name in test_businesses}
+    
     for business_name in test_businesses:
         print(f"Searching for: {business_name}")
-        business_info = search_business_info(business_name, "Denpasar")
+        business_info = results[business_name]
         
         if business_info:
             print(f"  ✅ Found business info:")
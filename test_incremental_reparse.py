@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script untuk parsing ulang inkremental saat teks OCR dikoreksi per baris
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+import requests
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from app import apply_line_edits
+
+SAMPLE_TEXT = """5171030005000103
+Provinsi : [51] BALI
+Kabupaten/Kota : [71] DENPASAR
+Kecamatan : [030] DENPASAR BARAT
+Desa/Kelurahan : [005] DAUH PURI
+Mall Bali Galeria
+Warung Makan Sederhana
+Toko Sari Makmr"""
+
+def test_apply_line_edits():
+    """Test koreksi baris mengganti, menambah dan menolak nomor baris yang tidak valid"""
+    print("🧪 Testing Line Edits")
+    print("=" * 50)
+
+    text, changed = apply_line_edits("a\nb\nc", [{'line': 2, 'text': 'B'}, {'line': 3, 'text': 'c'},
+                                                 {'line': 4, 'text': 'd'}])
+    assert text == "a\nB\nc\nd" and changed == [2, 4]
+    for edits in ([{'line': 9, 'text': 'x'}], [{'line': 1, 'text': 'x\ny'}], [{'line': '1', 'text': 'x'}]):
+        try:
+            apply_line_edits("a\nb", edits)
+        except ValueError as e:
+            print(f"   Ditolak: {e}")
+        else:
+            raise AssertionError(f"Koreksi {edits} seharusnya ditolak")
+
+def test_edit_reuses_lines_and_lookups():
+    """Test koreksi satu baris hanya memproses baris itu dan hanya mencari bisnis yang baru"""
+    print("\n🧪 Testing Incremental Re-parse")
+    print("=" * 50)
+
+    lookups = []
+    tokenized = []
+
+    def fake_business_info(business_name, location="Indonesia", expected_admin=None):
+        lookups.append(business_name)
+        return {'operational_hours': '10:00-22:00', 'latitude': '-8.650000', 'longitude': '115.220000',
+                'coordinates': '-8.650000, 115.220000', 'validated': True, 'accuracy': 'high'}
+
+    def counting_read(line):
+        tokenized.append(line)
+        return previous['read_wss_line'](line)
+
+    names = ['search_business_info', 'search_business_info_improved', 'get_precise_coordinates', 'read_wss_line']
+    previous = {name: getattr(app, name) for name in names}
+    previous_folder = app.app.config['PROCESSED_MAPS_FOLDER']
+    app.search_business_info = app.memoized_lookup(lambda name, location="Indonesia": fake_business_info(name, location))
+    app.search_business_info_improved = app.memoized_lookup(fake_business_info)
+    app.get_precise_coordinates = app.memoized_lookup(fake_business_info)
+    app.read_wss_line = counting_read
+    app.line_token_cache.clear()
+    client = app.app.test_client()
+    with tempfile.TemporaryDirectory() as folder:
+        app.app.config['PROCESSED_MAPS_FOLDER'] = folder
+        try:
+            # What /upload does after OCR
+            memo = {}
+            with app.enrichment_memo(memo):
+                first = app.parse_map_text(SAMPLE_TEXT, enrich=True, save=True)
+            app.open_edit_session(first['preview']['map_id'], SAMPLE_TEXT, memo)
+            first_lookups, first_lines = len(lookups), len(tokenized)
+            print(f"   Upload: {first_lookups} lookups, {first_lines} lines tokenized")
+
+            start = time.perf_counter()
+            response = client.post('/maps/5171030005000103/text',
+                                   json={'edits': [{'line': 8, 'text': 'Toko Sari Makmur'}]})
+            elapsed = time.perf_counter() - start
+            result = response.get_json()
+            edit_lookups, edit_lines = lookups[first_lookups:], tokenized[first_lines:]
+            print(f"   Edit: {len(edit_lookups)} lookups, {len(edit_lines)} lines tokenized, "
+                  f"{elapsed * 1000:.1f} ms")
+
+            # Unknown maps and invalid edits
+            missing = client.post('/maps/0000000000000000/text', json={'text': SAMPLE_TEXT})
+            invalid = client.post('/maps/5171030005000103/text', json={'edits': [{'line': 99, 'text': 'x'}]})
+
+            # Expired sessions are restored from the processed-map store, without the memo
+            app.edit_sessions.clear()
+            restored = client.post('/maps/5171030005000103/text', json={'edits': [{'line': 7, 'text': 'Warung Makan Sederhana'}]})
+        finally:
+            app.app.config['PROCESSED_MAPS_FOLDER'] = previous_folder
+            for name, function in previous.items():
+                setattr(app, name, function)
+            app.edit_sessions.clear()
+            app.enrichment_results.clear()
+
+    assert response.status_code == 200 and result['changed_lines'] == [8]
+    assert edit_lines == ['Toko Sari Makmur'], "Hanya baris yang dikoreksi yang diproses ulang"
+    assert edit_lookups == ['Toko Sari Makmur'], "Hanya bisnis baru yang dicari"
+    assert 'Toko Sari Makmur' in result['preview']['business_types']
+    assert 'Toko Sari Makmr' not in result['preview']['business_types']
+    assert result['text'].split('\n')[7] == 'Toko Sari Makmur'
+    assert missing.status_code == 404 and invalid.status_code == 400
+    assert restored.status_code == 200 and restored.get_json()['changed_lines'] == []
+
+def test_unfinished_lookups_retried():
+    """Test pencarian yang terputus (circuit terbuka, cache-only) tidak disimpan di memo dan dicari lagi saat koreksi"""
+    print("\n🧪 Testing Unfinished Lookups Are Not Memoized")
+    print("=" * 50)
+
+    text = SAMPLE_TEXT.replace('Mall Bali Galeria', 'Pasar Badung')
+    geocoder = app.geocoder
+    sent = []
+
+    def fake_request(method, url, **kwargs):
+        sent.append(kwargs.get('params', {}).get('q', ''))
+        response = requests.Response()
+        response.status_code, response._content = 200, b'[{"lat": "-8.655000", "lon": "115.215000", "display_name": "Denpasar"}]'
+        return response
+
+    previous_request = geocoder.session.request
+    previous_breaker = (geocoder.consecutive_failures, geocoder.breaker_open_until)
+    previous_config = {key: app.app.config[key] for key in ['PROCESSED_MAPS_FOLDER', 'GEOCODE_CACHE_PATH']}
+    geocoder.session.request = fake_request
+    client = app.app.test_client()
+    with tempfile.TemporaryDirectory() as folder:
+        app.app.config.update(PROCESSED_MAPS_FOLDER=folder, GEOCODE_CACHE_PATH=os.path.join(folder, 'cache.sqlite'))
+        try:
+            memo = {}
+            with app.enrichment_memo(memo), app.geocoding_cache_only(True):
+                missed = app.get_precise_coordinates('Pasar Badung', 'Denpasar')
+            assert missed.get('error') and memo == {}, "Cache miss tidak boleh disimpan di memo"
+
+            # Upload while the circuit is open: every lookup fails fast
+            geocoder.breaker_open_until = time.monotonic() + 60
+            with app.enrichment_memo(memo):
+                first = app.parse_map_text(text, enrich=True, save=True)
+            app.open_edit_session(first['preview']['map_id'], text, memo)
+            print(f"   Upload with open circuit: {len(memo)} memoized, {len(sent)} requests")
+            assert memo == {} and sent == []
+
+            geocoder.consecutive_failures, geocoder.breaker_open_until = 0, 0.0
+            response = client.post('/maps/5171030005000103/text', json={'edits': [{'line': 8, 'text': 'Toko Sari Makmur'}]})
+        finally:
+            geocoder.session.request = previous_request
+            geocoder.consecutive_failures, geocoder.breaker_open_until = previous_breaker
+            app.app.config.update(previous_config)
+            app.edit_sessions.clear()
+            app.enrichment_results.clear()
+
+    print(f"   Edit after the circuit closed: {sent}")
+    assert response.status_code == 200
+    assert any(query.startswith('Pasar Badung') for query in sent), "Pencarian yang terputus dicari lagi"
+    assert any(query.startswith('Warung Makan Sederhana') for query in sent)
+
+if __name__ == "__main__":
+    test_apply_line_edits()
+    test_edit_reuses_lines_and_lookups()
+    test_unfinished_lookups_retried()
+    print("\n✅ All incremental re-parse tests passed!")
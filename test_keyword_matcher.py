@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script untuk keyword matcher Aho-Corasick (satu kali scan untuk semua tabel keyword)
+"""
+
+import sys
+import os
+import random
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from keyword_matcher import KeywordMatcher
+import app
+from app import (
+    KEYWORD_MATCHER,
+    BUSINESS_KEYWORDS,
+    BUILDING_KEYWORDS,
+    ENVIRONMENT_KEYWORDS,
+    classify_name,
+    classify_normalized_name,
+    determine_dominant_load,
+    detect_residential_area,
+    estimate_business_count_improved,
+    estimate_kk_count_improved,
+    get_dominant_load_description,
+    name_classifier_stats
+)
+
+def naive_categories(table, line):
+    """Referensi: cara lama, any(keyword in line.lower()) per kategori"""
+    return [category for category, keywords in table.items()
+            if any(keyword.lower() in line.lower() for keyword in keywords)]
+
+def test_overlapping_keywords():
+    """Test keyword yang saling tumpang tindih dan kapitalisasi"""
+    print("🧪 Testing Overlapping Keywords")
+    print("=" * 50)
+
+    matcher = KeywordMatcher({
+        'demo': {'x': ['he', 'she', 'his', 'hers'], 'pasar_induk': ['Pasar Induk']},
+        'other': {'pasar': ['pasar']}
+    })
+    hits = matcher.scan('uSHErs di PASAR INDUK')
+    print(f"   Hits: {hits.hits}")
+    assert hits.categories('demo') == ['x', 'pasar_induk']
+    assert hits.first('demo') == 'x'
+    assert hits.has('other', 'pasar')
+    assert not matcher.scan('tidak ada').any('demo')
+    assert matcher.scan('').first('demo') is None
+
+def test_equivalence_with_substring_scan():
+    """Test hasil matcher sama dengan scan substring per keyword untuk semua tabel aplikasi"""
+    print("\n🧪 Testing Equivalence With Substring Scan")
+    print("=" * 50)
+
+    words = list(KEYWORD_MATCHER.keywords)
+    words += ['DENPASAR', 'Jl.', 'Gajah Mada', 'Kosong', 'Lingkungan']
+    rng = random.Random(7)
+    lines = [' '.join(rng.choice(words) for _ in range(rng.randint(1, 4))) for _ in range(2000)]
+
+    for line in lines:
+        hits = KEYWORD_MATCHER.scan(line)
+        assert hits.categories('business') == naive_categories(BUSINESS_KEYWORDS, line), line
+        assert hits.categories('building') == naive_categories(BUILDING_KEYWORDS, line), line
+        assert hits.categories('environment') == naive_categories(ENVIRONMENT_KEYWORDS, line), line
+    print(f"   {len(lines)} lines identical")
+
+    start = time.perf_counter()
+    for line in lines:
+        naive_categories(BUSINESS_KEYWORDS, line)
+        naive_categories(BUILDING_KEYWORDS, line)
+        naive_categories(ENVIRONMENT_KEYWORDS, line)
+    naive_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for line in lines:
+        KEYWORD_MATCHER.scan(line)
+    matcher_seconds = time.perf_counter() - start
+    print(f"   Substring scan (3 tables): {naive_seconds * 1000:.1f} ms, matcher (all tables): {matcher_seconds * 1000:.1f} ms")
+
+def test_classifiers():
+    """Test classifier yang memakai matcher"""
+    print("\n🧪 Testing Classifiers")
+    print("=" * 50)
+
+    assert determine_dominant_load('KAWASAN INDUSTRI KANTOR') == 9
+    assert determine_dominant_load('LINGKUNGAN DAUH PURI') == 1
+    assert determine_dominant_load('PERKANTORAN') == 12
+    assert detect_residential_area('PERUMAHAN MEWAH') == {'area_type': 'high_density_residential', 'estimated_kk': 150}
+    assert detect_residential_area('VILLA SANUR') == {'area_type': 'low_density_residential', 'estimated_kk': 40}
+    print("   Dominant load and residential area classification OK")
+
+def test_memoized_name_classifier():
+    """Test klasifikasi nama dihitung sekali per nama yang dinormalisasi dan statistik cache-nya"""
+    print("\n🧪 Testing Memoized Name Classifier")
+    print("=" * 50)
+
+    assert estimate_kk_count_improved('Perumahan Griya Kenanga') == 150
+    assert estimate_kk_count_improved('LINGKUNGAN BANJAR SARI') == 80
+    assert estimate_kk_count_improved('Kawasan Industri Sentosa') == 100
+    assert estimate_kk_count_improved('Jl. Kenanga', {'a': {}, 'b': {}}) == 30
+    assert estimate_kk_count_improved('Jl. Kenanga') == 50
+    assert estimate_business_count_improved('Pasar Badung') == 20
+    assert estimate_business_count_improved('Pasar Badung', {'a': {}}) == 1
+    assert estimate_business_count_improved('Jl. Kenanga') == 10
+    assert get_dominant_load_description(determine_dominant_load('Hotel Bali')) == 'Hotel/Tempat Rekreasi'
+    assert get_dominant_load_description(99) == 'Kode 99 (Tidak Diketahui)'
+
+    classify_normalized_name.cache_clear()
+    for name in ['LINGKUNGAN BANJAR SARI', 'Lingkungan  Banjar Sari ', 'lingkungan banjar sari', 'Pasar Badung']:
+        classify_name(name)
+    stats = name_classifier_stats()
+    print(f"   Stats: {stats}")
+    assert (stats['hits'], stats['misses'], stats['size']) == (2, 2, 2)
+    assert stats['max_size'] == app.app.config['NAME_CLASSIFIER_CACHE_SIZE']
+    assert app.app.test_client().get('/metrics/classifier').get_json() == stats
+
+if __name__ == "__main__":
+    test_overlapping_keywords()
+    test_equivalence_with_substring_scan()
+    test_classifiers()
+    test_memoized_name_classifier()
+    print("\n✅ All keyword matcher tests passed!")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Test script untuk dekode dan koreksi nama wilayah lewat master kode wilayah BPS
+"""
+
+import sys
+import os
+import io
+import base64
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+import app
+from app import decode_map_id, resolve_admin_names, scan_wss_text, validate_map_data
+from bk_tree import BKTree, levenshtein
+
+def test_decode_map_id():
+    """Test kode dan nama provinsi/kabupaten/kecamatan/desa terbaca dari ID peta"""
+    print("🧪 Testing Map ID Decoding")
+    print("=" * 50)
+
+    decoded = decode_map_id('5171030005000103')
+    print(f"   5171030005000103: {decoded}")
+    assert decoded['province_code'] == '51' and decoded['province'] == 'BALI'
+    assert decoded['regency_code'] == '5171' and decoded['regency'] == 'DENPASAR'
+    assert decoded['district_code'] == '5171030' and decoded['district'] == 'DENPASAR BARAT'
+    assert decoded['village_code'] == '5171030005' and decoded['village'] == 'DAUH PURI'
+    assert decoded['sls'] == '0001' and decoded['sub_sls'] == '03'
+
+    # Codes missing from the master are still decoded, without a name
+    unknown = decode_map_id('5171030099000100')
+    assert unknown['village_code'] == '5171030099' and 'village' not in unknown
+    assert decode_map_id('517103000500010') == {}
+
+def test_missing_header_filled_from_map_id():
+    """Test validasi tetap lolos saat OCR melewatkan baris kecamatan dan desa"""
+    print("\n🧪 Testing Missing Header Lines")
+    print("=" * 50)
+
+    data = scan_wss_text("""
+5171030005000103
+Provinsi : [51] BALI
+Kabupaten/Kota : [71] DENPASAR
+Toko Sari Makmur
+""")['data']
+    assert not data['district'] and not data['village']
+    assert validate_map_data(data)[0] is False
+
+    resolve_admin_names(data)
+    print(f"   Header: {[data[field] for field in ['province', 'regency', 'district', 'village']]}")
+    assert data['district'] == 'DENPASAR BARAT' and data['village'] == 'DAUH PURI'
+    assert data['admin_mismatches'] == []
+    assert validate_map_data(data)[0] is True
+
+def test_mismatch_reported():
+    """Test nama hasil OCR yang menunjuk wilayah lain tetap dipakai dan dilaporkan"""
+    print("\n🧪 Testing Admin Mismatch Report")
+    print("=" * 50)
+
+    data = {'map_id': '5171030005000103', 'province': 'Bali', 'regency': 'DENPASAR',
+            'district': 'Kecamatan Denpasar Timur', 'village': 'PEMECUTAN'}
+    resolve_admin_names(data)
+    print(f"   Mismatches: {data['admin_mismatches']}")
+    assert data['district'] == 'DENPASAR TIMUR' and data['village'] == 'PEMECUTAN'
+    assert data['admin_mismatches'] == [
+        {'field': 'district', 'ocr': 'Kecamatan Denpasar Timur', 'expected': 'DENPASAR BARAT'},
+        {'field': 'village', 'ocr': 'PEMECUTAN', 'expected': 'DAUH PURI'}
+    ]
+    assert data['admin_confidence']['village'] == 0.0
+
+def test_noisy_names_snapped():
+    """Test nama wilayah dengan kesalahan OCR dikoreksi ke nama baku beserta tingkat kecocokannya"""
+    print("\n🧪 Testing Fuzzy Admin Correction")
+    print("=" * 50)
+
+    data = {'map_id': '5171030005000103', 'province': 'BALl', 'regency': 'DENPASAR',
+            'district': 'DENPASAR BARAI', 'village': 'DAUH PUR1'}
+    resolve_admin_names(data)
+    print(f"   Header: {[data[field] for field in ['province', 'regency', 'district', 'village']]}")
+    print(f"   Confidence: {data['admin_confidence']}")
+    assert [data[field] for field in ['province', 'regency', 'district', 'village']] == \
+        ['BALI', 'DENPASAR', 'DENPASAR BARAT', 'DAUH PURI']
+    assert data['admin_mismatches'] == []
+    assert data['admin_confidence']['regency'] == 1.0
+    assert 0.9 < data['admin_confidence']['district'] < 1.0
+
+    # Without a map ID the scope follows the levels matched so far
+    data = {'map_id': '', 'province': 'BALI', 'regency': 'DENPASAR', 'district': 'DENPASAR UTRA', 'village': ''}
+    resolve_admin_names(data)
+    assert data['district'] == 'DENPASAR UTARA' and data['village'] == ''
+
+    # Names too far from every sibling are left as read
+    data = {'map_id': '', 'province': 'BALI', 'regency': 'DENPASAR', 'district': 'DENPASAR', 'village': ''}
+    resolve_admin_names(data)
+    assert data['district'] == 'DENPASAR' and data['admin_confidence']['district'] == 0.0
+
+def test_bk_tree_search():
+    """Test BK-tree mengembalikan semua nama dalam jarak edit yang sama dengan pencarian linear"""
+    print("\n🧪 Testing BK-Tree Search")
+    print("=" * 50)
+
+    names = ['DENPASAR SELATAN', 'DENPASAR TIMUR', 'DENPASAR BARAT', 'DENPASAR UTARA', 'KUTA', 'KUTA UTARA',
+             'KUTA SELATAN', 'MENGWI', 'ABIANSEMAL', 'PETANG', 'UBUD', 'TEGALALANG', 'PAYANGAN']
+    tree = BKTree({name: index for index, name in enumerate(names)})
+    assert len(tree) == len(names)
+    for query in ['KUTA UTRA', 'DENPASAR', 'UBUT', 'MENGWl', 'XYZ']:
+        for max_distance in range(4):
+            expected = sorted((levenshtein(query, name), name, index) for index, name in enumerate(names)
+                              if levenshtein(query, name) <= max_distance)
+            assert tree.search(query, max_distance) == expected, (query, max_distance)
+    assert levenshtein('DENPASAR BARAI', 'DENPASAR BARAT') == 1
+    assert levenshtein('KUTA', 'DENPASAR SELATAN', limit=3) == 4
+
+def test_master_from_config():
+    """Test master kode dibaca dari BPS_WILAYAH_PATH, termasuk kode bertitik dan awalan KABUPATEN"""
+    print("\n🧪 Testing Configured Code Master")
+    print("=" * 50)
+
+    previous_path = app.app.config['BPS_WILAYAH_PATH']
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as f:
+        f.write("kode,nama\n51,BALI\n51.02,KABUPATEN TABANAN\n51.02.050,KEDIRI\n")
+        path = f.name
+    try:
+        app.app.config['BPS_WILAYAH_PATH'] = path
+        decoded = decode_map_id('5102050001000100')
+        assert decoded['regency'] == 'TABANAN' and decoded['district'] == 'KEDIRI'
+        assert 'village' not in decoded
+
+        app.app.config['BPS_WILAYAH_PATH'] = os.path.join(tempfile.gettempdir(), 'missing_bps_wilayah.csv')
+        assert 'province' not in decode_map_id('5102050001000100')
+    finally:
+        app.app.config['BPS_WILAYAH_PATH'] = previous_path
+        os.remove(path)
+
+def test_preview_exposes_confidence():
+    """Test preview /upload dan /capture memuat tingkat kecocokan dan ketidaksesuaian nama wilayah"""
+    print("\n🧪 Testing Admin Confidence In Preview")
+    print("=" * 50)
+
+    lines = ['5171030005000103', 'Provinsi : [51] BALI', 'Kecamatan : [030] DENPASAR BARAI',
+             'Desa/Kelurahan : [005] SUMERTA', 'Jl. Gajah Mada']
+
+    class FakeReader:
+        def readtext(self, image, paragraph=False):
+            return [([[0, 20 * row], [300, 20 * row], [300, 20 * row + 15], [0, 20 * row + 15]], line, 0.9)
+                    for row, line in enumerate(lines)]
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (320, 200), 'white').save(buffer, format='PNG')
+    previous_reader = app.get_reader
+    previous_config = {key: app.app.config[key] for key in ['UPLOAD_FOLDER', 'PROCESSED_MAPS_FOLDER']}
+    app.get_reader = lambda: FakeReader()
+    client = app.app.test_client()
+    with tempfile.TemporaryDirectory() as folder:
+        app.app.config.update(UPLOAD_FOLDER=folder, PROCESSED_MAPS_FOLDER=os.path.join(folder, 'maps'))
+        try:
+            uploaded = client.post('/upload', data={'file': (io.BytesIO(buffer.getvalue()), 'peta.png'), 'tier': 'fast'},
+                                   content_type='multipart/form-data').get_json()
+            image = 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode()
+            captured = client.post('/capture', json={'image': image, 'tier': 'fast'}).get_json()
+        finally:
+            app.get_reader = previous_reader
+            app.app.config.update(previous_config)
+            app.edit_sessions.clear()
+
+    for result in (uploaded, captured):
+        preview = result['preview']
+        print(f"   Confidence: {preview['admin_confidence']}, mismatches: {preview['admin_mismatches']}")
+        assert 0.9 < preview['admin_confidence']['district'] < 1.0
+        assert [mismatch['field'] for mismatch in preview['admin_mismatches']] == ['village']
+
+if __name__ == "__main__":
+    test_decode_map_id()
+    test_missing_header_filled_from_map_id()
+    test_mismatch_reported()
+    test_noisy_names_snapped()
+    test_bk_tree_search()
+    test_master_from_config()
+    test_preview_exposes_confidence()
+    print("\n✅ All map ID master tests passed!")
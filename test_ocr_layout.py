@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test script untuk tata letak hasil OCR (kotak teks) dan indeks spasialnya
+"""
+
+import sys
+import os
+import math
+import random
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+import app
+from app import assign_layout_regions, generate_segments_from_data, scan_wss_text
+from ocr_layout import OcrLayout
+from spatial import PointGridIndex
+
+def block(text, x, y, width=120, height=20, confidence=0.9):
+    """EasyOCR-style result: four corner points, text, confidence"""
+    return ([[x, y], [x + width, y], [x + width, y + height], [x, y + height]], text, confidence)
+
+# OCR reads the map row by row, so the two LINGKUNGAN areas (left and right half) are interleaved
+MAP_RESULTS = [
+    block('5171030005000103', 20, 10, width=200),
+    block('Provinsi : [51] BALI', 20, 40, width=200),
+    block('LINGKUNGAN BANJAR SARI [01]', 100, 200, width=220),
+    block('LINGKUNGAN BANJAR KAJA [02]', 900, 200, width=220),
+    block('Warung Makan Sari', 80, 260),
+    block('Bengkel Motor Jaya', 920, 260),
+    block('Apotek Sehat', 960, 300),
+    block('Jl. Kenanga', 120, 420),
+    block('Jl. Gatot Subroto', 880, 420),
+    block('Salon Ayu', 150, 380),
+    block('Bank BCA', 1000, 380),
+    block('Toko Bayangan', 1000, 500, confidence=0.005),
+    block('   ', 10, 600)
+]
+
+def test_point_grid_nearest():
+    """Test tetangga terdekat dan kueri persegi dari grid sama dengan pencarian linear"""
+    print("🧪 Testing Point Grid Index")
+    print("=" * 50)
+
+    rng = random.Random(43)
+    for cell_size in (5, 40, 300):
+        grid = PointGridIndex(cell_size)
+        points = [(rng.uniform(0, 1500), rng.uniform(0, 1000)) for _ in range(200)]
+        for row, (x, y) in enumerate(points):
+            grid.add(x, y, row)
+        for _ in range(200):
+            x, y = rng.uniform(-200, 1700), rng.uniform(-200, 1200)
+            distance, row = grid.nearest(x, y)
+            assert math.isclose(distance, min(math.hypot(px - x, py - y) for px, py in points))
+            low_x, high_x = sorted(rng.uniform(0, 1500) for _ in range(2))
+            low_y, high_y = sorted(rng.uniform(0, 1000) for _ in range(2))
+            expected = [row for row, (px, py) in enumerate(points) if low_x <= px <= high_x and low_y <= py <= high_y]
+            assert sorted(grid.within(low_x, low_y, high_x, high_y)) == expected
+    assert PointGridIndex(10).nearest(0, 0) is None
+    print(f"   {len(grid)} points, nearest and rectangle queries match brute force")
+
+def test_layout_from_easyocr():
+    """Test kotak teks EasyOCR disimpan per baris dan teksnya sama dengan teks OCR biasa"""
+    print("\n🧪 Testing OCR Layout")
+    print("=" * 50)
+
+    layout = OcrLayout.from_easyocr(MAP_RESULTS + ['rusak'])
+    print(f"   {len(layout)} blocks, line height {layout.line_height()}")
+    assert len(layout) == 11 and layout.boxes.shape == (11, 4)
+    assert layout.text.split('\n')[2] == 'LINGKUNGAN BANJAR SARI [01]'
+    assert layout.boxes[4].tolist() == [80.0, 260.0, 200.0, 280.0]
+    assert layout.centers[4].tolist() == [140.0, 270.0]
+    assert layout.line_height() == 20.0
+    assert layout.rows_within(0, 250, 600, 1000) == [4, 7, 9]
+
+def test_businesses_assigned_by_position():
+    """Test usaha masuk ke LINGKUNGAN terdekat di peta, bukan ke LINGKUNGAN terakhir yang dibaca OCR"""
+    print("\n🧪 Testing Layout-Aware Environment Assignment")
+    print("=" * 50)
+
+    layout = OcrLayout.from_easyocr(MAP_RESULTS)
+    data = scan_wss_text(layout.text)['data']
+    print(f"   Reading order counts: {data['environment_business_counts']}")
+    assert data['environment_business_counts'] == {'BANJAR SARI': 0, 'BANJAR KAJA': 5}
+
+    assign_layout_regions(data, layout)
+    print(f"   Layout counts: {data['environment_business_counts']}")
+    assert data['environment_business_counts'] == {'BANJAR SARI': 2, 'BANJAR KAJA': 3}
+    assert data['business_layout']['Salon Ayu'] == {'environment': 'BANJAR SARI', 'nearest_street': 'Jl. Kenanga'}
+    assert data['business_layout']['Bank BCA'] == {'environment': 'BANJAR KAJA', 'nearest_street': 'Jl. Gatot Subroto'}
+    assert [segment['muatan_usaha'] for segment in generate_segments_from_data(data)] == [2, 3]
+
+    # Without LINGKUNGAN labels the reading-order counts stay
+    plain = OcrLayout.from_easyocr([result for result in MAP_RESULTS if 'LINGKUNGAN' not in result[1]])
+    data = scan_wss_text(plain.text)['data']
+    assign_layout_regions(data, plain)
+    assert data['environment_business_counts'] == {} and 'business_layout' not in data
+
+def test_extract_text_with_layout():
+    """Test extract_text_from_image mengembalikan teks yang sama beserta tata letaknya"""
+    print("\n🧪 Testing OCR With Layout")
+    print("=" * 50)
+
+    class FakeReader:
+        def readtext(self, image, paragraph=False):
+            return MAP_RESULTS
+
+    previous_reader = app.get_reader
+    app.get_reader = lambda: FakeReader()
+    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as f:
+        path = f.name
+    try:
+        Image.new('RGB', (1200, 700), 'white').save(path)
+        text = app.extract_text_from_image(path)
+        layout_text, layout = app.extract_text_from_image(path, with_layout=True)
+    finally:
+        app.get_reader = previous_reader
+        os.remove(path)
+
+    assert text == layout_text and len(layout) == 11
+    assert text.split('\n')[-1] == 'Bank BCA'
+
+if __name__ == "__main__":
+    test_point_grid_nearest()
+    test_layout_from_easyocr()
+    test_businesses_assigned_by_position()
+    test_extract_text_with_layout()
+    print("\n✅ All OCR layout tests passed!")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script untuk parsing ulang teks OCR tanpa gambar (endpoint /parse-text dan API Python)
+"""
+
+import sys
+import os
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from app import parse_map_text, parse_map_texts, reparse_processed_maps
+
+SAMPLE_TEXT = """
+5171030005000103
+Provinsi : [51] BALI
+Kabupaten/Kota : [71] DENPASAR
+Kecamatan : [030] DENPASAR BARAI
+Desa/Kelurahan : [005] DAUH PURI
+LINGKUNGAN BANJAR SARI [03]
+Mall Bali Galeria
+Warung Makan Sederhana
+Jl. Gajah Mada
+"""
+
+def no_lookups():
+    """Replace every geocoding entry point with one that records the call"""
+    calls = []
+    names = ['search_business_info', 'search_business_info_improved', 'get_precise_coordinates', 'prefetch_area_pois']
+    previous = {name: getattr(app, name) for name in names}
+    for name in names:
+        setattr(app, name, lambda *args, _name=name, **kwargs: calls.append(_name) or {})
+    return calls, previous
+
+def test_parse_text_without_enrichment():
+    """Test teks OCR menghasilkan preview lengkap tanpa satu pun pencarian geocoding"""
+    print("🧪 Testing Text-Only Parse")
+    print("=" * 50)
+
+    calls, previous = no_lookups()
+    app.enrichment_results.clear()
+    try:
+        result = parse_map_text(SAMPLE_TEXT)
+    finally:
+        for name, function in previous.items():
+            setattr(app, name, function)
+
+    preview = result['preview']
+    print(f"   Businesses: {preview['businesses']}, segments: {len(preview['segments'])}")
+    assert result['success'] and not calls, f"Tidak boleh ada geocoding: {calls}"
+    assert preview['district'] == 'DENPASAR BARAT' and 0 < preview['admin_confidence']['district'] < 1
+    assert 'Mall Bali Galeria' in preview['business_types']
+    assert preview['segments'] and preview['enrichment_status'] == 'complete'
+    assert 'Mall Bali Galeria' in [center['name'] for center in preview['economic_centers']]
+    assert not app.enrichment_results, "Parsing tanpa enrichment tidak boleh mengisi antrean latar belakang"
+
+def test_parse_text_endpoint():
+    """Test endpoint /parse-text untuk satu teks, batch dan teks yang tidak valid"""
+    print("\n🧪 Testing /parse-text Endpoint")
+    print("=" * 50)
+
+    client = app.app.test_client()
+    calls, previous = no_lookups()
+    try:
+        single = client.post('/parse-text', json={'text': SAMPLE_TEXT})
+        batch = client.post('/parse-text', json={'texts': [SAMPLE_TEXT, 'Toko Sari Makmur']})
+        empty = client.post('/parse-text', json={'text': '  '})
+        invalid = client.post('/parse-text', json={'text': 'Toko Sari Makmur'})
+    finally:
+        for name, function in previous.items():
+            setattr(app, name, function)
+
+    assert single.status_code == 200 and single.get_json()['preview']['map_id'] == '5171030005000103'
+    body = batch.get_json()
+    print(f"   Batch: total {body['total']}, valid {body['valid']}, invalid {body['invalid']}")
+    assert (body['total'], body['valid'], body['invalid']) == (2, 1, 1)
+    assert body['results'][1]['missing_fields'] == ['map_id', 'province', 'regency', 'district', 'village']
+    assert empty.status_code == 400 and invalid.status_code == 400
+    assert not calls
+
+def test_reparse_processed_maps():
+    """Test peta yang sudah tersimpan dapat diparsing ulang dari teks OCR-nya"""
+    print("\n🧪 Testing Re-parse Of Stored Maps")
+    print("=" * 50)
+
+    previous_folder = app.app.config['PROCESSED_MAPS_FOLDER']
+    calls, previous = no_lookups()
+    with tempfile.TemporaryDirectory() as folder:
+        app.app.config['PROCESSED_MAPS_FOLDER'] = folder
+        try:
+            assert parse_map_texts([SAMPLE_TEXT], save=True)[0]['success']
+            results = reparse_processed_maps()
+            missing = reparse_processed_maps(['0000000000000000'])
+            response = app.app.test_client().post('/parse-text', json={'map_ids': 'all'})
+        finally:
+            app.app.config['PROCESSED_MAPS_FOLDER'] = previous_folder
+            for name, function in previous.items():
+                setattr(app, name, function)
+
+    print(f"   Re-parsed: {[result['source_map_id'] for result in results]}")
+    assert len(results) == 1 and results[0]['success']
+    assert results[0]['preview']['village'] == 'DAUH PURI'
+    assert missing[0]['success'] is False and missing[0]['source_map_id'] == '0000000000000000'
+    assert response.get_json()['valid'] == 1
+    assert not calls
+
+def test_index_page():
+    """Test halaman utama tetap tersedia di samping endpoint parsing"""
+    print("\n🧪 Testing Index Page")
+    print("=" * 50)
+
+    response = app.app.test_client().get('/')
+    print(f"   GET / -> {response.status_code}")
+    assert response.status_code == 200 and b'<html' in response.data.lower()
+
+if __name__ == "__main__":
+    test_parse_text_without_enrichment()
+    test_parse_text_endpoint()
+    test_reparse_processed_maps()
+    test_index_page()
+    print("\n✅ All text-only parse tests passed!")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script untuk record ringkas (__slots__) dan koleksi ter-hash hasil parsing peta
+"""
+
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import (
+    BBTT_NON_USAHA_RATIO, RESIDENTIAL_AREA_KK, SEGMENT_RATIOS, estimate_segments, generate_segments_for_maps,
+    generate_segments_from_data, scan_wss_text
+)
+from wss_records import Business, Coordinate, Environment, EntityIndex, EnvironmentIndex, SEGMENT_FIELDS
+
+DUPLICATED_TEXT = """
+5171030005000103
+Desa/Kelurahan : [005] DAUH PURI
+LINGKUNGAN BANJAR SARI [03]
+LINGKUNGAN BANJAR SARI [03]
+LINGKUNGAN BANJAR SARI [04]
+LINGKUNGAN BANJAR SARI
+LINGKUNGAN PASEK
+Toko Sederhana
+Toko Sederhana
+Jalan Sudirman
+Jl. Sudirman
+Koordinat: -8.6500, 115.2167
+Koordinat: -8.6500, 115.2167
+"""
+
+def test_entity_index_keeps_order_and_dedups():
+    """Test koleksi ter-hash mempertahankan urutan dan menolak duplikat"""
+    print("🧪 Testing Entity Index")
+    print("=" * 50)
+
+    businesses = EntityIndex()
+    assert businesses.add(Business('Toko Sari', 'toko'))
+    assert businesses.add(Business('Bank BCA', 'bank'))
+    assert not businesses.add(Business('Toko Sari', 'warung')), "Nama yang sama tidak boleh ditambahkan lagi"
+    print(f"   Businesses: {businesses.to_preview()}")
+    assert businesses.to_preview() == ['Toko Sari', 'Bank BCA']
+    assert [business.type for business in businesses] == ['toko', 'bank']
+    assert 'Bank BCA' in businesses and len(businesses) == 2
+
+    coordinates = EntityIndex([Coordinate(-8.65, 115.2), Coordinate(-8.65, 115.2)])
+    assert coordinates.to_preview() == [{'latitude': -8.65, 'longitude': 115.2}]
+
+    environments = EnvironmentIndex([Environment('BANJAR SARI', '03'), Environment('BANJAR SARI', '04')])
+    assert len(environments) == 2 and environments.has_name('BANJAR SARI')
+    assert not hasattr(Coordinate(0, 0), '__dict__'), "Record harus memakai __slots__"
+
+def test_scan_dedup_matches_preview_shape():
+    """Test deduplikasi hasil scan dan bentuk JSON preview tetap sama"""
+    print("\n🧪 Testing Scan Deduplication")
+    print("=" * 50)
+
+    data = scan_wss_text(DUPLICATED_TEXT)['data']
+    print(f"   Environments: {data['environments']}")
+    assert data['environments'] == [
+        {'name': 'BANJAR SARI', 'code': '03'},
+        {'name': 'BANJAR SARI', 'code': '04'},
+        {'name': 'PASEK', 'code': '03'}
+    ], "Lingkungan tanpa kode hanya ditambahkan jika namanya belum ada"
+    assert data['businesses'] == ['Toko Sederhana']
+    assert data['business_types'] == {'Toko Sederhana': 'store'}
+    assert data['streets'] == ['Jl. Sudirman']
+    assert data['coordinates'] == [{'latitude': -8.65, 'longitude': 115.2167}]
+
+def test_segment_columns():
+    """Test kolom segmen dan total muatan hasil estimasi"""
+    print("\n🧪 Testing Segment Columns")
+    print("=" * 50)
+
+    preview = estimate_segments([(2, 'BANJAR SARI', 'Permukiman Biasa', 'standard_residential',
+                                  'standard_residential', 3, '02')])[0]
+    print(f"   Segment: {preview}")
+    assert list(preview) == list(SEGMENT_FIELDS)
+    assert preview['no_segmen'] == 'SEG02' and preview['muatan_kk'] == 100 and preview['btt'] == 90
+    assert preview['btt_kosong'] == 10 and preview['bku'] == 20 and preview['bbtt_non_usaha'] == 5
+    assert preview['total_muatan'] == 100 + 10 + 5 + 3
+
+    segments = generate_segments_from_data({'environments': [{'name': 'BANJAR SARI', 'code': '3'}]})
+    assert segments[0]['kode_sub_sls'] == '03'
+    assert segments[0]['total_muatan'] == max(segments[0]['muatan_kk'], segments[0]['btt']) + segments[0]['btt_kosong'] + segments[0]['bbtt_non_usaha'] + segments[0]['muatan_usaha']
+
+def test_batch_estimates_match_records():
+    """Test estimasi segmen per kolom (tabel rasio) sama dengan hitungan per baris untuk setiap tipe area"""
+    print("\n🧪 Testing Table-Driven Segment Estimates")
+    print("=" * 50)
+
+    rows = [(no, f'WILAYAH {no}', 'Permukiman Biasa', area_type, area_type, no * 3, f"{no:02d}")
+            for no, area_type in enumerate(SEGMENT_RATIOS, 1)]
+    for row, preview in zip(rows, estimate_segments(rows)):
+        no, name, load, area_type, _, muatan_usaha, code = row
+        kk = RESIDENTIAL_AREA_KK[area_type]
+        btt_ratio, bku_ratio = SEGMENT_RATIOS[area_type]
+        btt = int(kk * btt_ratio)
+        btt_kosong, bbtt_non_usaha = max(0, kk - btt), int(kk * BBTT_NON_USAHA_RATIO)
+        expected = (no, f"SEG{no:02d}", load, name, '', '', '', kk, btt, btt_kosong, int(kk * bku_ratio),
+                    bbtt_non_usaha, muatan_usaha, max(kk, btt) + btt_kosong + bbtt_non_usaha + muatan_usaha, code, area_type)
+        print(f"   {area_type}: KK {preview['muatan_kk']}, BTT {preview['btt']}, total {preview['total_muatan']}")
+        assert preview == dict(zip(SEGMENT_FIELDS, expected))
+        assert all(type(value) in (int, str) for value in preview.values()), "Nilai harus bisa di-JSON-kan"
+    assert estimate_segments([]) == []
+
+    # The village fallback keeps the standard BTT/BKU ratios whatever its area type
+    village = generate_segments_from_data({'village': 'KAWASAN INDUSTRI'})[0]
+    assert village['area_type'] == 'industrial' and village['muatan_kk'] == 60 and village['btt'] == int(60 * 0.9)
+
+    maps = [{'environments': [{'name': 'BANJAR SARI', 'code': '3'}, {'name': 'PERUMAHAN ELITE', 'code': '4'}]},
+            {'streets': ['Jl. Sudirman', 'Jl. Gatot Subroto', 'Pasar Badung']}, {}]
+    assert generate_segments_for_maps(maps) == [generate_segments_from_data(wss_data) for wss_data in maps]
+
+if __name__ == "__main__":
+    test_entity_index_keeps_order_and_dedups()
+    test_scan_dedup_matches_preview_shape()
+    test_segment_columns()
+    test_batch_estimates_match_records()
+    print("\n✅ All parsed record tests passed!")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script untuk cache geocoding dan CLI pre-warming
+"""
+
+import sys
+import os
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from app import GeocodingClient, save_processed_map, search_business_info_improved
+from mock_nominatim import mock_nominatim_server
+from prewarm_geocode_cache import prewarm
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'nominatim_recordings.json')
+
+MAP_DATA = {
+    'map_id': '5171030005000103', 'province': 'BALI', 'regency': 'DENPASAR',
+    'district': 'DENPASAR BARAT', 'village': 'DAUH PURI',
+    'businesses': ['Pasar Kumbasari', 'Bank BCA', 'Restaurant Sari'],
+    'business_types': {'Pasar Kumbasari': 'pasar', 'Bank BCA': 'bank', 'Restaurant Sari': 'restaurant'}
+}
+
+def run_isolated(test):
+    """Run a test with temporary cache/maps folders and a fresh geocoding client"""
+    previous_config = dict(app.app.config)
+    previous_geocoder = app.geocoder
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app.app.config['GEOCODE_CACHE_PATH'] = os.path.join(tmp_dir, 'cache.sqlite')
+        app.app.config['PROCESSED_MAPS_FOLDER'] = os.path.join(tmp_dir, 'processed_maps')
+        app.geocoder = GeocodingClient(max_retries=0, breaker_threshold=2)
+        try:
+            save_processed_map(MAP_DATA, 'teks OCR')
+            test(os.path.join(tmp_dir, 'checkpoint.json'))
+        finally:
+            app.app.config.update(previous_config)
+            app.geocoder = previous_geocoder
+            app.geocode_caches.clear()
+
+def test_prewarm_and_resume():
+    """Test pre-warming mengisi cache, laporan cakupan, dan resume dari checkpoint"""
+    print("🧪 Testing Geocode Cache Pre-warming")
+    print("=" * 50)
+
+    def check(checkpoint_path):
+        with mock_nominatim_server(FIXTURES_PATH) as server:
+            report = prewarm(['Denpasar Barat', 'GIANYAR'], checkpoint_path)
+            print(f"   Report: {report['areas']}")
+            area = report['areas']['Denpasar Barat']
+            assert area['businesses'] == 3 and area['coverage'] == 1.0
+            assert area['found'] == 2 and area['not_found'] == 1
+            assert report['areas']['GIANYAR']['businesses'] == 0
+            assert report['cache_entries'] > 0
+
+            requests_after_warm = server.mock.stats['requests']
+            report = prewarm(['Denpasar Barat'], checkpoint_path)
+            print(f"   Resumed: {report['areas']}")
+            assert report['areas']['Denpasar Barat']['coverage'] == 1.0
+            assert server.mock.stats['requests'] == requests_after_warm, "Checkpoint harus melewati bisnis yang sudah selesai"
+
+            info = search_business_info_improved('Pasar Kumbasari', 'DENPASAR')
+            print(f"   Cached lookup: {info.get('coordinates')}")
+            assert info.get('coordinates') and server.mock.stats['requests'] == requests_after_warm, "Lookup setelah pre-warm harus dari cache"
+            assert app.geocoder.get_stats()['cache_hits'] > 0
+
+    run_isolated(check)
+
+def test_prewarm_stops_on_open_breaker():
+    """Test pre-warming berhenti saat circuit breaker terbuka dan tidak menandai bisnis gagal sebagai selesai"""
+    print("\n🧪 Testing Pre-warming With Failing Geocoder")
+    print("=" * 50)
+
+    def check(checkpoint_path):
+        with mock_nominatim_server(FIXTURES_PATH, error_rate=1.0):
+            report = prewarm(['DAUH PURI'], checkpoint_path)
+        area = report['areas']['DAUH PURI']
+        print(f"   Report: {area}, stopped early: {report['stopped_early']}")
+        assert report['stopped_early']
+        assert area['coverage'] == 0.0 and area['failed'] + area['remaining'] == 3
+
+    run_isolated(check)
+
+if __name__ == "__main__":
+    test_prewarm_and_resume()
+    test_prewarm_stops_on_open_breaker()
+    print("\n✅ All prewarm cache tests passed!")
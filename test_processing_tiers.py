@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Test script untuk tier pemrosesan (fast / standard / full) per permintaan
+"""
+
+import sys
+import os
+import io
+import tempfile
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from PIL import Image
+
+import app
+from app import GeocodingClient, GeocodingUnavailable, geocoding_cache_only, get_processing_tier, request_fixture_key
+
+MAP_TEXT = """5171030005000103
+Provinsi : [51] BALI
+Kabupaten/Kota : [71] DENPASAR
+Kecamatan : [030] DENPASAR BARAT
+Desa/Kelurahan : [005] DAUH PURI
+Warung Makan Sari
+Bengkel Motor Jaya
+Jl. Kenanga"""
+
+def block(text, y):
+    return ([[20, y], [400, y], [400, y + 20], [20, y + 20]], text, 0.9)
+
+# Header in the top rows of a 1000 px tall image, map body further down
+MAP_RESULTS = [block(line, 10 + row * 30) for row, line in enumerate(MAP_TEXT.split('\n')[:5])] + \
+    [block('Warung Makan Sari', 600), block('Bengkel Motor Jaya', 700), block('Jl. Kenanga', 800)]
+
+def test_tier_names():
+    """Test nama tier, tier bawaan dan penolakan tier yang tidak dikenal"""
+    print("🧪 Testing Processing Tier Names")
+    print("=" * 50)
+
+    assert get_processing_tier()[0] == app.app.config['DEFAULT_PROCESSING_TIER']
+    name, settings = get_processing_tier(' Fast ')
+    assert name == 'fast' and settings['ocr'] == 'header' and not settings['enrich']
+    assert get_processing_tier('standard')[1]['cache_only']
+    targets = [settings['target_seconds'] for settings in app.PROCESSING_TIERS.values()]
+    print(f"   Targets: {dict(zip(app.PROCESSING_TIERS, targets))}")
+    assert targets == sorted(targets)
+    try:
+        get_processing_tier('turbo')
+    except ValueError as e:
+        print(f"   Ditolak: {e}")
+    else:
+        raise AssertionError("Tier tidak dikenal seharusnya ditolak")
+
+def test_cache_only_geocoding():
+    """Test panggilan geocoding cache-only hanya dilayani dari cache dan tidak pernah ke jaringan"""
+    print("\n🧪 Testing Cache-Only Geocoding")
+    print("=" * 50)
+
+    client = GeocodingClient()
+    sent = []
+    client.session.request = lambda *args, **kwargs: sent.append(args)
+    previous_path = app.app.config['GEOCODE_CACHE_PATH']
+    with tempfile.TemporaryDirectory() as folder:
+        app.app.config['GEOCODE_CACHE_PATH'] = os.path.join(folder, 'cache.sqlite')
+        try:
+            url = 'https://nominatim.example/search'
+            cached = {'params': {'q': 'Warung Makan Sari'}}
+            app.get_geocode_cache().put(request_fixture_key('GET', url, cached), [{'lat': '-8.65'}])
+            with geocoding_cache_only():
+                assert client.request('GET', url, params={'q': 'Warung Makan Sari'}).json() == [{'lat': '-8.65'}]
+                try:
+                    client.request('GET', url, params={'q': 'Toko Baru'})
+                except GeocodingUnavailable as e:
+                    print(f"   Cache miss: {e}")
+                else:
+                    raise AssertionError("Cache miss seharusnya tidak ke jaringan")
+        finally:
+            app.app.config['GEOCODE_CACHE_PATH'] = previous_path
+    stats = client.get_stats()
+    assert sent == [] and stats['cache_hits'] == 1 and stats['cache_only_misses'] == 1
+
+def test_upload_tiers():
+    """Test tier fast membaca header saja tanpa pencarian, standard mencari dari cache saja"""
+    print("\n🧪 Testing Upload Tiers")
+    print("=" * 50)
+
+    heights = []
+    lookups = []
+
+    class FakeReader:
+        def readtext(self, image, paragraph=False):
+            heights.append(image.shape[0])
+            return [result for result in MAP_RESULTS if result[0][2][1] <= image.shape[0]]
+
+    def fake_business_info(business_name, location="Indonesia", expected_admin=None):
+        lookups.append((business_name, getattr(app.cache_only_lookups, 'value', False)))
+        return {}
+
+    names = ['get_reader', 'search_business_info_improved', 'get_precise_coordinates']
+    previous = {name: getattr(app, name) for name in names}
+    previous_config = {key: app.app.config[key] for key in ['UPLOAD_FOLDER', 'PROCESSED_MAPS_FOLDER']}
+    app.get_reader = lambda: FakeReader()
+    app.search_business_info_improved = fake_business_info
+    app.get_precise_coordinates = fake_business_info
+    buffer = io.BytesIO()
+    Image.new('RGB', (600, 1000), 'white').save(buffer, format='PNG')
+    client = app.app.test_client()
+
+    def upload(tier):
+        return client.post('/upload', data={'file': (io.BytesIO(buffer.getvalue()), 'peta.png'), 'tier': tier},
+                           content_type='multipart/form-data')
+
+    with tempfile.TemporaryDirectory() as folder:
+        app.app.config.update(UPLOAD_FOLDER=folder, PROCESSED_MAPS_FOLDER=os.path.join(folder, 'maps'))
+        try:
+            fast = upload('fast').get_json()
+            fast_lookups = list(lookups)
+            standard = upload('standard').get_json()
+            invalid = upload('turbo')
+            standard_lookups = len(lookups)
+            parsed = client.post('/parse-text', json={'texts': [MAP_TEXT], 'tier': 'fast'}).get_json()
+        finally:
+            for name, function in previous.items():
+                setattr(app, name, function)
+            app.app.config.update(previous_config)
+            app.edit_sessions.clear()
+
+    print(f"   OCR heights: {heights}, standard lookups: {lookups}")
+    assert fast['success'] and fast['preview']['processing_tier'] == 'fast'
+    assert heights[0] == 300, "Tier fast hanya membaca 30% bagian atas gambar"
+    assert fast['preview']['map_id'] == '5171030005000103' and fast['preview']['village'] == 'DAUH PURI'
+    assert fast_lookups == [], "Tier fast tidak mencari ke jaringan"
+    assert fast['preview']['segments'], "Tier fast tetap menghasilkan segmen"
+
+    assert standard['success'] and standard['preview']['processing_tier'] == 'standard'
+    assert heights[-1] == 1000
+    assert lookups and all(cache_only for _, cache_only in lookups), "Tier standard mencari dari cache saja"
+    assert invalid.status_code == 400
+    assert parsed['results'][0]['preview']['processing_tier'] == 'fast' and len(lookups) == standard_lookups
+
+def test_standard_tier_pending_stays_cache_only():
+    """Test bisnis dan pusat ekonomi yang tertunda pada tier standard tetap dicari dari cache saja di latar belakang"""
+    print("\n🧪 Testing Cache-Only Background Enrichment")
+    print("=" * 50)
+
+    geocoder = app.geocoder
+    sent = []
+
+    def fake_request(method, url, **kwargs):
+        sent.append(kwargs.get('params', {}).get('q'))
+        response = requests.Response()
+        response.status_code, response._content = 200, b'[]'
+        return response
+
+    previous_request = geocoder.session.request
+    previous_breaker = (geocoder.consecutive_failures, geocoder.breaker_open_until)
+    geocoder.session.request = fake_request
+    geocoder.consecutive_failures, geocoder.breaker_open_until = 0, 0.0
+    misses = geocoder.get_stats()['cache_only_misses']
+    try:
+        for start_background in (True, False):
+            app.enrichment_results.clear()
+            preview = app.parse_map_text(MAP_TEXT, tier='standard', deadline=time.monotonic(),
+                                         start_background=start_background)['preview']
+            if not start_background:
+                app.start_deferred_enrichment(preview['map_id'])
+            assert app.wait_for_enrichment(preview['map_id'], 10)
+            pending_centers = [center['name'] for center in preview['economic_centers'] if center.get('status') == 'pending']
+            resolved = app.enrichment_results[preview['map_id']]['resolved']
+            assert 'Warung Makan Sari' in resolved and pending_centers and all(name in resolved for name in pending_centers)
+        standard_sent = list(sent)
+
+        # The same map on the full tier does go to the network in the background
+        app.enrichment_results.clear()
+        preview = app.parse_map_text(MAP_TEXT, tier='full', deadline=time.monotonic())['preview']
+        assert app.wait_for_enrichment(preview['map_id'], 10)
+    finally:
+        geocoder.session.request = previous_request
+        geocoder.consecutive_failures, geocoder.breaker_open_until = previous_breaker
+        app.enrichment_results.clear()
+
+    cache_only_misses = geocoder.get_stats()['cache_only_misses'] - misses
+    print(f"   Standard: {len(standard_sent)} requests, {cache_only_misses} cache-only misses; full: {len(sent)} requests")
+    assert standard_sent == [], "Tier standard tidak boleh ke jaringan walau dilanjutkan di latar belakang"
+    assert cache_only_misses > 0 and sent
+
+if __name__ == "__main__":
+    test_tier_names()
+    test_cache_only_geocoding()
+    test_upload_tiers()
+    test_standard_tier_pending_stays_cache_only()
+    print("\n✅ All processing tier tests passed!")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script untuk estimasi ulang massal peta tersimpan saat aturan estimasi berubah
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import app
+from app import (
+    detect_economic_centers, load_processed_map, parse_map_text, reestimate_economic_centers,
+    reestimate_processed_maps
+)
+from reestimate_maps import summarize
+
+MAP_TEXT = """5171030005000103
+Provinsi : [51] BALI
+Kabupaten/Kota : [71] DENPASAR
+Kecamatan : [030] DENPASAR BARAT
+Desa/Kelurahan : [005] DAUH PURI
+LINGKUNGAN PERUMAHAN PADAT [01]
+Pasar Induk Sawah
+Warung Makan Sari
+LINGKUNGAN BANJAR SAWAH [02]
+Mall Bali Galeria
+Jl. Kenanga"""
+
+LEGACY_RECORD = {
+    'map_id': '5171030005000104', 'province': 'BALI', 'regency': 'DENPASAR', 'district': 'DENPASAR BARAT',
+    'village': 'DAUH PURI', 'businesses': ['Pasar Kumbasari'], 'business_types': {'Pasar Kumbasari': 'pasar'},
+    'text': "5171030005000104\nLINGKUNGAN BANJAR KAJA [01]\nPasar Kumbasari\nJl. Sulawesi"
+}
+
+def test_batch_matches_detection():
+    """Test estimasi UMKM per kolom sama dengan detect_economic_centers untuk setiap konteks peta"""
+    print("🧪 Testing Batch Economic Center Estimates")
+    print("=" * 50)
+
+    names = ['Pasar Induk Badung', 'Mall Bali Galeria', 'Supermarket Tiara', 'Pasar Modern', 'Toko Sari']
+    details = {name: {} for name in names}
+    for environment in ['PERKAMBINGAN', 'SAWAH', 'PABRIK', 'BANJAR SARI', 'KAWASAN INDUSTRI']:
+        environments = [{'name': environment, 'code': '01'}]
+        expected = detect_economic_centers(names, details, environments=environments,
+                                           dominant_load=app.determine_dominant_load(environment), enrich=False)
+        batch = reestimate_economic_centers([{'environments': environments, 'business_details': details}])[0]
+        print(f"   {environment}: {[center['estimated_umkm'] for center in batch]}")
+        assert [(center['name'], center['estimated_umkm']) for center in batch] == \
+            [(center['name'], center['estimated_umkm']) for center in expected]
+
+def test_reestimate_stored_maps():
+    """Test estimasi ulang tanpa perubahan aturan tidak menghasilkan selisih, dan perubahan aturan terlaporkan"""
+    print("\n🧪 Testing Re-estimation Of Stored Maps")
+    print("=" * 50)
+
+    previous_folder = app.app.config['PROCESSED_MAPS_FOLDER']
+    previous_table = app.SEGMENT_TABLE
+    previous_rule = app.ECONOMIC_CENTER_CONTEXT_RULES[1]
+    with tempfile.TemporaryDirectory() as folder:
+        app.app.config['PROCESSED_MAPS_FOLDER'] = folder
+        try:
+            assert parse_map_text(MAP_TEXT, save=True)['success']
+            stored = load_processed_map('5171030005000103')
+            with open(os.path.join(folder, '5171030005000104.json'), 'w', encoding='utf-8') as f:
+                json.dump(LEGACY_RECORD, f)
+
+            records, report = reestimate_processed_maps()
+            print(f"   Unchanged rules: {len(report)} changes (only the legacy map)")
+            assert len(records) == 2 and set(report['map_id']) == {'5171030005000104'}
+            assert report['old'].isna().all()
+            legacy = load_processed_map('5171030005000104')
+            assert legacy['estimates']['economic_centers'] == [
+                {'name': 'Pasar Kumbasari', 'type': 'pasar', 'estimated_umkm': 100}]
+            assert reestimate_processed_maps()[1].empty
+
+            # Rule change: high-density BTT share 0.95 -> 0.9, agricultural pasar factor 1.2 -> 1.5
+            app.SEGMENT_TABLE = np.array(previous_table)
+            app.SEGMENT_TABLE[app.SEGMENT_AREA_TYPES['high_density_residential'], 1] = 0.9
+            app.ECONOMIC_CENTER_CONTEXT_RULES[1] = (previous_rule[0], previous_rule[1],
+                                                    dict(previous_rule[2], pasar=('reduce', 1.5, 50)))
+            records, report = reestimate_processed_maps(['5171030005000103'], write=False)
+            print(report.to_string(index=False))
+            changes = {(row.kind, row.name, row.field): (row.old, row.new) for row in report.itertuples()}
+            assert changes[('segment', 'SEG01', 'btt')] == (142, 135)
+            assert changes[('segment', 'SEG01', 'btt_kosong')] == (8, 15)
+            assert changes[('economic_center', 'Pasar Induk Sawah', 'estimated_umkm')] == (125, 100)
+            assert ('segment', 'SEG02', 'btt') not in changes
+            assert load_processed_map('5171030005000103')['estimates'] == stored['estimates'], "write=False tidak menyimpan"
+
+            summary = summarize(records, report)
+            print(f"   Summary: {summary}")
+            assert summary['changed_maps'] == 1 and summary['total_muatan_change'] == 7
+        finally:
+            app.app.config['PROCESSED_MAPS_FOLDER'] = previous_folder
+            app.SEGMENT_TABLE = previous_table
+            app.ECONOMIC_CENTER_CONTEXT_RULES[1] = previous_rule
+
+if __name__ == "__main__":
+    test_batch_matches_detection()
+    test_reestimate_stored_maps()
+    print("\n✅ All re-estimation tests passed!")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script untuk batas waktu per request dan enrichment latar belakang
+"""
+
+import sys
+import os
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from app import geocoder, geocoding_deadline, RequestBudgetExceeded, merge_background_enrichment
+
+SAMPLE_TEXT = """
+5171030005000103
+Provinsi : [51] BALI
+Kabupaten/Kota : [71] DENPASAR
+Kecamatan : [030] DENPASAR BARAT
+Desa/Kelurahan : [005] DAUH PURI
+Pasar Kumbasari
+Toko Sederhana
+"""
+
+def fake_business_info(business_name, location="Indonesia", expected_admin=None):
+    return {
+        'coordinates': '-8.655100, 115.209400',
+        'latitude': '-8.655100',
+        'longitude': '115.209400',
+        'accuracy': 'high',
+        'validated': True,
+        'operational_hours': '07:00-19:00',
+        'business_type': 'marketplace'
+    }
+
+def test_budget_blocks_geocoding_calls():
+    """Test panggilan geocoding ditolak setelah batas waktu habis"""
+    print("🧪 Testing Budget Blocks Geocoding Calls")
+    print("=" * 50)
+
+    raised = False
+    with geocoding_deadline(time.monotonic() - 1):
+        try:
+            geocoder.get("http://127.0.0.1:9/search", timeout=5)
+        except RequestBudgetExceeded:
+            raised = True
+    print(f"   Raised RequestBudgetExceeded: {raised}")
+    assert raised
+
+def test_pending_then_background_resolution():
+    """Test bisnis ditandai pending lalu diselesaikan di latar belakang untuk download"""
+    print("\n🧪 Testing Pending Then Background Resolution")
+    print("=" * 50)
+
+    previous_search = app.search_business_info_improved
+    app.search_business_info_improved = fake_business_info
+    app.enrichment_results.clear()
+    try:
+        data = app.parse_wss_data_improved(SAMPLE_TEXT, deadline=time.monotonic() - 1)
+        statuses = {name: detail.get('status') for name, detail in data['business_details'].items()}
+        print(f"   Statuses after parse: {statuses}")
+        assert statuses['Pasar Kumbasari'] == 'pending'
+        assert statuses['Toko Sederhana'] == 'pending'
+        centers = {center['name']: center for center in data['economic_centers']}
+        assert centers['Pasar Kumbasari']['status'] == 'pending'
+
+        # Wait for the background workers
+        for _ in range(100):
+            with app.enrichment_lock:
+                if not app.enrichment_results[data['map_id']]['pending']:
+                    break
+            time.sleep(0.05)
+
+        merge_background_enrichment(data)
+    finally:
+        app.search_business_info_improved = previous_search
+        app.enrichment_results.clear()
+
+    detail = data['business_details']['Pasar Kumbasari']
+    print(f"   Resolved detail: {detail}")
+    assert 'status' not in detail
+    assert detail['operational_hours'] == '07:00-19:00'
+    assert detail['business_type_osm'] == 'marketplace'
+    center = centers['Pasar Kumbasari']
+    assert 'status' not in center
+    assert center['latitude'] == '-8.655100'
+
+if __name__ == "__main__":
+    test_budget_blocks_geocoding_calls()
+    test_pending_then_background_resolution()
+    print("\n✅ All request budget tests passed!")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script untuk parser satu kali jalan (data peta, bangunan dan data kontekstual dari satu scan)
+"""
+
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from app import scan_wss_text, parse_wss_data_improved, extract_contextual_data, detect_building_types
+
+SAMPLE_TEXT = """
+5171030005000103
+Provinsi : [51] BALI
+Kabupaten/Kota : [71] DENPASAR
+Kecamatan : [030] DENPASAR BARAT
+Desa/Kelurahan : [005] DAUH PURI
+Skala 1:353
+
+LINGKUNGAN PERUMAHAN GRIYA [02]
+Toko Sederhana
+Kos Putri Melati
+Rumah Kosong
+Masjid Al-Ikhlas
+Jl. Gajah Mada No. 10
+Jalan Sudirman
+Koordinat: -8.6500, 115.2167
+"""
+
+def without_enrichment(test):
+    previous = (app.search_business_info, app.search_business_info_improved, app.get_precise_coordinates)
+    app.search_business_info = app.search_business_info_improved = app.get_precise_coordinates = lambda *args, **kwargs: {}
+    try:
+        test()
+    finally:
+        app.search_business_info, app.search_business_info_improved, app.get_precise_coordinates = previous
+
+def test_shared_scan_matches_separate_passes():
+    """Test hasil dengan scan bersama sama dengan parsing terpisah"""
+    print("🧪 Testing Shared Scan Matches Separate Passes")
+    print("=" * 50)
+
+    def check():
+        separate_data = parse_wss_data_improved(SAMPLE_TEXT)
+        separate_context = extract_contextual_data(SAMPLE_TEXT)
+
+        scan = scan_wss_text(SAMPLE_TEXT)
+        shared_data = parse_wss_data_improved(SAMPLE_TEXT, scan=scan)
+        shared_context = extract_contextual_data(SAMPLE_TEXT, scan=scan)
+
+        print(f"   Businesses: {shared_data['businesses']}")
+        print(f"   Streets: {shared_data['streets']}, contextual: {shared_context['streets']}")
+        assert shared_data == separate_data
+        assert shared_context == separate_context
+        assert shared_data['building_data'] == detect_building_types(SAMPLE_TEXT)
+        assert shared_data['village'] == 'DAUH PURI'
+        assert shared_data['streets'] == ['Jl. Gajah Mada No', 'Jl. Sudirman']
+        assert 'Kos Putri Melati' in shared_data['building_data']['details']['kos_kosan']
+        assert shared_context['target_environment'] == 'perumahan'
+        assert shared_context['coordinates'] == ['8.6500, 115.2167']
+
+    without_enrichment(check)
+
+def test_each_line_tokenized_once():
+    """Test setiap baris hanya di-tokenize sekali untuk parsing dan ekstraksi kontekstual"""
+    print("\n🧪 Testing Each Line Tokenized Once")
+    print("=" * 50)
+
+    calls = []
+    tokenize = app.tokenize_wss_line
+
+    def counting_tokenize(line):
+        calls.append(line)
+        return tokenize(line)
+
+    def check():
+        app.tokenize_wss_line = counting_tokenize
+        try:
+            scan = scan_wss_text(SAMPLE_TEXT)
+            parse_wss_data_improved(SAMPLE_TEXT, scan=scan)
+            extract_contextual_data(SAMPLE_TEXT, scan=scan)
+        finally:
+            app.tokenize_wss_line = tokenize
+
+    without_enrichment(check)
+    non_empty_lines = [line for line in SAMPLE_TEXT.split('\n') if line.strip()]
+    print(f"   Tokenized {len(calls)} of {len(non_empty_lines)} lines")
+    assert len(calls) == len(non_empty_lines)
+
+if __name__ == "__main__":
+    test_shared_scan_matches_separate_passes()
+    test_each_line_tokenized_once()
+    print("\n✅ All single-pass parser tests passed!")
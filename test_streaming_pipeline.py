@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Test script untuk pipeline streaming: parsing baris dan pencarian bisnis berjalan bersamaan
+"""
+
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from app import parse_wss_data_improved, scan_wss_text, stream_wss_text
+from pipeline import Stage, StreamingPipeline
+
+MAP_TEXT = """5171030005000103
+Provinsi : [51] BALI
+Kabupaten/Kota : [71] DENPASAR
+Kecamatan : [030] DENPASAR BARAT
+Desa/Kelurahan : [005] DAUH PURI
+Warung Makan Sari
+Bengkel Motor Jaya
+Apotek Sehat
+Salon Ayu
+Bank BCA
+Toko Kain Ayu
+Jl. Kenanga
+Jl. Gatot Subroto
+Jl. Sulawesi
+Jl. Thamrin"""
+
+def test_pipeline_backpressure_and_metrics():
+    """Test antrian terbatas menahan produsen, urutan tahap dan metrik per tahap"""
+    print("🧪 Testing Streaming Pipeline Stages")
+    print("=" * 50)
+
+    collected = []
+    lock = threading.Lock()
+
+    def slow_square(item):
+        time.sleep(0.01)
+        return item * item
+
+    def collect(item):
+        with lock:
+            collected.append(item)
+
+    pipeline = StreamingPipeline([Stage('square', slow_square, workers=2, queue_size=1),
+                                  Stage('collect', collect)], producer='numbers')
+    with pipeline:
+        for number in range(20):
+            pipeline.put(number)
+    report = pipeline.metrics()
+    for stage in report['stages']:
+        print(f"   {stage['name']}: {stage['items']} items, blocked {stage['blocked_seconds']:.3f}s, "
+              f"max queue {stage['max_queue_depth']}")
+    assert sorted(collected) == [number * number for number in range(20)]
+    producer, square, collect_stage = report['stages']
+    assert producer['items'] == square['items'] == collect_stage['items'] == 20
+    assert producer['blocked_seconds'] > 0, "Antrian penuh harus menahan produsen"
+    assert square['max_queue_depth'] <= 1 and square['busy_seconds'] >= 0.2
+
+    def failing(item):
+        raise ValueError(f"rusak {item}")
+
+    try:
+        with StreamingPipeline([Stage('fail', failing)]) as broken:
+            broken.put(1)
+    except ValueError as e:
+        print(f"   Error diteruskan: {e}")
+    else:
+        raise AssertionError("Error di worker harus diteruskan ke pemanggil")
+
+    # On a shared executor: no threads of its own, same results, put() still held back
+    collected.clear()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pooled = StreamingPipeline([Stage('square', slow_square, workers=2, queue_size=1),
+                                    Stage('collect', collect)], producer='numbers', executor=executor)
+        with pooled:
+            for number in range(20):
+                pooled.put(number)
+            assert not any(thread.name.startswith('square-') for thread in threading.enumerate())
+    producer, square, collect_stage = pooled.metrics()['stages']
+    print(f"   Executor: blocked {producer['blocked_seconds']:.3f}s, max queue {square['max_queue_depth']}")
+    assert sorted(collected) == [number * number for number in range(20)]
+    assert square['items'] == collect_stage['items'] == 20
+    assert producer['blocked_seconds'] > 0 and square['max_queue_depth'] <= 1
+
+def test_lookups_overlap_parsing():
+    """Test bisnis dicari saat baris berikutnya masih diparsing, dengan hasil sama seperti parsing berurutan"""
+    print("\n🧪 Testing Parsing Overlapped With Enrichment")
+    print("=" * 50)
+
+    lookup_started = []
+    line_finished = []
+    expected_admins = []
+
+    def fake_business_info(business_name, location="Indonesia", expected_admin=None):
+        lookup_started.append(time.perf_counter())
+        expected_admins.append(expected_admin)
+        time.sleep(0.05)
+        return {'operational_hours': '09:00-21:00', 'coordinates': '-8.650000, 115.220000'}
+
+    def slow_tokenize(line):
+        time.sleep(0.01)
+        token = previous['tokenize_wss_line'](line)
+        line_finished.append(time.perf_counter())
+        return token
+
+    names = ['search_business_info_improved', 'tokenize_wss_line']
+    previous = {name: getattr(app, name) for name in names}
+    app.search_business_info_improved = fake_business_info
+    app.tokenize_wss_line = slow_tokenize
+    runs = app.streaming_stats.get_stats()['runs']
+    try:
+        start = time.perf_counter()
+        streamed = parse_wss_data_improved(MAP_TEXT, scan=stream_wss_text(MAP_TEXT))
+        streamed_seconds = time.perf_counter() - start
+        first_lookup, last_line = lookup_started[0], line_finished[-1]
+
+        previous_workers = app.app.config['PIPELINE_WORKERS']
+        app.app.config['PIPELINE_WORKERS'] = 0
+        start = time.perf_counter()
+        sequential = parse_wss_data_improved(MAP_TEXT, scan=stream_wss_text(MAP_TEXT))
+        sequential_seconds = time.perf_counter() - start
+        app.app.config['PIPELINE_WORKERS'] = previous_workers
+    finally:
+        for name, function in previous.items():
+            setattr(app, name, function)
+
+    print(f"   Streaming {streamed_seconds:.2f}s, sequential {sequential_seconds:.2f}s")
+    assert first_lookup < last_line, "Pencarian bisnis pertama dimulai sebelum baris terakhir selesai"
+    assert streamed_seconds < sequential_seconds
+    assert streamed['business_details'] == sequential['business_details']
+    assert list(streamed['business_details']) == streamed['businesses']
+    assert all(admin == {'district': 'DENPASAR BARAT', 'village': 'DAUH PURI'} for admin in expected_admins)
+
+    stats = app.streaming_stats.get_stats()
+    print(f"   Stages: {[(stage['name'], stage['items']) for stage in stats['last_run']['stages']]}")
+    assert stats['runs'] == runs + 1
+    assert [stage['name'] for stage in stats['last_run']['stages']] == ['parser', 'enrichment', 'aggregation']
+    assert stats['last_run']['stages'][1]['items'] == len(streamed['businesses'])
+    assert app.app.test_client().get('/metrics/pipeline').get_json()['runs'] == runs + 1
+
+def test_streaming_falls_back():
+    """Test parsing tanpa streaming saat anggaran habis, dan pencarian ulang hanya untuk bisnis sebelum nama wilayah"""
+    print("\n🧪 Testing Streaming Fallbacks")
+    print("=" * 50)
+
+    scan = stream_wss_text(MAP_TEXT, deadline=time.monotonic())
+    assert 'pending_businesses' not in scan and scan['data']['business_details'] == {}
+
+    # A map ID outside the BPS master fills nothing in, so the kecamatan below the business is new
+    late_header = "9999999999999999\nWarung Makan Sari\nKecamatan : [030] DENPASAR BARAT\nToko Kain Ayu"
+    lookups = []
+
+    def fake_business_info(business_name, location="Indonesia", expected_admin=None):
+        lookups.append((business_name, expected_admin, threading.current_thread().name))
+        return {'address': 'Denpasar Barat'} if expected_admin else {'address': 'Tanpa wilayah'}
+
+    previous = app.search_business_info_improved
+    app.search_business_info_improved = fake_business_info
+    try:
+        scan = stream_wss_text(late_header)
+    finally:
+        app.search_business_info_improved = previous
+    print(f"   Lookups: {[(name, admin) for name, admin, _ in lookups]}")
+    warung = [admin for name, admin, _ in lookups if name == 'Warung Makan Sari']
+    assert warung == [{}, {'district': 'DENPASAR BARAT'}], "Bisnis sebelum header dicari ulang dengan nama wilayah"
+    assert [admin for name, admin, _ in lookups if name == 'Toko Kain Ayu'] == [{'district': 'DENPASAR BARAT'}]
+    assert all(thread.startswith('pipeline') for _, _, thread in lookups), "Pencarian memakai pool bersama"
+    assert scan['pending_businesses'] == []
+    assert all(detail['address'] == 'Denpasar Barat' for detail in scan['data']['business_details'].values())
+    assert scan['data']['businesses'] == scan_wss_text(late_header)['data']['businesses']
+
+if __name__ == "__main__":
+    test_pipeline_backpressure_and_metrics()
+    test_lookups_overlap_parsing()
+    test_streaming_falls_back()
+    print("\n✅ All streaming pipeline tests passed!")
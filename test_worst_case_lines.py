@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script untuk ketahanan parser terhadap baris OCR yang panjang dan tidak wajar
+"""
+
+import sys
+import os
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+from app import scan_wss_text, clip_ocr_line
+from benchmark_worst_case import FAMILIES
+from wss_patterns import COORDINATES, CONTEXTUAL_COORDINATES, SCALE_RATIO, scan_admin_fields
+
+# Generous per-line limit: the backtracking patterns took seconds on these lines
+LINE_LIMIT_SECONDS = 0.25
+
+def test_adversarial_lines_within_limit():
+    """Test setiap keluarga baris adversarial selesai di bawah batas waktu per baris, juga tanpa batas panjang"""
+    print("🧪 Testing Adversarial OCR Lines")
+    print("=" * 50)
+
+    previous_limit = app.app.config['MAX_OCR_LINE_LENGTH']
+    app.app.config['MAX_OCR_LINE_LENGTH'] = 0
+    try:
+        for name, make_line in FAMILIES.items():
+            line = make_line(3000)
+            start = time.perf_counter()
+            scan_wss_text(line)
+            elapsed = time.perf_counter() - start
+            print(f"   {name}: {elapsed * 1000:.1f} ms")
+            assert elapsed < LINE_LIMIT_SECONDS, f"{name} terlalu lambat: {elapsed:.2f}s"
+    finally:
+        app.app.config['MAX_OCR_LINE_LENGTH'] = previous_limit
+
+def test_long_lines_are_clipped():
+    """Test baris yang melebihi MAX_OCR_LINE_LENGTH dipotong sebelum parsing"""
+    print("\n🧪 Testing Line Length Bound")
+    print("=" * 50)
+
+    limit = app.app.config['MAX_OCR_LINE_LENGTH']
+    line = 'Toko ' + 'A' * (limit * 3)
+    clipped = clip_ocr_line(line)
+    print(f"   {len(line)} -> {len(clipped)} characters")
+    assert len(clipped) == limit and clipped.startswith('Toko ')
+    assert clip_ocr_line('  Jalan Sudirman  ') == 'Jalan Sudirman'
+
+def test_hardened_patterns_keep_matches():
+    """Test pola yang diperketat tetap menghasilkan kecocokan yang sama"""
+    print("\n🧪 Testing Hardened Patterns")
+    print("=" * 50)
+
+    assert COORDINATES.search('Koordinat: -8.6500, 115.2167').groups() == ('-8.6500', '115.2167')
+    assert COORDINATES.search('5-8.6, 115.2').group(1) == '-8.6'
+    assert CONTEXTUAL_COORDINATES.search('-8.6500,115.2167').group(1) == '8.6500,115.2167'
+    assert SCALE_RATIO.search('1 : 353 (1:353)').group(1) == '1:353'
+    assert scan_admin_fields('LINGKUNGAN BANJAR SARI [03]')['environment_code'] == '03'
+    assert scan_admin_fields('LINGKUNGAN   [03]') == {'environment': ' ', 'environment_code': '03'}
+    assert 'environment' not in scan_admin_fields('LINGKUNGAN' + ' ' * 5000 + '!')
+
+if __name__ == "__main__":
+    test_adversarial_lines_within_limit()
+    test_long_lines_are_clipped()
+    test_hardened_patterns_keep_matches()
+    print("\n✅ All worst-case line tests passed!")
@@ -0,0 +1,93 @@
+"""
+Precompiled regular expressions for the WSS Map Extractor
+Patterns are compiled once at import instead of going through re's pattern cache on every
+OCR line. Administrative header fields are read by one combined scanner (ADMIN_FIELD_SCANNER)
+so a header line is matched once instead of once per field.
+
+OCR output is untrusted, so every pattern is written to stay linear in the line length
+(benchmark_worst_case.py checks this on adversarial lines):
+- runs followed by a character they cannot match are possessive (\d++ before '.' or ':'),
+  which returns the same match without retrying shorter runs
+- number patterns only start where a digit run starts ((?<!\d)); a match inside a run would
+  have started at the run's first digit anyway
+- the coded LINGKUNGAN alternative checks with one possessive lookahead that a "[code]" follows
+  before the backtracking capture runs
+Possessive quantifiers and atomic groups need Python 3.11+.
+"""
+
+import re
+
+# Map ID: 16 digit SLS code printed on the map
+MAP_ID = re.compile(r'(\d{16})')
+MAP_ID_EXACT = re.compile(r'^\d{16}$')
+
+# Every administrative field in one alternation. Alternatives start with their label, so re
+# only tries them where a label could begin, and capture the value in a lookahead without
+# consuming it: finditer() still finds a label that sits inside another field's value, and the
+# first match per field is the one a separate search would return. Fallbacks (kelurahan/desa
+# without a code, an environment without a code) come after the primary pattern of the same label.
+ADMIN_FIELD_PATTERN = r'''
+      PROVINSI \s*:\s* \[?\d+\]? \s* (?=(?P<province>[A-Z\s]+))
+    | (?:KABUPATEN|KOTA) \s*:\s* \[?\d+\]? \s* (?=(?P<regency>[A-Z\s]+))
+    | KECAMATAN \s*:\s* \[?\d+\]? \s* (?=(?P<district>[A-Z\s]+))
+    | (?:DESA|KELURAHAN) \s*:\s* \[?\d+\]? \s* (?=(?P<village>[A-Z\s]+))
+    | KELURAHAN \s+ (?=(?P<kelurahan>[A-Z\s]+))
+    | DESA \s+ (?=(?P<desa>[A-Z\s]+))
+    | SKALA \s* (?P<scale>\d++:\d+)
+    | LINGKUNGAN (?=[A-Z\s]*+\[\d++\]) \s+ (?=(?P<environment>[A-Z\s]+) \s* \[ (?P<environment_code>\d+) \])
+    | LINGKUNGAN \s+ (?=(?P<environment_name>[A-Z\s]+))
+'''
+# Run on the upper-cased line: case-sensitive literals let re skip positions that cannot start a label
+ADMIN_FIELD_SCANNER = re.compile(ADMIN_FIELD_PATTERN, re.VERBOSE)
+# Non-ASCII lines can change length when upper-cased, so they are scanned as written
+ADMIN_FIELD_SCANNER_IGNORECASE = re.compile(ADMIN_FIELD_PATTERN, re.VERBOSE | re.IGNORECASE)
+# Literal prefilter: most map lines carry no admin label at all
+ADMIN_LABEL = re.compile(r'PROVINSI|KABUPATEN|KOTA|KECAMATAN|DESA|KELURAHAN|SKALA|LINGKUNGAN')
+
+# Scale without the SKALA label (case-sensitive, like the old fallback search)
+SCALE_RATIO = re.compile(r'((?<!\d)\d++:\d+)')
+
+# Streets: "Jl. X" / "Jl X" first, then "Jalan X"; the contextual parser keeps "Jalan" as written
+STREET = re.compile(r'(Jl\.?\s*[A-Za-z\s]+)')
+JALAN = re.compile(r'Jalan\s+([A-Za-z\s]+)')
+CONTEXTUAL_STREET = re.compile(r'(Jl\.?\s*[A-Za-z\s]+|Jalan\s+[A-Za-z\s]+)')
+
+# Coordinates as "lat, lon"; the contextual variant keeps the unsigned text
+COORDINATES = re.compile(r'(-?(?<!\d)\d++\.\d++),\s*+(-?\d++\.\d+)')
+CONTEXTUAL_COORDINATES = re.compile(r'((?<!\d)\d++\.\d++,\s*+\d++\.\d+)')
+
+# Name cleanup: map labels keep word characters, spaces, dashes and dots
+LINE_NAME_CLEANUP = re.compile(r'[^\w\s\-\.]')
+# Business names sent to geocoding keep word characters and spaces only
+BUSINESS_NAME_CLEANUP = re.compile(r'[^\w\s]')
+
+OPENING_HOURS = re.compile(r'(\d{1,2}:\d{2}\s*[-–]\s*\d{1,2}:\d{2})')
+
+WHITESPACE = re.compile(r'\s+')
+ADMIN_LEVEL_PREFIX = re.compile(r'^(PROVINSI|KABUPATEN|KOTA|KECAMATAN|DESA|KELURAHAN|KEL\.|DS\.)\s+')
+
+def scan_admin_fields(line, upper=None):
+    """
+    Administrative fields of one line from a single combined scan
+    upper: line.upper(), when the caller already has it
+    Returns: dict of group name -> first match in the line, as written, for the groups that matched
+    (the same value a separate case-insensitive re.search per field would return)
+    """
+    if line.isascii():
+        text, scanner = upper if upper is not None else line.upper(), ADMIN_FIELD_SCANNER
+        if not ADMIN_LABEL.search(text):
+            return {}
+    else:
+        text, scanner = line, ADMIN_FIELD_SCANNER_IGNORECASE
+    
+    fields = {}
+    for match in scanner.finditer(text):
+        name = match.lastgroup
+        if name == 'environment_code':
+            # The code group closes last in the "LINGKUNGAN NAME [code]" alternative
+            name = 'environment'
+        if name not in fields:
+            fields[name] = line[match.start(name):match.end(name)]
+            if name == 'environment':
+                fields['environment_code'] = line[match.start('environment_code'):match.end('environment_code')]
+    return fields
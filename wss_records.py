@@ -0,0 +1,141 @@
+"""
+Compact record types for entities parsed from WSS maps
+Records use __slots__ (no per-instance dict) and live in EntityIndex collections, which keep
+insertion order and deduplicate by hash, so parsing a map stays linear in its number of lines.
+to_preview() converts them to the JSON shapes the preview and the Excel template already use.
+"""
+
+class NamedRecord:
+    """Entity identified by its name alone (streets, landmarks, OCR coordinate texts)"""
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def key(self):
+        return self.name
+
+    def to_preview(self):
+        return self.name
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+class Street(NamedRecord):
+    __slots__ = ()
+
+class Landmark(NamedRecord):
+    __slots__ = ()
+
+class Business:
+    __slots__ = ('name', 'type')
+
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+
+    @property
+    def key(self):
+        return self.name
+
+    def to_preview(self):
+        return self.name
+
+    def __repr__(self):
+        return f"Business({self.name!r}, {self.type!r})"
+
+class Environment:
+    """Lingkungan with its sub-SLS code (two-digit string)"""
+
+    __slots__ = ('name', 'code')
+
+    def __init__(self, name, code):
+        self.name = name
+        self.code = code
+
+    @property
+    def key(self):
+        return (self.name, self.code)
+
+    def to_preview(self):
+        return {'name': self.name, 'code': self.code}
+
+    def __repr__(self):
+        return f"Environment({self.name!r}, {self.code!r})"
+
+class Coordinate:
+    __slots__ = ('latitude', 'longitude')
+
+    def __init__(self, latitude, longitude):
+        self.latitude = latitude
+        self.longitude = longitude
+
+    @property
+    def key(self):
+        return (self.latitude, self.longitude)
+
+    def to_preview(self):
+        return {'latitude': self.latitude, 'longitude': self.longitude}
+
+    def __repr__(self):
+        return f"Coordinate({self.latitude!r}, {self.longitude!r})"
+
+# BLOK III columns of a segment, in the order of the preview/Excel dict
+SEGMENT_FIELDS = (
+    'no', 'no_segmen', 'muatan_dominan', 'nama_wilayah', 'jumlah_shift', 'jam_operasional',
+    'contact_person', 'muatan_kk', 'btt', 'btt_kosong', 'bku', 'bbtt_non_usaha', 'muatan_usaha',
+    'total_muatan', 'kode_sub_sls', 'area_type'
+)
+
+class EntityIndex:
+    """Insertion-ordered collection of records, deduplicated by record key"""
+
+    __slots__ = ('records',)
+
+    def __init__(self, records=()):
+        self.records = {}
+        for record in records:
+            self.add(record)
+
+    def add(self, record):
+        """Add the record unless one with the same key exists; returns True when added"""
+        key = record.key
+        if key in self.records:
+            return False
+        self.records[key] = record
+        return True
+
+    def __contains__(self, key):
+        return key in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+    def to_preview(self):
+        return [record.to_preview() for record in self.records.values()]
+
+class EnvironmentIndex(EntityIndex):
+    """
+    Environments deduplicated by (name, code); has_name() serves lines without a code,
+    which only count as new when no environment of that name exists yet
+    """
+
+    __slots__ = ('names',)
+
+    def __init__(self, records=()):
+        self.names = set()
+        super().__init__(records)
+
+    def add(self, record):
+        if not super().add(record):
+            return False
+        self.names.add(record.name)
+        return True
+
+    def has_name(self, name):
+        return name in self.names